@@ -1,3 +1,6 @@
+import copy
+
+
 class Accesorios:
     def __init__(self, nombre: str, cantidad: int = 1, disponibilidad: bool = True,
                  durabilidad: int = 100, **kwargs):
@@ -29,5 +32,10 @@ class Accesorios:
         self.cantidad += 1
         self.disponibilidad = True
 
+    def clonar(self):
+        nuevo = copy.copy(self)
+        nuevo.registro_usuario = []
+        return nuevo
+
     def __repr__(self):
         return f"<Accesorio: {self.nombre} (Quedan: {self.cantidad})>"
\ No newline at end of file
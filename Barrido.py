@@ -0,0 +1,242 @@
+import os
+import csv
+import copy
+import json
+import random
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Replicas import ejecutar_replica, KPIS_ANUALES
+from CacheSemanas import huella_fichero, huella_fuentes
+
+# Además del código de la simulación, lo que convierte un año simulado en sus KPIs anuales
+MODULOS_KPIS = ["Facturacion", "Replicas"]
+
+
+class DefinicionBarrido:
+    """
+    Barrido de parámetros leído de un JSON:
+
+        {"nombre": "afluencia_vs_cardio", "modo": "rejilla" | "lhs", "puntos": 20,
+         "config": "config.json", "gimnasio": "datos_gimnasio.json", "replicas": 2, "semilla": 1234,
+         "parametros": {
+             "simulacion.clientes_base_por_sesion": {"min": 40, "max": 80, "pasos": 5, "entero": true},
+             "gimnasio.maquinas.Cardio": {"valores": [4, 6, 8, 10]},
+             "satisfaccion.penalizacion_espera_cola": {"min": 0.5, "max": 1.5, "pasos": 3}}}
+
+    Las rutas 'a.b.c' apuntan a config.json; las que empiezan por 'gimnasio.' a datos_gimnasio.json,
+    y 'gimnasio.maquinas.<Tipo>' fija cuántas máquinas hay de ese tipo.
+    En 'rejilla' se combinan todos los valores; en 'lhs' (hipercubo latino) se toman 'puntos'
+    combinaciones que cubren cada parámetro por estratos, con la semilla del barrido.
+    """
+    MODOS = ("rejilla", "lhs")
+
+    def __init__(self, ruta):
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        self.nombre = datos.get("nombre", os.path.splitext(os.path.basename(ruta))[0])
+        self.modo = datos.get("modo", "rejilla")
+        if self.modo not in self.MODOS:
+            raise ValueError(f"Modo de barrido desconocido: {self.modo!r} ({' o '.join(self.MODOS)})")
+        self.n_puntos = datos.get("puntos", 10)
+        self.ruta_config = datos.get("config", "config.json")
+        self.ruta_gym = datos.get("gimnasio")
+        self.replicas = datos.get("replicas", 1)
+        # Semilla fija: sin ella la caché no serviría entre ejecuciones
+        self.semilla = datos.get("semilla", 0)
+        self.parametros = datos.get("parametros", {})
+        if not self.parametros: raise ValueError(f"El barrido {ruta} no define 'parametros'.")
+        for nombre, rango in self.parametros.items():
+            if "valores" not in rango and not {"min", "max"} <= rango.keys():
+                raise ValueError(f"Parámetro {nombre}: hace falta 'valores' o 'min' y 'max'.")
+            if self.modo == "rejilla" and "valores" not in rango and "pasos" not in rango:
+                raise ValueError(f"Parámetro {nombre}: en rejilla hace falta 'valores' o 'pasos'.")
+
+    @staticmethod
+    def _valores(rango):
+        if "valores" in rango: return list(rango["valores"])
+        pasos = rango["pasos"]
+        if pasos == 1: return [rango["min"]]
+        valores = [rango["min"] + (rango["max"] - rango["min"]) * k / (pasos - 1) for k in range(pasos)]
+        return [round(v) for v in valores] if rango.get("entero") else [round(v, 6) for v in valores]
+
+    @staticmethod
+    def _en_estrato(rango, u):
+        """Valor del parámetro en el cuantil u ∈ [0, 1)."""
+        if "valores" in rango:
+            valores = rango["valores"]
+            return valores[min(int(u * len(valores)), len(valores) - 1)]
+        valor = rango["min"] + (rango["max"] - rango["min"]) * u
+        return round(valor) if rango.get("entero") else round(valor, 6)
+
+    def puntos(self):
+        """Lista de puntos {ruta: valor}, en un orden estable."""
+        nombres = list(self.parametros)
+        if self.modo == "rejilla":
+            puntos = [{}]
+            for nombre in nombres:
+                puntos = [dict(p, **{nombre: v}) for p in puntos for v in self._valores(self.parametros[nombre])]
+            return puntos
+
+        rng = random.Random(self.semilla)
+        n = self.n_puntos
+        columnas = {}
+        for nombre in nombres:
+            estratos = [(k + rng.random()) / n for k in range(n)]
+            rng.shuffle(estratos)
+            columnas[nombre] = [self._en_estrato(self.parametros[nombre], u) for u in estratos]
+        return [{nombre: columnas[nombre][k] for nombre in nombres} for k in range(n)]
+
+
+def _fijar(datos, ruta, valor):
+    claves = ruta.split(".")
+    for clave in claves[:-1]:
+        if clave not in datos: raise KeyError(f"'{ruta}': no existe '{clave}'")
+        datos = datos[clave]
+    datos[claves[-1]] = valor
+
+
+def _ajustar_maquinas(gym, tipo, n):
+    """Deja 'n' máquinas de 'tipo': quita las últimas o clona la última con ids nuevos."""
+    n = int(n)
+    del_tipo = [m for m in gym["maquinas"] if m["tipo_maquina"] == tipo]
+    if not del_tipo: raise KeyError(f"No hay máquinas de tipo '{tipo}' que tomar como modelo")
+    if n < len(del_tipo):
+        sobran = {id(m) for m in del_tipo[n:]}
+        gym["maquinas"] = [m for m in gym["maquinas"] if id(m) not in sobran]
+        return
+    siguiente_id = max(m["id"] for m in gym["maquinas"]) + 1
+    modelo = del_tipo[-1]
+    for k in range(len(del_tipo), n):
+        nueva = dict(modelo, id=siguiente_id, nombre=f"{modelo['nombre']} ({k + 1})")
+        gym["maquinas"].append(nueva)
+        siguiente_id += 1
+
+
+def aplicar_punto(config, gym, punto):
+    """Copias de config y gimnasio con los valores del punto aplicados."""
+    config, gym = copy.deepcopy(config), copy.deepcopy(gym)
+    for ruta, valor in punto.items():
+        if ruta.startswith("gimnasio.maquinas."):
+            _ajustar_maquinas(gym, ruta[len("gimnasio.maquinas."):], valor)
+        elif ruta.startswith("gimnasio."):
+            _fijar(gym, ruta[len("gimnasio."):], valor)
+        else:
+            _fijar(config, ruta, valor)
+    return config, gym
+
+
+def huella_codigo():
+    """Hash del código del que salen los KPIs: si cambia, los resultados en caché ya no valen."""
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    return [huella_fuentes()] + [huella_fichero(os.path.join(carpeta, f"{m}.py")) for m in MODULOS_KPIS]
+
+
+def huella_escenario(config, gym):
+    """Hash del escenario: config (sin rutas ni semilla, que no cambian el modelo), gimnasio y código."""
+    modelo = {k: v for k, v in config.items() if k != "rutas"}
+    modelo["simulacion"] = {k: v for k, v in modelo.get("simulacion", {}).items() if k != "semilla"}
+    texto = json.dumps({"config": modelo, "gimnasio": gym, "codigo": huella_codigo()},
+                       sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+
+
+class EjecutorBarrido:
+    """
+    Expande un barrido en escenarios, simula en un pool de procesos los (escenario, réplica) que no
+    estén ya en la caché y reúne los KPIs anuales de todos en Resultados_BARRIDO.csv.
+
+    La caché ('carpeta/cache/<hash>_s<semilla>_rNNN.json') se indexa por el hash del escenario, la semilla y
+    la réplica: repetir el barrido, ampliarlo o cambiar un rango sólo simula los puntos nuevos o
+    modificados, y cambiar el código de la simulación invalida todo. Todos los puntos usan la misma semilla raíz y réplicas, así que entre puntos hay
+    números aleatorios comunes.
+    """
+
+    def __init__(self, definicion, procesos=None, carpeta_salida=None):
+        self.definicion = definicion
+        self.procesos = procesos or os.cpu_count() or 1
+        self.carpeta_salida = carpeta_salida or os.path.join("barridos", definicion.nombre)
+        self.carpeta_cache = os.path.join(self.carpeta_salida, "cache")
+
+    def _ruta_cache(self, huella, replica):
+        return os.path.join(self.carpeta_cache, f"{huella}_s{self.definicion.semilla}_r{replica:03d}.json")
+
+    def _preparar(self):
+        """Escribe los ficheros de cada escenario y devuelve [(punto, huella, ruta_config, ruta_gym)]."""
+        d = self.definicion
+        with open(d.ruta_config, "r", encoding="utf-8") as f:
+            config_base = json.load(f)
+        ruta_gym_base = d.ruta_gym or config_base["rutas"]["archivo_gym"]
+        with open(ruta_gym_base, "r", encoding="utf-8") as f:
+            gym_base = json.load(f)
+
+        escenarios = []
+        for punto in d.puntos():
+            config, gym = aplicar_punto(config_base, gym_base, punto)
+            huella = huella_escenario(config, gym)
+            carpeta = os.path.join(self.carpeta_salida, "escenarios", huella)
+            os.makedirs(carpeta, exist_ok=True)
+            ruta_config, ruta_gym = os.path.join(carpeta, "config.json"), os.path.join(carpeta, "datos_gimnasio.json")
+            config["rutas"]["archivo_gym"] = ruta_gym
+            for ruta, datos in ((ruta_config, config), (ruta_gym, gym)):
+                with open(ruta, "w", encoding="utf-8") as f:
+                    json.dump(datos, f, indent=4, ensure_ascii=False)
+            escenarios.append((punto, huella, ruta_config, ruta_gym))
+        return escenarios
+
+    def ejecutar(self):
+        d = self.definicion
+        os.makedirs(self.carpeta_cache, exist_ok=True)
+        escenarios = self._preparar()
+
+        pendientes, vistos = [], set()
+        for punto, huella, ruta_config, ruta_gym in escenarios:
+            for i in range(d.replicas):
+                # Dos puntos que dan el mismo escenario (p. ej. valores repetidos) se simulan una vez
+                if (huella, i) in vistos or os.path.exists(self._ruta_cache(huella, i)): continue
+                vistos.add((huella, i))
+                pendientes.append((punto, huella, i, ruta_config, ruta_gym))
+        total = len(escenarios) * d.replicas
+        print(f"🧭 Barrido '{d.nombre}' ({d.modo}): {len(escenarios)} puntos x {d.replicas} réplicas | "
+              f"{total - len(pendientes)} en caché, {len(pendientes)} por simular en {self.procesos} procesos "
+              f"(semilla raíz {d.semilla})")
+
+        if pendientes:
+            with ProcessPoolExecutor(max_workers=self.procesos) as pool:
+                futuros = {}
+                for punto, huella, i, ruta_config, ruta_gym in pendientes:
+                    carpeta = os.path.join(self.carpeta_salida, "escenarios", huella, f"replica_{i:03d}")
+                    futuro = pool.submit(ejecutar_replica, ruta_config, i, d.semilla, carpeta, ruta_gym)
+                    futuros[futuro] = (punto, huella, i)
+                for hechos, futuro in enumerate(as_completed(futuros), 1):
+                    punto, huella, i = futuros[futuro]
+                    resultado = {"huella": huella, "replica": i, "semilla": d.semilla, "punto": punto,
+                                 "global": futuro.result()["global"]}
+                    # Se escribe entero y luego se renombra: un barrido cortado no deja cachés a medias
+                    ruta = self._ruta_cache(huella, i)
+                    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+                        json.dump(resultado, f, indent=4, ensure_ascii=False)
+                    os.replace(ruta + ".tmp", ruta)
+                    print(f"   ✅ [{hechos}/{len(pendientes)}] {huella} r{i}: "
+                          + ", ".join(f"{k}={v}" for k, v in punto.items()))
+
+        return self.recopilar(escenarios)
+
+    def recopilar(self, escenarios):
+        """Una fila por (punto, réplica) con los parámetros y los KPIs anuales."""
+        d = self.definicion
+        filas = []
+        for punto, huella, _, _ in escenarios:
+            for i in range(d.replicas):
+                with open(self._ruta_cache(huella, i), "r", encoding="utf-8") as f:
+                    resultado = json.load(f)
+                filas.append({"huella": huella, "replica": i, **punto,
+                              **{kpi: resultado["global"].get(kpi, 0) for kpi in KPIS_ANUALES}})
+
+        ruta = os.path.join(self.carpeta_salida, "Resultados_BARRIDO.csv")
+        with open(ruta, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.DictWriter(f, fieldnames=["huella", "replica", *d.parametros, *KPIS_ANUALES])
+            escritor.writeheader()
+            escritor.writerows(filas)
+        print(f"📁 {len(filas)} filas en: {ruta}")
+        return filas
@@ -0,0 +1,271 @@
+import os
+import gc
+import sys
+import json
+import time
+import pickle
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from Barrido import aplicar_punto
+from Config import Config
+from GestorSocios import GestorSocios
+from Gimnasio import Gimnasio
+from Loggers import AdministradorDeLogs, GeneradorReportes, SumideroNulo
+from MotorSimulacion import MotorSimulacion
+from NucleoEventos import crear_entorno
+from SimulacionAnual import simular_anio
+
+SEMILLA = 2024
+ESCALAS_SOCIOS = [300, 3000, 30000, 300000]
+ESCALAS_MAQUINAS = [30, 300]
+# Un año completo cuesta lo que 38 semanas: sólo en las escalas pequeñas
+ESCALAS_ANUAL = [(300, 30), (3000, 30)]
+# Semana "normal" de la que salen la flota, la semana simulada y el reporte
+SEMANA_ABSOLUTA, MES, SEMANA_MES, PESO = 5, "Octubre", 1, 1.0
+# Por debajo de esta diferencia (s) un empeoramiento es ruido del reloj, no una regresión
+RUIDO_S = 0.005
+
+
+def _escenario(carpeta, socios, maquinas, ruta_config="config.json"):
+    """
+    Config y gimnasio sintéticos: 'socios' socios iniciales y el gimnasio de datos_gimnasio.json
+    multiplicado hasta 'maquinas' máquinas (con aforo y clientes por sesión en proporción).
+    """
+    with open(ruta_config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    with open(config["rutas"]["archivo_gym"], "r", encoding="utf-8") as f:
+        gym = json.load(f)
+
+    factor = maquinas / len(gym["maquinas"])
+    por_tipo = {}
+    for m in gym["maquinas"]: por_tipo[m["tipo_maquina"]] = por_tipo.get(m["tipo_maquina"], 0) + 1
+    punto = {"simulacion.usuarios_totales_iniciales": socios,
+             "simulacion.clientes_base_por_sesion": round(config["simulacion"]["clientes_base_por_sesion"] * factor),
+             "simulacion.logs_detallados": False, "simulacion.verbosidad": "silencio",
+             "gimnasio.configuracion.capacidad_maxima": round(gym["configuracion"]["capacidad_maxima"] * factor)}
+    punto.update({f"gimnasio.maquinas.{tipo}": round(n * factor) for tipo, n in por_tipo.items()})
+    config, gym = aplicar_punto(config, gym, punto)
+
+    os.makedirs(carpeta, exist_ok=True)
+    config["rutas"] = {"archivo_clientes": os.path.join(carpeta, "datos_clientes.json"),
+                       "archivo_gym": os.path.join(carpeta, "datos_gimnasio.json"),
+                       "carpeta_logs": os.path.join(carpeta, "logs")}
+    config["cache_semanas"] = {"activa": False}
+    ruta = os.path.join(carpeta, "config.json")
+    for destino, datos in ((ruta, config), (config["rutas"]["archivo_gym"], gym)):
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False)
+    return ruta
+
+
+class Escenario:
+    """Una escala (socios, máquinas) con su config, su base inicial y su gimnasio, preparados una vez."""
+
+    def __init__(self, carpeta, socios, maquinas):
+        self.socios, self.maquinas = socios, maquinas
+        self.carpeta = carpeta
+        self.ruta_config = _escenario(carpeta, socios, maquinas)
+        self.cfg = Config(self.ruta_config, semilla=SEMILLA)
+        self.gestor = GestorSocios(self.cfg)
+        self.motor = MotorSimulacion(self.cfg, self.gestor)
+        self.cfg.aleatorio.iniciar_semana(0)
+        self.socios_db = self.gestor.generar_lote(socios, 1, "Carga_Inicial")
+        self.plantilla_gym = Gimnasio()
+        self.plantilla_gym.cargar_datos_json(self.cfg.datos["rutas"]["archivo_gym"])
+        self.motor.clasificar_maquinas(self.plantilla_gym)
+
+    def flota(self):
+        self.cfg.aleatorio.iniciar_semana(SEMANA_ABSOLUTA)
+        return self.motor.generar_flota_semanal(self.socios_db, SEMANA_ABSOLUTA, PESO)
+
+
+# --- Pruebas: cada una prepara (sin medir) y devuelve lo que se cronometra y cómo contar lo hecho ---
+
+def prueba_generar_lote(esc):
+    def ejecutar():
+        esc.cfg.aleatorio.iniciar_semana(0)
+        return esc.gestor.generar_lote(esc.socios, 1, "Carga_Inicial")
+    return ejecutar, lambda tabla: (len(tabla), "socios")
+
+
+def prueba_flota_semanal(esc):
+    return esc.flota, lambda resultado: (len(resultado[0]), "llegadas")
+
+
+def prueba_semana(esc):
+    """controlador_llegadas + gestor_semanal de una semana; cuenta los eventos del calendario."""
+    visitas, _ = esc.flota()
+    env = crear_entorno(esc.cfg.parametros.motor_eventos)
+    admin_logs = AdministradorDeLogs(esc.carpeta, False, None, SumideroNulo())
+    gym = esc.plantilla_gym.nueva_semana(env, esc.cfg.aleatorio, None, admin_logs)
+    env.process(esc.motor.controlador_llegadas(env, gym, visitas, admin_logs))
+    env.process(esc.motor.gestor_semanal(env, gym, admin_logs, datetime(2023, 10, 2)))
+
+    def ejecutar():
+        env.run(until=esc.cfg.parametros.tiempo_semanal)
+        return env
+    # El Entorno propio numera los eventos con un entero; simpy, con un contador
+    return ejecutar, lambda e: (e._eid if isinstance(e._eid, int) else next(e._eid), "eventos")
+
+
+def prueba_reportes(esc):
+    """Reporte semanal (bajas incluidas) sobre una copia de la base, con satisfacciones sintéticas."""
+    visitas, no_shows = esc.flota()
+    ids = visitas.registros["id"][visitas.registros["socio"] >= 0]
+    visitas.satisfaccion = dict(zip(ids.tolist(), np.random.default_rng(SEMILLA).uniform(0, 100, len(ids)).tolist()))
+    socios_db = pickle.loads(pickle.dumps(esc.socios_db))
+    carpeta = os.path.join(esc.carpeta, "reportes")
+    os.makedirs(carpeta, exist_ok=True)
+
+    def ejecutar():
+        return GeneradorReportes.generar_conclusiones_semanales(
+            visitas, no_shows, carpeta, MES, SEMANA_MES, SEMANA_ABSOLUTA, socios_db, esc.cfg, 0)
+    return ejecutar, lambda _: (len(socios_db), "socios")
+
+
+def prueba_anual(esc):
+    """Año completo (simular_anio, lo que hace main()) sin checkpoints ni eventos."""
+    cfg = Config(esc.ruta_config, semilla=SEMILLA)
+    carpeta = tempfile.mkdtemp(dir=esc.carpeta)
+    cfg.datos["rutas"]["carpeta_logs"] = carpeta
+
+    def ejecutar():
+        return simular_anio(cfg, carpeta, guardar_checkpoints=False, sumidero=SumideroNulo())
+    return ejecutar, lambda informe: (informe["global"]["visitas"], "visitas")
+
+
+PRUEBAS = {"generar_lote": prueba_generar_lote, "flota_semanal": prueba_flota_semanal, "semana": prueba_semana,
+           "reportes": prueba_reportes, "anual": prueba_anual}
+
+
+def medir(prueba, esc, repeticiones):
+    """Mejor tiempo de 'repeticiones' ejecuciones, y pico de memoria (tracemalloc) en una aparte."""
+    tiempos = []
+    for _ in range(repeticiones):
+        ejecutar, contar = prueba(esc)
+        gc.collect()
+        t0 = time.perf_counter()
+        resultado = ejecutar()
+        tiempos.append(time.perf_counter() - t0)
+    unidades, unidad = contar(resultado)
+    del resultado
+
+    # tracemalloc ralentiza: la memoria se mide en su propia ejecución
+    ejecutar, _ = prueba(esc)
+    gc.collect()
+    tracemalloc.start()
+    ejecutar()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    mejor = min(tiempos)
+    return {"tiempo_s": round(mejor, 4), "tiempos_s": [round(t, 4) for t in tiempos], "unidades": unidades,
+            "unidad": unidad, "por_segundo": round(unidades / mejor, 1) if mejor > 0 else None,
+            "memoria_mb": round(pico / 2 ** 20, 2)}
+
+
+def ejecutar_suite(pruebas, socios, maquinas, repeticiones=3):
+    """Todas las pruebas pedidas en cada escala. Devuelve {id: resultado}."""
+    resultados = {}
+    carpeta = tempfile.mkdtemp(prefix="benchmark_gym_")
+    try:
+        for n_maquinas in maquinas:
+            for n_socios in socios:
+                # generar_lote sólo depende de los socios: se mide una vez por nº de socios
+                lista = [p for p in pruebas if p != "generar_lote" or n_maquinas == maquinas[0]]
+                lista = [p for p in lista if p != "anual" or (n_socios, n_maquinas) in ESCALAS_ANUAL]
+                if not lista: continue
+                with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo):
+                    esc = Escenario(os.path.join(carpeta, f"s{n_socios}_m{n_maquinas}"), n_socios, n_maquinas)
+                for nombre in lista:
+                    id_prueba = f"{nombre}[socios={n_socios},maquinas={n_maquinas}]"
+                    # Las pruebas largas (semana grande, año) no se repiten
+                    veces = 1 if nombre == "anual" or (nombre == "semana" and n_maquinas > 30) else repeticiones
+                    with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo):
+                        resultados[id_prueba] = medir(PRUEBAS[nombre], esc, veces)
+                    r = resultados[id_prueba]
+                    print(f"   ⏱️  {id_prueba:<44} {r['tiempo_s']:9.3f} s | {r['por_segundo'] or 0:12.0f} "
+                          f"{r['unidad']}/s | {r['memoria_mb']:8.1f} MB")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return resultados
+
+
+def comparar(resultados, base, tolerancia=0.2, tolerancia_memoria=0.2):
+    """
+    Regresiones frente a la base: más lento (y al menos RUIDO_S más) o más memoria que la base
+    más la tolerancia.
+    """
+    regresiones = []
+    print(f"\n{'PRUEBA':<46} {'TIEMPO':>9} {'BASE':>9} {'Δ':>8} | {'MEMORIA':>8} {'BASE':>8} {'Δ':>8}")
+    print("-" * 104)
+    for id_prueba, r in resultados.items():
+        b = base.get(id_prueba)
+        if b is None:
+            print(f"{id_prueba:<46} {r['tiempo_s']:9.3f} {'(nueva)':>9}")
+            continue
+        dt = r["tiempo_s"] / b["tiempo_s"] - 1 if b["tiempo_s"] else 0
+        dm = r["memoria_mb"] / b["memoria_mb"] - 1 if b["memoria_mb"] else 0
+        marca = ""
+        if dt > tolerancia and r["tiempo_s"] - b["tiempo_s"] > RUIDO_S: marca += " 🐢 TIEMPO"
+        if dm > tolerancia_memoria: marca += " 🐘 MEMORIA"
+        if marca: regresiones.append(id_prueba)
+        print(f"{id_prueba:<46} {r['tiempo_s']:9.3f} {b['tiempo_s']:9.3f} {dt:+8.1%} | "
+              f"{r['memoria_mb']:8.1f} {b['memoria_mb']:8.1f} {dm:+8.1%}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de las partes críticas de la simulación")
+    parser.add_argument("--pruebas", nargs="+", choices=list(PRUEBAS), default=list(PRUEBAS))
+    parser.add_argument("--socios", nargs="+", type=int, default=ESCALAS_SOCIOS, help="Escalas de socios")
+    parser.add_argument("--maquinas", nargs="+", type=int, default=ESCALAS_MAQUINAS, help="Escalas de máquinas")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Se toma el mejor tiempo")
+    parser.add_argument("--base", default="benchmarks/base.json", help="JSON con la línea base")
+    parser.add_argument("--guardar-base", action="store_true", help="Guarda estos resultados como nueva base")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento de tiempo admitido (0.2 = 20%%)")
+    parser.add_argument("--tolerancia-memoria", type=float, default=0.2, help="Empeoramiento de memoria admitido")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmarks (semilla {SEMILLA}): {', '.join(args.pruebas)} | socios {args.socios} | "
+          f"máquinas {args.maquinas}")
+    resultados = ejecutar_suite(args.pruebas, args.socios, args.maquinas, args.repeticiones)
+
+    if args.guardar_base:
+        base = {"resultados": {}}
+        if os.path.exists(args.base):
+            with open(args.base, "r", encoding="utf-8") as f:
+                base = json.load(f)
+        # Se actualizan sólo las pruebas medidas ahora; el resto de la base se conserva
+        base["resultados"].update(resultados)
+        base["entorno"] = {"fecha": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                           "numpy": np.__version__, "plataforma": platform.platform(), "procesador": platform.machine()}
+        os.makedirs(os.path.dirname(args.base) or ".", exist_ok=True)
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump(base, f, indent=4, ensure_ascii=False)
+        print(f"💾 Línea base guardada en {args.base}")
+        return 0
+
+    if not os.path.exists(args.base):
+        print(f"ℹ️  Sin línea base en {args.base} (guárdala con --guardar-base)")
+        return 0
+    with open(args.base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    regresiones = comparar(resultados, base["resultados"], args.tolerancia, args.tolerancia_memoria)
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones frente a {args.base}")
+        return 1
+    print(f"\n✅ Sin regresiones frente a {args.base}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import os
+import gzip
+import json
+import pickle
+import hashlib
+
+# Módulos de los que depende el resultado de una semana simulada (no los de reportes ni gráficas):
+# si cambia su código, cambian las claves y las semanas se vuelven a simular
+MODULOS_SIMULACION = ["Accesorios", "Config", "GestorAleatorio", "GestorSocios", "Gimnasio", "Loggers", "Maquina",
+                      "Monitor", "MotorSimulacion", "NucleoEventos", "Perfil", "Problema", "SimulacionAnual",
+                      "TablaSocios", "Tipo_Cola", "usuario"]
+VERSION_CACHE = 1
+
+_huella_fuentes = None
+
+
+def huella_fuentes():
+    """Hash del código de la simulación (se calcula una vez por proceso)."""
+    global _huella_fuentes
+    if _huella_fuentes is None:
+        h = hashlib.sha256(str(VERSION_CACHE).encode("utf-8"))
+        carpeta = os.path.dirname(os.path.abspath(__file__))
+        for modulo in MODULOS_SIMULACION:
+            with open(os.path.join(carpeta, f"{modulo}.py"), "rb") as f:
+                h.update(f.read())
+        _huella_fuentes = h.hexdigest()
+    return _huella_fuentes
+
+
+def huella_config(datos):
+    """Hash del config sin rutas ni opciones que sólo cambian la salida (la semilla va con el estado aleatorio)."""
+    modelo = {k: v for k, v in datos.items() if k not in ("rutas", "cache_semanas")}
+    modelo["simulacion"] = {k: v for k, v in modelo.get("simulacion", {}).items()
+                            if k not in ("semilla", "verbosidad", "salida_eventos", "logs_detallados")}
+    return hashlib.sha256(json.dumps(modelo, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def huella_fichero(ruta):
+    with open(ruta, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class LlegadasCacheadas:
+    """Lo que los reportes y la facturación usan de la LlegadasSemana de una semana ya simulada."""
+
+    def __init__(self, llegadas):
+        self.n = len(llegadas)
+        self.satisfaccion = dict(llegadas.satisfaccion)
+        self.pases_diarios = llegadas.pases_diarios
+
+    def __len__(self):
+        return self.n
+
+
+class CacheSemanas:
+    """
+    Caché en disco de semanas simuladas, direccionada por contenido.
+
+    La clave es el hash de todo lo que determina la simulación de una semana: config, fichero del
+    gimnasio, estado de la tabla de socios, estado aleatorio al empezar la semana (semilla raíz,
+    réplica, semana), fecha, afluencia, averías heredadas y el código de la simulación. El valor es
+    lo que la semana deja: llegadas (satisfacción de cada visita y pases), no-shows, conversiones
+    pendientes, ocupación máxima y estado de las máquinas. Los reportes y las bajas se vuelven a
+    calcular siempre, así que cambiar GeneradorReportes o visualizar.py no obliga a resimular.
+
+    Con más de 'max_mb' en disco se borran las entradas usadas hace más tiempo (LRU por mtime:
+    cada acierto la actualiza).
+    """
+
+    def __init__(self, carpeta="cache_semanas", max_mb=500):
+        self.carpeta = carpeta
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(carpeta, exist_ok=True)
+
+    @staticmethod
+    def clave(*partes):
+        texto = json.dumps(partes, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.carpeta, f"{clave}.pkl.gz")
+
+    def leer(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            with gzip.open(ruta, "rb") as f:
+                resultado = pickle.load(f)
+            os.utime(ruta)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, gzip.BadGzipFile):
+            # Sin entrada (o una que otro proceso estaba borrando): se simula
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return resultado
+
+    def guardar(self, clave, resultado):
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with gzip.open(temporal, "wb", compresslevel=5) as f:
+            pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+        self._recortar()
+
+    def _recortar(self):
+        entradas = []
+        for entrada in os.scandir(self.carpeta):
+            if not entrada.name.endswith(".pkl.gz"): continue
+            try:
+                info = entrada.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, entrada.path))
+        total = sum(tam for _, tam, _ in entradas)
+        for _, tam, ruta in sorted(entradas):
+            if total <= self.max_bytes: break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tam
@@ -0,0 +1,43 @@
+import os
+import gzip
+import pickle
+
+
+VERSION_CHECKPOINT = 4  # 2: socios_db es una TablaSocios; 3: ingresos por segmento; 4: nombres por códigos
+
+
+def ruta_checkpoint(carpeta, semana_absoluta):
+    return os.path.join(carpeta, f"semana_{semana_absoluta:02d}.ckpt")
+
+
+def guardar_checkpoint(carpeta, estado, escritor=None):
+    """
+    Guarda el estado del año tras una semana (pickle comprimido).
+    Se escribe primero a un temporal para no dejar nunca un checkpoint a medias.
+    El pickle se hace aquí, porque el estado sigue cambiando; con 'escritor' (EscritorAsincrono)
+    la compresión y la escritura van a su hilo.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = ruta_checkpoint(carpeta, estado["semana_absoluta"])
+    datos = pickle.dumps({"version": VERSION_CHECKPOINT, **estado}, protocol=pickle.HIGHEST_PROTOCOL)
+    if escritor:
+        escritor.enviar(_escribir_comprimido, ruta, datos, rutas=(ruta,))
+    else:
+        _escribir_comprimido(ruta, datos)
+    return ruta
+
+
+def _escribir_comprimido(ruta, datos):
+    temporal = ruta + ".tmp"
+    with gzip.open(temporal, "wb", compresslevel=5) as f:
+        f.write(datos)
+    os.replace(temporal, ruta)
+
+
+def cargar_checkpoint(ruta):
+    with gzip.open(ruta, "rb") as f:
+        estado = pickle.load(f)
+    if estado.get("version") != VERSION_CHECKPOINT:
+        raise ValueError(f"Checkpoint {ruta} con versión {estado.get('version')} no soportada "
+                         f"(se esperaba {VERSION_CHECKPOINT}).")
+    return estado
@@ -0,0 +1,109 @@
+import os
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Estadistica import intervalo_confianza
+from Replicas import ejecutar_replica, KPIS_ANUALES
+
+
+class ComparadorEscenarios:
+    """
+    Compara dos escenarios (config.json y/o datos_gimnasio.json distintos) con reducción de varianza.
+
+    - Números aleatorios comunes: la réplica i de ambos escenarios usa la misma semilla raíz e
+      índice, y los flujos están sincronizados por sesión, visita, máquina y monitor, así que
+      las llegadas, rutinas, no-shows y averías coinciden todo lo que el modelo permite.
+    - Variables antitéticas (opcional): cada réplica se acompaña de su espejo antitético y se
+      usa la media de la pareja como observación.
+
+    El informe da la diferencia emparejada (B - A) de cada KPI anual con su intervalo de confianza,
+    junto al intervalo que saldría tratando los escenarios como independientes.
+    """
+
+    def __init__(self, escenario_a, escenario_b, n_replicas=10, semilla_raiz=None, procesos=None,
+                 antiteticas=False, carpeta_salida="comparacion", nivel_confianza=0.95):
+        # escenario: {"nombre": "...", "config": "config.json", "gimnasio": None | "otro_gym.json"}
+        self.escenarios = {"A": escenario_a, "B": escenario_b}
+        self.n_replicas = n_replicas
+        self.semilla_raiz = semilla_raiz if semilla_raiz is not None else random.SystemRandom().randrange(2 ** 63)
+        self.procesos = procesos or os.cpu_count() or 1
+        self.antiteticas = antiteticas
+        self.carpeta_salida = carpeta_salida
+        self.nivel_confianza = nivel_confianza
+
+    def _trabajos(self):
+        variantes = [False, True] if self.antiteticas else [False]
+        for brazo, esc in self.escenarios.items():
+            for i in range(self.n_replicas):
+                for antitetico in variantes:
+                    sufijo = "_anti" if antitetico else ""
+                    carpeta = os.path.join(self.carpeta_salida, brazo, f"replica_{i:03d}{sufijo}")
+                    yield brazo, i, antitetico, (esc["config"], i, self.semilla_raiz, carpeta,
+                                                 esc.get("gimnasio"), antitetico)
+
+    def ejecutar(self):
+        os.makedirs(self.carpeta_salida, exist_ok=True)
+        trabajos = list(self._trabajos())
+        print(f"⚖️  Comparando '{self.escenarios['A']['nombre']}' vs '{self.escenarios['B']['nombre']}': "
+              f"{len(trabajos)} años en {self.procesos} procesos (semilla raíz {self.semilla_raiz})")
+
+        resultados = {}
+        with ProcessPoolExecutor(max_workers=self.procesos) as pool:
+            futuros = {pool.submit(ejecutar_replica, *args): (brazo, i, anti) for brazo, i, anti, args in trabajos}
+            for futuro in as_completed(futuros):
+                resultados[futuros[futuro]] = futuro.result()["global"]
+
+        return self.analizar(resultados)
+
+    def _observacion(self, resultados, brazo, i, kpi):
+        """Valor de la réplica i (media de la pareja antitética si procede)."""
+        valor = resultados[(brazo, i, False)][kpi]
+        if self.antiteticas:
+            valor = (valor + resultados[(brazo, i, True)][kpi]) / 2
+        return valor
+
+    def analizar(self, resultados):
+        kpis = {}
+        for kpi in KPIS_ANUALES:
+            a = [self._observacion(resultados, "A", i, kpi) for i in range(self.n_replicas)]
+            b = [self._observacion(resultados, "B", i, kpi) for i in range(self.n_replicas)]
+            diferencia = intervalo_confianza([vb - va for va, vb in zip(a, b)], self.nivel_confianza)
+            ic_a = intervalo_confianza(a, self.nivel_confianza)
+            ic_b = intervalo_confianza(b, self.nivel_confianza)
+
+            # Varianza que tendría la diferencia con réplicas independientes frente a la emparejada
+            var_independiente = ic_a["desviacion"] ** 2 + ic_b["desviacion"] ** 2
+            var_emparejada = diferencia["desviacion"] ** 2
+            reduccion = var_independiente / var_emparejada if var_emparejada > 0 else None
+
+            kpis[kpi] = {"A": ic_a, "B": ic_b, "diferencia": diferencia, "factor_reduccion_varianza": reduccion}
+
+        informe = {
+            "escenarios": self.escenarios,
+            "replicas": self.n_replicas,
+            "antiteticas": self.antiteticas,
+            "semilla_raiz": self.semilla_raiz,
+            "nivel_confianza": self.nivel_confianza,
+            "kpis": kpis
+        }
+
+        ruta = os.path.join(self.carpeta_salida, "Reporte_COMPARACION.json")
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=4, ensure_ascii=False)
+
+        self.mostrar_resumen(informe)
+        print(f"📁 Informe de comparación en: {ruta}")
+        return informe
+
+    @staticmethod
+    def mostrar_resumen(informe):
+        print("\n" + "=" * 78 + f"\n⚖️  DIFERENCIA EMPAREJADA (B - A), IC {informe['nivel_confianza'] * 100:.0f}%"
+              + (" + antitéticas" if informe["antiteticas"] else "") + "\n" + "=" * 78)
+        print("KPI        | MEDIA A      | MEDIA B      | B - A                 | REDUCCIÓN VAR")
+        print("-" * 78)
+        for kpi, d in informe["kpis"].items():
+            dif = d["diferencia"]
+            reduccion = f"x{d['factor_reduccion_varianza']:.1f}" if d["factor_reduccion_varianza"] else "-"
+            print(f"{kpi:<10} | {d['A']['media']:12.2f} | {d['B']['media']:12.2f} | "
+                  f"{dif['media']:9.2f} ±{dif['semiancho']:9.2f} | {reduccion}")
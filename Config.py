@@ -1,11 +1,161 @@
 import json
 import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from GestorAleatorio import GestorAleatorio
+
+
+@dataclass(frozen=True)
+class Tarifa:
+    """Precios de un subtipo ya resueltos (sin precio anual: 12 mensualidades al renovar, 0 al dar de alta)."""
+    mensual: float
+    alta_anual: float
+    renovacion_anual: float
+
+
+@dataclass(frozen=True)
+class Parametros:
+    """
+    config.json compilado una vez: valores validados, de sólo lectura y con acceso por atributo,
+    más las tablas que se consultan en los bucles (minutos de inicio de cada sesión, sesiones por día,
+    umbrales de antigüedad y tarifas). Lo usan las rutas calientes en lugar de los dicts anidados.
+    """
+    # Calendario semanal
+    duracion_sesion: int
+    minutos_por_dia: int
+    tiempo_semanal: int
+    dias_semana: tuple
+    sesiones_por_dia: tuple       # Por índice de día
+    inicio_sesiones: tuple        # Por índice de día: minuto de inicio de cada sesión
+
+    # Afluencia y socios
+    clientes_base: int
+    variacion_afluencia: float
+    usuarios_iniciales: int
+    prob_baja_historica: float
+    prob_reconsiderar_baja: float
+    prob_pase_diario: float
+    conservar_averias: bool
+    logs_detallados: bool
+    verbosidad: str               # Eventos por consola/registros: silencio, sesiones o eventos
+    motor_eventos: str            # simpy o nucleo (NucleoEventos)
+    salida_eventos: str           # consola o registros
+
+    # Satisfacción
+    minutos_paciencia_cola: float
+    penalizacion_espera_cola: float
+    penalizacion_maquina_rota: float
+    penalizacion_sin_maquina: float
+    penalizacion_salida_forzada: float
+    umbrales_baja: tuple          # (novato, medio, veterano)
+    tramos_antiguedad: tuple      # Meses máximos de novato y de medio
+
+    # Conversión de pases diarios
+    umbral_conversion_anual: float
+    umbral_conversion_mensual: float
+
+    # Precios
+    tarifas: MappingProxyType     # subtipo -> Tarifa
+    precio_pase: float
+
+    def tarifa(self, subtipo):
+        """Tarifa de 'subtipo' (los subtipos sin precios pagan como Estudiante)."""
+        return self.tarifas.get(subtipo) or self.tarifas["Estudiante"]
+
+    def sesiones(self, dia):
+        return self.sesiones_por_dia[self.dias_semana.index(dia)]
+
+
+def _probabilidad(nombre, valor):
+    if not 0.0 <= valor <= 1.0:
+        raise ValueError(f"config.json: '{nombre}' debe estar entre 0 y 1 (vale {valor}).")
+    return float(valor)
+
+
+def _positivo(nombre, valor):
+    if valor <= 0:
+        raise ValueError(f"config.json: '{nombre}' debe ser mayor que 0 (vale {valor}).")
+    return valor
+
+
+def compilar_parametros(datos, dias_semana, sesiones_por_dia):
+    """Valida los dicts de config.json y construye los Parametros."""
+    try:
+        sim, sat, precios = datos["simulacion"], datos["satisfaccion"], datos["precios"]
+        duracion = _positivo("duracion_sesion_minutos", sim["duracion_sesion_minutos"])
+        clientes_base = _positivo("clientes_base_por_sesion", sim["clientes_base_por_sesion"])
+        umbrales_baja = (sat["umbral_baja_novato"], sat["umbral_baja_medio"], sat["umbral_baja_veterano"])
+        prob_baja_historica = sim["probabilidad_baja_historica"]
+        variacion = sim["variacion_afluencia"]
+        precio_pase = precios["Pase_Diario"]
+    except KeyError as e:
+        raise ValueError(f"config.json: falta el parámetro {e}.") from None
+
+    if not 0.0 <= variacion < 1.0:
+        raise ValueError(f"config.json: 'variacion_afluencia' debe estar entre 0 y 1 (vale {variacion}).")
+    conversion = datos.get("probabilidades", {}).get("conversion", {})
+    verbosidad = sim.get("verbosidad", "sesiones")
+    if verbosidad not in ("silencio", "sesiones", "eventos"):
+        raise ValueError(f"config.json: 'verbosidad' debe ser silencio, sesiones o eventos (vale {verbosidad!r}).")
+    salida_eventos = sim.get("salida_eventos", "consola")
+    motor_eventos = sim.get("motor_eventos", "simpy")
+    if motor_eventos not in ("simpy", "nucleo"):
+        raise ValueError(f"config.json: 'motor_eventos' debe ser simpy o nucleo (vale {motor_eventos!r}).")
+    if salida_eventos not in ("consola", "registros"):
+        raise ValueError(f"config.json: 'salida_eventos' debe ser consola o registros (vale {salida_eventos!r}).")
+
+    tarifas = {}
+    for subtipo, p in precios.items():
+        if not isinstance(p, dict): continue
+        mensual = p.get("Mensual", 16)
+        anual = p.get("Anual", 0) or 0
+        tarifas[subtipo] = Tarifa(mensual, anual, anual or p.get("Mensual", 0) * 12)
+    if "Estudiante" not in tarifas:
+        raise ValueError("config.json: faltan los precios de 'Estudiante' (tarifa por defecto).")
+
+    minutos_por_dia = max(sesiones_por_dia) * duracion
+    return Parametros(
+        duracion_sesion=duracion,
+        minutos_por_dia=minutos_por_dia,
+        tiempo_semanal=minutos_por_dia * len(dias_semana),
+        dias_semana=tuple(dias_semana),
+        sesiones_por_dia=tuple(sesiones_por_dia),
+        inicio_sesiones=tuple(tuple(d * minutos_por_dia + s * duracion for s in range(n))
+                              for d, n in enumerate(sesiones_por_dia)),
+        clientes_base=clientes_base,
+        variacion_afluencia=float(variacion),
+        usuarios_iniciales=sim.get("usuarios_totales_iniciales", 300),
+        prob_baja_historica=_probabilidad("probabilidad_baja_historica", prob_baja_historica),
+        prob_reconsiderar_baja=_probabilidad("probabilidad_reconsiderar_baja",
+                                             sim.get("probabilidad_reconsiderar_baja", 0.0)),
+        prob_pase_diario=_probabilidad("pase_diario", datos.get("probabilidades", {}).get("pase_diario", 0.05)),
+        conservar_averias=bool(sim.get("conservar_averias", False)),
+        logs_detallados=bool(sim.get("logs_detallados", False)),
+        verbosidad=verbosidad,
+        motor_eventos=motor_eventos,
+        salida_eventos=salida_eventos,
+        minutos_paciencia_cola=sat.get("minutos_paciencia_cola", 2),
+        penalizacion_espera_cola=sat.get("penalizacion_espera_cola", 2.0),
+        penalizacion_maquina_rota=sat.get("penalizacion_maquina_rota", 5),
+        penalizacion_sin_maquina=sat.get("penalizacion_sin_maquina", 1),
+        penalizacion_salida_forzada=sat.get("penalizacion_salida_forzada", 2),
+        umbrales_baja=umbrales_baja,
+        tramos_antiguedad=(1, 4),
+        umbral_conversion_anual=conversion.get("umbral_anual", 85),
+        umbral_conversion_mensual=conversion.get("umbral_mensual", 75),
+        tarifas=MappingProxyType(tarifas),
+        precio_pase=precio_pase,
+    )
 
 
 class Config:
-    def __init__(self, archivo_json="config.json"):
+    def __init__(self, archivo_json="config.json", semilla=None, replica=0, antitetico=False):
         self.datos = self._cargar_configuracion(archivo_json)
 
+        # Generadores aleatorios por subsistema (semilla explícita > config.json > aleatoria)
+        if semilla is None: semilla = self.datos["simulacion"].get("semilla")
+        self.aleatorio = GestorAleatorio(semilla, replica, antitetico)
+
         # Constantes derivadas
         self.DURACION_SESION = self.datos["simulacion"]["duracion_sesion_minutos"]
         self.CLIENTES_BASE = self.datos["simulacion"]["clientes_base_por_sesion"]
@@ -44,6 +194,11 @@ class Config:
 
         self.DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
 
+        # Parámetros compilados para las rutas calientes (los dicts de 'datos' quedan para rutas y demás)
+        self.parametros = compilar_parametros(
+            self.datos, self.DIAS_SEMANA,
+            [self.obtener_sesiones_por_dia(d) for d in self.DIAS_SEMANA])
+
     def _cargar_configuracion(self, archivo):
         try:
             with open(archivo, "r", encoding="utf-8") as f:
@@ -56,7 +211,8 @@ class Config:
                     "clientes_base_por_sesion": 50,
                     "probabilidad_baja_historica": 0.15,
                     "variacion_afluencia": 0.2,
-                    "usuarios_totales_iniciales": 300
+                    "usuarios_totales_iniciales": 300,
+                    "semilla": None
                 },
                 "satisfaccion": {
                     "umbral_baja_novato": 40,
@@ -0,0 +1,78 @@
+import os
+import queue
+import threading
+
+
+class EscritorAsincrono:
+    """
+    Hilo de escritura en disco para que la simulación no espere a la E/S.
+
+    Las escrituras se encolan ya preparadas (el texto, o una función que sólo toca datos que
+    nadie más va a modificar) y un hilo las ejecuta en orden. La cola es acotada: si el disco
+    no da abasto, quien encola se bloquea hasta que haya hueco (contrapresión).
+
+    'barrera()' espera a que todo lo encolado esté escrito y, con fsync, a que llegue al disco;
+    se usa a fin de mes, antes de leer un fichero que se ha escrito por aquí y al cerrar.
+    """
+
+    def __init__(self, max_pendientes=64):
+        self.cola = queue.Queue(maxsize=max_pendientes)
+        self.error = None
+        self._rutas_escritas = set()  # Pendientes de fsync (sólo las toca el hilo)
+        self._hilo = threading.Thread(target=self._bucle, name="EscritorAsincrono", daemon=True)
+        self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            tarea = self.cola.get()
+            try:
+                if tarea is None: return
+                funcion, args, rutas = tarea
+                # Tras un fallo no se escribe nada más: el error sale en la siguiente barrera
+                if self.error is None:
+                    funcion(*args)
+                    self._rutas_escritas.update(rutas)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.cola.task_done()
+
+    def _comprobar_error(self):
+        if self.error is not None:
+            raise RuntimeError(f"Fallo en la escritura asíncrona: {self.error}") from self.error
+
+    def enviar(self, funcion, *args, rutas=()):
+        """Encola 'funcion(*args)'; 'rutas' son los ficheros que escribe (para el fsync)."""
+        self._comprobar_error()
+        self.cola.put((funcion, args, tuple(rutas)))
+
+    def escribir(self, ruta, texto, modo="w"):
+        self.enviar(_escribir_fichero, ruta, texto, modo, rutas=(ruta,))
+
+    def barrera(self, fsync=True):
+        if fsync: self.cola.put((self._sincronizar, (), ()))
+        self.cola.join()
+        self._comprobar_error()
+
+    def _sincronizar(self):
+        for ruta in self._rutas_escritas:
+            if not os.path.exists(ruta): continue  # Temporales ya renombrados
+            fd = os.open(ruta, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self._rutas_escritas.clear()
+
+    def cerrar(self):
+        if not self._hilo.is_alive(): return
+        try:
+            self.barrera(fsync=True)
+        finally:
+            self.cola.put(None)
+            self._hilo.join()
+
+
+def _escribir_fichero(ruta, texto, modo):
+    with open(ruta, modo, encoding="utf-8") as f:
+        f.write(texto)
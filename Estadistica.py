@@ -0,0 +1,43 @@
+import math
+from statistics import NormalDist
+
+
+def cuantil_t(p, grados_libertad):
+    """
+    Cuantil de la t de Student.
+    Exacto para 1 y 2 grados de libertad; para el resto usamos la expansión de
+    Cornish-Fisher sobre el cuantil normal (error < 0.01 desde 3 g.l.).
+    """
+    if grados_libertad == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if grados_libertad == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+
+    z = NormalDist().inv_cdf(p)
+    v = grados_libertad
+    return (z
+            + (z ** 3 + z) / (4 * v)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * v ** 4))
+
+
+def intervalo_confianza(valores, nivel=0.95):
+    """
+    Media e intervalo de confianza (t de Student) de una muestra de réplicas independientes.
+    Devuelve un dict listo para volcar a JSON.
+    """
+    n = len(valores)
+    if n == 0:
+        return {"n": 0, "media": 0, "desviacion": 0, "semiancho": 0, "ic": [0, 0]}
+
+    media = sum(valores) / n
+    if n == 1:
+        return {"n": 1, "media": media, "desviacion": 0, "semiancho": math.inf, "ic": [-math.inf, math.inf]}
+
+    varianza = sum((v - media) ** 2 for v in valores) / (n - 1)
+    desviacion = math.sqrt(varianza)
+    semiancho = cuantil_t(0.5 + nivel / 2, n - 1) * desviacion / math.sqrt(n)
+
+    return {"n": n, "media": media, "desviacion": desviacion, "semiancho": semiancho,
+            "ic": [media - semiancho, media + semiancho]}
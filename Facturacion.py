@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class MotorFacturacion:
+    """
+    Cobros del mes con operaciones sobre las columnas de la TablaSocios.
+
+    Las tarifas compiladas (Parametros.tarifas) se convierten en una matriz (subtipo x plan) para
+    cada tabla, con las mismas reglas que el cobro socio a socio:
+    - Mensual (o cualquier plan que no sea Anual): la mensualidad del subtipo (16 si no tiene).
+    - Anual: sólo se renueva en Septiembre, a quien no se dio de alta ese mismo Septiembre
+      (si el subtipo no tiene precio anual, 12 mensualidades). La primera cuota de un alta
+      nueva es el precio anual.
+    Devuelve además el desglose por segmento ("Subtipo/Plan").
+    """
+
+    def __init__(self, parametros):
+        self.parametros = parametros
+
+    def _matrices(self, tabla):
+        subtipos = tabla.categorias["subtipo"].valores
+        planes = tabla.categorias["plan_pago"].valores
+        renovacion, alta = [], []
+        for subtipo in subtipos:
+            tarifa = self.parametros.tarifa(subtipo)
+            renovacion.append([tarifa.renovacion_anual if p == "Anual" else tarifa.mensual for p in planes])
+            alta.append([tarifa.alta_anual if p == "Anual" else tarifa.mensual for p in planes])
+        return np.array(renovacion).reshape(len(subtipos), len(planes)), \
+            np.array(alta).reshape(len(subtipos), len(planes))
+
+    def _cobrar(self, tabla, tarifa, filas, excluir_anual):
+        """
+        Cuenta los socios de 'filas' por segmento (subtipo, plan) con un bincount y multiplica por
+        la matriz de tarifas; 'excluir_anual' marca a quién no se cobra el plan Anual.
+        """
+        subtipos = tabla.categorias["subtipo"].valores
+        planes = tabla.categorias["plan_pago"].valores
+        n_segmentos = len(subtipos) * len(planes)
+        segmento = tabla.columna("subtipo")[filas] * len(planes) + tabla.columna("plan_pago")[filas]
+        if excluir_anual is not None:
+            # Segmento "sin cobro anual" aparte: n_segmentos + segmento
+            segmento = segmento + n_segmentos * excluir_anual
+        conteos = np.bincount(segmento, minlength=2 * n_segmentos)
+
+        es_anual = np.array([p == "Anual" for p in planes] * len(subtipos), dtype=bool)
+        tarifa = tarifa.ravel()
+        importes = conteos[:n_segmentos] * tarifa + conteos[n_segmentos:] * np.where(es_anual, 0, tarifa)
+
+        desglose = {}
+        for k in np.flatnonzero(importes).tolist():
+            s, p = divmod(k, len(planes))
+            desglose[f"{subtipos[s]}/{planes[p]}"] = _numero(importes[k])
+        return _numero(importes.sum()), desglose
+
+    def cobrar_cuotas(self, tabla, mes):
+        """Cuotas de los socios activos a principio de mes: (total, desglose)."""
+        renovacion, _ = self._matrices(tabla)
+        activos = np.flatnonzero(tabla.activo)
+        # Anual: sólo en Septiembre, y no a quien se dio de alta en Septiembre
+        if mes == "Septiembre":
+            sin_anual = tabla.columna("mes_alta")[activos] == tabla.categorias["mes_alta"].buscar("Septiembre")
+        else:
+            sin_anual = np.ones(len(activos), dtype=bool)
+        return self._cobrar(tabla, renovacion, activos, sin_anual)
+
+    def cobrar_altas(self, tabla, desde):
+        """Primera cuota de los socios dados de alta a partir de la fila 'desde': (total, desglose)."""
+        _, alta = self._matrices(tabla)
+        return self._cobrar(tabla, alta, slice(desde, None), None)
+
+    def cobrar_pases(self, n_pases):
+        return n_pases * self.parametros.precio_pase
+
+
+def _numero(valor):
+    """Entero de Python si el importe es entero (como sumaba el bucle), si no float."""
+    return int(valor) if float(valor).is_integer() else float(valor)
+
+
+def sumar_desgloses(*desgloses):
+    total = {}
+    for d in desgloses:
+        for k, v in d.items(): total[k] = total.get(k, 0) + v
+    return total
@@ -0,0 +1,160 @@
+import random
+import hashlib
+import numpy as np
+
+
+class AleatorioAntitetico(random.Random):
+    """
+    Generador 'espejo': devuelve 1 - U en lugar de U, y n-1-k en lugar de k en las tiradas enteras.
+    Con la misma semilla que un random.Random normal produce la réplica antitética de éste.
+    """
+
+    def random(self):
+        return 1.0 - super().random()
+
+    def _randbelow(self, n):
+        return n - 1 - super()._randbelow(n)
+
+
+class GeneradorAntiteticoNP:
+    """Versión espejo de un numpy.random.Generator para los métodos que usa el modelo."""
+
+    def __init__(self, semilla):
+        self.base = np.random.default_rng(semilla)
+        self.bit_generator = self.base.bit_generator
+
+    def random(self, size=None):
+        return 1.0 - self.base.random(size)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return low + (high - low) * self.random(size)
+
+    def integers(self, low, high=None, size=None):
+        if high is None: low, high = 0, low
+        return high - 1 - (self.base.integers(low, high, size) - low)
+
+    def permutation(self, n):
+        return self.base.permutation(n)[::-1]
+
+
+class GestorAleatorio:
+    """
+    Registro de generadores aleatorios con semilla.
+
+    Cada subsistema (socios, llegadas, visitas, pases, maquinas, monitores, reportes...) tiene su propio
+    flujo independiente, derivado de (semilla raíz, réplica, subsistema, semana, claves). Así:
+      - una ejecución se reproduce exactamente a partir de la semilla raíz,
+      - cambiar el consumo de un subsistema no altera las tiradas de los demás,
+      - cada semana arranca de un estado conocido,
+      - las réplicas en procesos distintos no comparten estado (la derivación no depende
+        del proceso ni de la aleatorización de hash de Python).
+
+    Para comparar escenarios con números aleatorios comunes los flujos se sincronizan por
+    entidad (sesión, usuario, máquina, monitor): las tiradas de una entidad no dependen de
+    cuántas hayan consumido las demás. Con antitetico=True todos los flujos son espejo
+    (AleatorioAntitetico) de los de la réplica normal con la misma semilla.
+    """
+
+    def __init__(self, semilla_raiz=None, replica=0, antitetico=False):
+        if semilla_raiz is None:
+            semilla_raiz = random.SystemRandom().randrange(2 ** 63)
+        self.semilla_raiz = semilla_raiz
+        self.replica = replica
+        self.antitetico = antitetico
+        self.semana = 0
+        self._flujos = {}
+        self._flujos_np = {}
+
+    def derivar_semilla(self, *claves):
+        """Semilla de 64 bits estable para cualquier combinación de claves."""
+        texto = repr((self.semilla_raiz, self.replica) + claves).encode("utf-8")
+        return int.from_bytes(hashlib.sha256(texto).digest()[:8], "big")
+
+    def _crear(self, semilla):
+        return AleatorioAntitetico(semilla) if self.antitetico else random.Random(semilla)
+
+    def flujo(self, nombre, *claves):
+        """Generador del subsistema 'nombre' (y entidad 'claves') para la semana en curso."""
+        clave = (nombre,) + claves
+        generador = self._flujos.get(clave)
+        if generador is None:
+            generador = self._crear(self.derivar_semilla(nombre, self.semana, *claves))
+            self._flujos[clave] = generador
+        return generador
+
+    def flujo_np(self, nombre, *claves):
+        """Como flujo(), pero devuelve un numpy.random.Generator para tiradas vectorizadas."""
+        clave = (nombre,) + claves
+        generador = self._flujos_np.get(clave)
+        if generador is None:
+            semilla = self.derivar_semilla("np", nombre, self.semana, *claves)
+            generador = GeneradorAntiteticoNP(semilla) if self.antitetico else np.random.default_rng(semilla)
+            self._flujos_np[clave] = generador
+        return generador
+
+    def nuevo_flujo(self, nombre, *claves):
+        """Como flujo(), pero sin guardarlo: para entidades efímeras (una visita de un usuario)."""
+        return self._crear(self.derivar_semilla(nombre, self.semana, *claves))
+
+    def sembrar(self, nombre, *claves):
+        """
+        Tres uniformes en [0, 1) y una semilla sacados de un único hash, sin crear ningún generador.
+        Sirve para planificar una entidad (p.ej. una visita) con registros ligeros y crear su flujo
+        completo sólo si llega a hacer falta (crear_flujo(semilla)).
+        """
+        texto = repr((self.semilla_raiz, self.replica, nombre, self.semana) + claves).encode("utf-8")
+        resumen = hashlib.sha256(texto).digest()
+        enteros = [int.from_bytes(resumen[i:i + 8], "big") >> 11 for i in (0, 8, 16)]
+        if self.antitetico:
+            enteros = [(1 << 53) - 1 - x for x in enteros]
+        uniformes = [x * (2.0 ** -53) for x in enteros]
+        return uniformes, int.from_bytes(resumen[24:32], "big")
+
+    def crear_flujo(self, semilla):
+        return self._crear(semilla)
+
+    def iniciar_semana(self, semana_absoluta):
+        """Cambia de semana: los flujos se vuelven a derivar al pedirlos."""
+        self.semana = semana_absoluta
+        self._flujos = {}
+        self._flujos_np = {}
+
+    def cerrar_semana(self):
+        """
+        Descarta los flujos de la semana. Lo que se tire después (p.ej. las altas del mes
+        siguiente) se deriva de nuevo de las claves, así que el estado a guardar es mínimo.
+        """
+        self._flujos = {}
+        self._flujos_np = {}
+
+    # --- Persistencia (checkpoints / réplicas) ---
+
+    def estado(self):
+        return {
+            "semilla_raiz": self.semilla_raiz,
+            "replica": self.replica,
+            "antitetico": self.antitetico,
+            "semana": self.semana,
+            "flujos": {nombre: g.getstate() for nombre, g in self._flujos.items()},
+            "flujos_np": {nombre: g.bit_generator.state for nombre, g in self._flujos_np.items()}
+        }
+
+    def restaurar(self, estado):
+        self.semilla_raiz = estado["semilla_raiz"]
+        self.replica = estado["replica"]
+        self.antitetico = estado.get("antitetico", False)
+        self.semana = estado["semana"]
+        self._flujos = {}
+        for clave, estado_flujo in estado["flujos"].items():
+            generador = self._crear(0)
+            generador.setstate(estado_flujo)
+            self._flujos[clave] = generador
+        self._flujos_np = {}
+        for clave, estado_flujo in estado.get("flujos_np", {}).items():
+            generador = GeneradorAntiteticoNP(0) if self.antitetico else np.random.default_rng(0)
+            generador.bit_generator.state = estado_flujo
+            self._flujos_np[clave] = generador
+
+    def __repr__(self):
+        tipo = " antitetico" if self.antitetico else ""
+        return f"<GestorAleatorio raiz={self.semilla_raiz} replica={self.replica}{tipo} semana={self.semana}>"
@@ -1,34 +1,43 @@
 import random
-import json
 import os
+import numpy as np
+from RepositorioSocios import RepositorioSocios
+from TablaSocios import TablaSocios
 
 
 class PerfilGenerado:
-    def __init__(self, datos_dict):
+    def __init__(self, datos_dict, rng=None):
+        # rng: generador del que salen todas las decisiones del usuario (por defecto, el global)
+        self.rng = rng or random
         self.tipo = datos_dict["tipo"]
         self.energia = datos_dict["energia"]
         self.prob_descanso = datos_dict["prob_descanso"]
-        self.paciencia_maxima = random.randint(2, 5)
+        self.paciencia_maxima = self.rng.randint(2, 5)
 
-    def tiempo_preparacion(self): return random.randint(3, 8)
+    def tiempo_preparacion(self): return self.rng.randint(3, 8)
 
-    def decidir_descanso(self): return random.random() < self.prob_descanso
+    def decidir_descanso(self): return self.rng.random() < self.prob_descanso
 
-    def tiempo_descanso(self): return random.randint(1, 3)
+    def tiempo_descanso(self): return self.rng.randint(1, 3)
 
-    def decidir_preguntar_monitor(self): return random.random() < 0.15
+    def decidir_preguntar_monitor(self): return self.rng.random() < 0.15
 
-    def tiempo_pregunta_monitor(self): return random.randint(2, 5)
+    def tiempo_pregunta_monitor(self): return self.rng.randint(2, 5)
 
-    def decidir_usar_accesorio(self): return random.random() < 0.20
+    def decidir_usar_accesorio(self): return self.rng.random() < 0.20
 
-    def tiempo_uso_accesorio(self): return random.randint(5, 15)
+    def tiempo_uso_accesorio(self): return self.rng.randint(5, 15)
 
 
 class GestorSocios:
-    def __init__(self, config):
+    def __init__(self, config, escritor=None):
         self.config = config
         self.ruta_db = config.datos["rutas"]["archivo_clientes"]
+        self.escritor = escritor  # EscritorAsincrono para los volcados de la base (opcional)
+        # La base vive en SQLite junto al JSON; el JSON sólo se exporta al final
+        self.repositorio = RepositorioSocios(os.path.splitext(self.ruta_db)[0] + ".sqlite")
+        # Conversiones de pases diarios de la semana en curso (se aplican al cerrarla)
+        self.conversiones_pendientes = []
 
         self.nombres_h = ["Juan", "Pedro", "Luis", "Carlos", "Javier", "Miguel", "Alejandro", "Pablo", "Sergio",
                           "Daniel"]
@@ -42,96 +51,87 @@ class GestorSocios:
             "Julio": 7, "Agosto": 8, "Septiembre": 9, "Octubre": 10, "Noviembre": 11, "Diciembre": 12
         }
 
-    def generar_rutina(self, genero):
-        rutina = []
-        opciones = ["Musculacion_Pierna", "Musculacion_Torso", "Cardio"]
-        # Probabilidades según género
-        pesos = [0.60, 0.20, 0.20] if genero == "Femenino" else [0.20, 0.60, 0.20]
-
-        for _ in range(random.randint(4, 6)):
-            tipo = random.choices(opciones, weights=pesos, k=1)[0]
-            tiempo = random.randint(15, 30) if tipo == "Cardio" else random.randint(20, 40)
-            rutina.append({"tipo_maquina_deseada": tipo, "tiempo_uso": tiempo})
-        return rutina
-
-    def _obtener_fecha_simulada(self, mes_origen):
-        """Genera una fecha DD-MM-AAAA basada en el mes de alta."""
+    def generar_lote(self, cantidad, id_inicial, mes_origen):
+        """
+        Genera 'cantidad' socios de una vez, con tiradas vectorizadas (las mismas probabilidades
+        que el generador socio a socio), y los devuelve en una TablaSocios.
+        """
+        rng = self.config.aleatorio.flujo_np("socios", mes_origen)
+        prob_baja = self.config.parametros.prob_baja_historica
+        n = cantidad
+
+        es_mujer = rng.random(n) < 0.5
+        # Nombre: índice en la lista de su género y apellido (se componen al leerlos)
+        n_h, n_m = len(self.nombres_h), len(self.nombres_m)
+        idx_nombre = rng.integers(0, np.where(es_mujer, n_m, n_h), size=n)
+        idx_apellido = rng.integers(0, len(self.apellidos), size=n)
+
+        # Lógica de baja histórica
         if mes_origen == "Carga_Inicial":
-            mes_num = 8  # Agosto (Pretemporada)
+            es_baja = rng.random(n) < prob_baja
         else:
-            mes_num = self.mapa_meses.get(mes_origen, 9) # The instruction provided an invalid code snippet here. I've kept the original line to maintain syntactic correctness.
-        dia = random.randint(1, 28)  # Para evitar problemas con febrero
-        # Usamos un año genérico, ej: 2023
-        return f"{dia:02d}-{mes_num:02d}-2023"
+            es_baja = np.zeros(n, dtype=bool)
+        satisfaccion = np.where(es_baja, rng.integers(0, 20, size=n), 100)
 
-    def generar_lote(self, cantidad, id_inicial, mes_origen):
-        lote = []
-        prob_baja = self.config.datos["simulacion"]["probabilidad_baja_historica"]
-
-        for i in range(cantidad):
-            nuevo_id = id_inicial + i
-            es_mujer = random.random() < 0.5
-            genero = "Femenino" if es_mujer else "Masculino"
-            nombre = f"{random.choice(self.nombres_m if es_mujer else self.nombres_h)} {random.choice(self.apellidos)}-{nuevo_id}"
-
-            # Lógica de baja histórica
-            es_baja = (mes_origen == "Carga_Inicial" and random.random() < prob_baja)
-            activo = not es_baja
-            satisfaccion = random.randint(0, 19) if es_baja else 100
-            fecha_baja = "Pre-Simulacion" if es_baja else None
-
-            # --- NUEVO: Generar fecha de alta ---
-            fecha_alta = self._obtener_fecha_simulada(mes_origen)
-
-            # Selección de Subtipo y Plan
-            roll_tipo = random.random()
-            if roll_tipo < 0.70:
-                subtipo = "Estudiante"
-            elif roll_tipo < 0.90:
-                subtipo = "Trabajador"
-            else:
-                subtipo = "Egresado"
-
-            if subtipo == "Egresado":
-                plan = "Mensual"
-            else:
-                plan = "Anual" if random.random() < 0.4 else "Mensual"
-
-            socio = {
-                "id": nuevo_id,
-                "nombre": nombre,
-                "genero": genero,
-                "tipo_usuario": "Socio",
-                "subtipo": subtipo,
-                "plan_pago": plan,
-                "mes_alta": mes_origen,  # Para lógica interna (antigüedad)
-                "fecha_alta": fecha_alta,  # Para visualización en JSON
-                "rutina": self.generar_rutina(genero),
-                "perfil": {"tipo": "Fuerza", "energia": 300, "prob_descanso": 0.2},
-                "satisfaccion_acumulada": satisfaccion,
-                "activo": activo,
-                "faltas_consecutivas": 0,
-                "castigado_hasta_semana_absoluta": 0,
-                "fecha_baja": fecha_baja
-            }
-            lote.append(socio)
-        return lote
+        # Fecha de alta DD-MM-2023 (día 1-28 para evitar problemas con febrero)
+        mes_num = 8 if mes_origen == "Carga_Inicial" else self.mapa_meses.get(mes_origen, 9)
+        dia = rng.integers(1, 29, size=n)
+
+        # Subtipo (70% Estudiante, 20% Trabajador, 10% Egresado) y plan (Egresado siempre Mensual)
+        subtipo = np.searchsorted([0.70, 0.90], rng.random(n), side="right")
+        anual = (subtipo != 2) & (rng.random(n) < 0.4)
+
+        # Rutinas: 4-6 pasos; tipo según género y tiempo según tipo
+        opciones = ["Musculacion_Pierna", "Musculacion_Torso", "Cardio"]
+        largos = rng.integers(4, 7, size=n)
+        mujer_paso = np.repeat(es_mujer, largos)
+        tirada = rng.random(len(mujer_paso))
+        tipo = np.where(mujer_paso, np.searchsorted([0.60, 0.80], tirada, side="right"),
+                        np.searchsorted([0.20, 0.80], tirada, side="right"))
+        tiempo = np.where(tipo == 2, rng.integers(15, 31, size=len(tipo)), rng.integers(20, 41, size=len(tipo)))
+        # Cada paso (tipo, tiempo) distinto es una plantilla compartida
+        usados, codigos_pasos = np.unique(tipo * 41 + tiempo, return_inverse=True)
+        pasos = [{"tipo_maquina_deseada": opciones[k // 41], "tiempo_uso": k % 41} for k in usados.tolist()]
+
+        socios = TablaSocios(capacidad=n)
+        socios.anadir_lote(
+            {"id": np.arange(id_inicial, id_inicial + n), "satisfaccion_acumulada": satisfaccion,
+             "activo": ~es_baja, "faltas_consecutivas": 0, "castigado_hasta_semana_absoluta": 0},
+            {"genero": (es_mujer.astype(np.int64), ["Masculino", "Femenino"]),
+             "tipo_usuario": (np.zeros(n, dtype=np.int64), ["Socio"]),
+             "subtipo": (subtipo, ["Estudiante", "Trabajador", "Egresado"]),
+             "plan_pago": (anual.astype(np.int64), ["Mensual", "Anual"]),
+             "mes_alta": (np.zeros(n, dtype=np.int64), [mes_origen]),  # Para lógica interna (antigüedad)
+             "fecha_alta": (dia - 1, [f"{d:02d}-{mes_num:02d}-2023" for d in range(1, 29)]),
+             "perfil": (np.zeros(n, dtype=np.int64), [{"tipo": "Fuerza", "energia": 300, "prob_descanso": 0.2}]),
+             "fecha_baja": (es_baja.astype(np.int64), [None, "Pre-Simulacion"])},
+            (np.where(es_mujer, idx_nombre + n_h, idx_nombre), idx_apellido + n_h + n_m,
+             self.nombres_h + self.nombres_m + self.apellidos),
+            (largos, codigos_pasos.ravel(), pasos))
+        return socios
 
     def inicializar_db(self):
         if os.path.exists(self.ruta_db): os.remove(self.ruta_db)
-        cantidad = self.config.datos["simulacion"].get("usuarios_totales_iniciales", 300)
+        self.repositorio.reiniciar()
+        cantidad = self.config.parametros.usuarios_iniciales
 
         print(f"🆕 Generando BASE INICIAL: {cantidad} socios...")
         socios = self.generar_lote(cantidad, 1, "Carga_Inicial")
 
-        with open(self.ruta_db, "w", encoding="utf-8") as f:
-            json.dump(socios, f, indent=4, ensure_ascii=False)
+        self.guardar_db(socios)
+        return socios
+
+    def restaurar_db(self, socios):
+        """Rehace la base con los socios de un checkpoint (la del disco puede ser de otra ejecución)."""
+        if os.path.exists(self.ruta_db): os.remove(self.ruta_db)
+        self.repositorio.reiniciar()
+        self.guardar_db(socios)
         return socios
 
     def inyectar_nuevos(self, socios_actuales, cantidad, mes):
         if cantidad <= 0: return socios_actuales
 
-        real = int(random.uniform(0.8, 1.2) * cantidad)
+        real = int(self.config.aleatorio.flujo("socios", mes).uniform(0.8, 1.2) * cantidad)
         last_id = socios_actuales[-1]["id"]
 
         print(f"✨ ALTAS {mes.upper()}: +{real} socios.")
@@ -139,24 +139,37 @@ class GestorSocios:
 
         socios_actuales.extend(nuevos)
 
-        with open(self.ruta_db, "w", encoding="utf-8") as f:
-            json.dump(socios_actuales, f, indent=4, ensure_ascii=False)
+        self.guardar_db(socios_actuales)
 
         return socios_actuales
 
-    def convertir_pase_diario(self, usuario_obj, nuevo_plan, fecha_alta):
-        """Convierte un usuario de Pase Diario en Socio registrado."""
-        # Cargamos DB actual
-        if os.path.exists(self.ruta_db):
-            with open(self.ruta_db, "r", encoding="utf-8") as f:
-                db = json.load(f)
+    def guardar_db(self, socios):
+        """
+        Guarda en la base los socios nuevos o modificados desde el último guardado.
+        Los cambios se detectan aquí (socios sigue cambiando); con escritor, el upsert va al hilo de E/S.
+        """
+        filas = self.repositorio.cambios(socios)
+        if self.escritor:
+            self.escritor.enviar(self.repositorio.escribir, filas, rutas=(self.repositorio.ruta,))
         else:
-            db = []
+            self.repositorio.escribir(filas)
 
-        nuevo_id = db[-1]["id"] + 1 if db else 1000
+    def exportar_json(self):
+        """Genera datos_clientes.json (formato de siempre) desde la base y la cierra."""
+        if self.escritor:
+            self.escritor.enviar(self.repositorio.exportar_json, self.ruta_db, rutas=(self.ruta_db,))
+            self.escritor.enviar(self.repositorio.cerrar)
+        else:
+            self.repositorio.exportar_json(self.ruta_db)
+            self.repositorio.cerrar()
 
+    def convertir_pase_diario(self, usuario_obj, nuevo_plan, fecha_alta):
+        """
+        Convierte un usuario de Pase Diario en Socio registrado.
+        Sólo se apunta en memoria: el socio entra en la base (con su id) en aplicar_conversiones.
+        """
         nuevo_socio = {
-            "id": nuevo_id,
+            "id": None,
             "nombre": usuario_obj.nombre,  # Mantenemos nombre (o generamos uno real si era dummy)
             "genero": "Desconocido", # Simplificación
             "tipo_usuario": "Socio",
@@ -164,7 +177,7 @@ class GestorSocios:
             "plan_pago": nuevo_plan,
             "mes_alta": "Conversion_PaseDiario",
             "fecha_alta": fecha_alta.strftime("%d-%m-%Y") if hasattr(fecha_alta, 'strftime') else str(fecha_alta),
-            "rutina": usuario_obj.rutina,
+            "rutina": [dict(paso) for paso in usuario_obj.rutina],  # La del pase es compartida
             "perfil": {"tipo": "Fuerza", "energia": usuario_obj.perfil.energia, "prob_descanso": usuario_obj.perfil.prob_descanso},
             "satisfaccion_acumulada": usuario_obj.satisfaccion,
             "activo": True,
@@ -174,7 +187,7 @@ class GestorSocios:
         }
         
         # Asignar un subtipo aleatorio para la conversión
-        roll = random.random()
+        roll = self.config.aleatorio.flujo("conversiones").random()
         if roll < 0.7: nuevo_socio["subtipo"] = "Estudiante"
         elif roll < 0.9: nuevo_socio["subtipo"] = "Trabajador"
         else: nuevo_socio["subtipo"] = "Egresado"
@@ -182,9 +195,17 @@ class GestorSocios:
         # Si es egresado, forzar mensual aunque la logica dijo anual (casos bordes)
         if nuevo_socio["subtipo"] == "Egresado": nuevo_socio["plan_pago"] = "Mensual"
 
-        db.append(nuevo_socio)
-        
-        with open(self.ruta_db, "w", encoding="utf-8") as f:
-            json.dump(db, f, indent=4, ensure_ascii=False)
-            
-        return nuevo_socio
\ No newline at end of file
+        self.conversiones_pendientes.append(nuevo_socio)
+        return nuevo_socio
+
+    def aplicar_conversiones(self, socios_actuales):
+        """Da de alta las conversiones de la semana, con ids a continuación del último (como inyectar_nuevos)."""
+        if not self.conversiones_pendientes: return 0
+        last_id = socios_actuales[-1]["id"] if socios_actuales else 999
+        for i, socio in enumerate(self.conversiones_pendientes):
+            socio["id"] = last_id + 1 + i
+        socios_actuales.extend(self.conversiones_pendientes)
+        n = len(self.conversiones_pendientes)
+        self.conversiones_pendientes = []
+        print(f"      ✨ Conversiones de pase diario dadas de alta: {n}")
+        return n
\ No newline at end of file
@@ -1,4 +1,5 @@
 import json
+import heapq
 
 from Accesorios import Accesorios
 from Maquina import Maquina
@@ -8,6 +9,51 @@ from Monitor import Monitor
 
 # from Usuario import Usuario  # Descomentar si tienes la clase Usuario
 
+class IndiceMaquinas:
+    """
+    Máquinas operativas agrupadas por tipo, cada grupo en un montículo ordenado por
+    (longitud de cola, posición en el gimnasio): el mismo criterio que min() sobre la lista,
+    pero sin recorrer todas las máquinas en cada paso de la rutina.
+
+    Cada máquina avisa (Maquina._avisar_indice) cuando cambia su cola o su disponibilidad; se
+    apunta una entrada nueva con la versión actual y las viejas se descartan al salir a la cima.
+    """
+
+    def __init__(self, maquinas):
+        self.maquinas = maquinas
+        self.versiones = [0] * len(maquinas)
+        self.montones = {}
+        self.tamanos = {}
+        for pos, m in enumerate(maquinas):
+            self.montones.setdefault(m.tipo_maquina, [])
+            self.tamanos[m.tipo_maquina] = self.tamanos.get(m.tipo_maquina, 0) + 1
+            m.indice, m.posicion_indice = self, pos
+            self.actualizar(pos)
+
+    def tiene_tipo(self, tipo):
+        return tipo in self.montones
+
+    def actualizar(self, pos):
+        self.versiones[pos] += 1
+        m = self.maquinas[pos]
+        if not m.disponibilidad: return  # Rota: sus entradas quedan caducadas
+
+        monton = self.montones[m.tipo_maquina]
+        heapq.heappush(monton, (len(m.cola), pos, self.versiones[pos]))
+        # Si se acumulan demasiadas entradas caducadas, se rehace el montículo
+        if len(monton) > 4 * self.tamanos[m.tipo_maquina] + 16:
+            monton[:] = [e for e in monton if e[2] == self.versiones[e[1]]]
+            heapq.heapify(monton)
+
+    def menos_cola(self, tipo):
+        """Máquina operativa del tipo con menos cola (None si todas están rotas)."""
+        monton = self.montones.get(tipo)
+        if not monton: return None
+        while monton and monton[0][2] != self.versiones[monton[0][1]]:
+            heapq.heappop(monton)
+        return self.maquinas[monton[0][1]] if monton else None
+
+
 class Gimnasio:
     def __init__(self, maquinas=None, monitores=None, accesorios=None,
                  capacidad=0, n_usuarios=0, usuarios_total=0, usuario=None):
@@ -20,6 +66,11 @@ class Gimnasio:
         self.n_usuarios = n_usuarios
         self.usuarios_total = usuarios_total
 
+        # Quién está dentro ahora mismo: usuario -> proceso (en orden de entrada)
+        self.ocupantes = {}
+        self.ocupacion_maxima = 0
+        self.indice_maquinas = None
+
     def cargar_datos_json(self, ruta_archivo):
         try:
             with open(ruta_archivo, 'r', encoding='utf-8') as f:
@@ -46,6 +97,42 @@ class Gimnasio:
         except Exception as e:
             print(f" Error inesperado: {e}")
 
+    def nueva_semana(self, env, aleatorio, disponibilidad=None, eventos=None):
+        """
+        Clona esta plantilla (ya cargada y clasificada) para una semana nueva, enganchada a un
+        entorno de SimPy recién creado. Si se pasa 'disponibilidad' (estado de cada máquina al
+        cerrar la semana anterior), las rotas siguen rotas y se reparan al empezar.
+        'eventos' (AdministradorDeLogs) recibe las averías y reparaciones.
+        """
+        gym = Gimnasio(
+            maquinas=[m.clonar() for m in self.maquinas],
+            monitores=[mon.clonar() for mon in self.monitores],
+            accesorios=[acc.clonar() for acc in self.accesorios],
+            capacidad=self.capacidad, n_usuarios=self.n_usuarios, usuarios_total=self.usuarios_total
+        )
+        if disponibilidad is not None:
+            for m, disponible in zip(gym.maquinas, disponibilidad):
+                m.disponibilidad = disponible
+
+        for m in gym.maquinas:
+            m.eventos = eventos
+            m.iniciar_simulacion(env, aleatorio.flujo("maquina", m.id))
+        for mon in gym.monitores: mon.iniciar_simulacion(aleatorio.flujo("monitor", mon.id))
+        gym.indice_maquinas = IndiceMaquinas(gym.maquinas)
+        return gym
+
+    def entrar(self, usuario, proceso):
+        self.ocupantes[usuario] = proceso
+        if len(self.ocupantes) > self.ocupacion_maxima:
+            self.ocupacion_maxima = len(self.ocupantes)
+
+    def salir(self, usuario):
+        self.ocupantes.pop(usuario, None)
+
+    @property
+    def ocupacion(self):
+        return len(self.ocupantes)
+
     def mostrar_resumen(self):
         print(f"--- RESUMEN GIMNASIO ---")
         print(f"Capacidad Máxima: {self.capacidad}")
@@ -1,56 +1,169 @@
 import os
 import csv
 import json
-import random  # Necesario para la probabilidad de segunda oportunidad
+import numpy as np
 from datetime import datetime
-from collections import Counter
 
 
 class Logs:
-    def __init__(self, ruta_completa_sin_ext):
+    """
+    Log de una sesión (.txt legible + .csv de eventos). Los ficheros quedan abiertos mientras
+    dura la sesión y las líneas se acumulan en memoria; se escriben por lotes al llegar a
+    'tamano_lote' o al cerrar, en vez de abrir y cerrar el fichero en cada evento.
+    Con 'escritor' (EscritorAsincrono) los lotes se escriben desde su hilo.
+    """
+    FIELDNAMES = ["tiempo_simulacion", "tipo_evento", "id_usuario", "nombre", "dia", "sesion",
+                  "satisfaccion_actual", "satisfaccion_inicio", "maquina", "duracion", "cola_tamano",
+                  "extra_info"]
+
+    def __init__(self, ruta_completa_sin_ext, tamano_lote=500, escritor=None):
         carpeta = os.path.dirname(ruta_completa_sin_ext)
         if not os.path.exists(carpeta): os.makedirs(carpeta)
         self.archivo_txt = f"{ruta_completa_sin_ext}.txt"
         self.archivo_csv = f"{ruta_completa_sin_ext}.csv"
-        with open(self.archivo_txt, "w", encoding="utf-8") as f:
-            f.write(f"--- Inicio: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---\n")
-        self.fieldnames = ["tiempo_simulacion", "tipo_evento", "id_usuario", "nombre", "dia", "sesion",
-                           "satisfaccion_actual", "satisfaccion_inicio", "maquina", "duracion", "cola_tamano",
-                           "extra_info"]
-        with open(self.archivo_csv, mode='w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-            writer.writeheader()
+        self.fieldnames = self.FIELDNAMES
+        self.tamano_lote = tamano_lote
+        self.escritor = escritor
+        self.cerrado = False
+
+        self._f_txt = open(self.archivo_txt, "w", encoding="utf-8")
+        self._f_csv = open(self.archivo_csv, mode='w', newline='', encoding='utf-8')
+        # Las claves que no son columnas del CSV se ignoran (antes se filtraban a mano)
+        self._writer = csv.DictWriter(self._f_csv, fieldnames=self.fieldnames, extrasaction="ignore")
+        self._writer.writeheader()
+        self._lineas = [f"--- Inicio: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---\n"]
+        self._filas = []
 
     def log(self, mensaje, nivel="INFO"):
-        with open(self.archivo_txt, "a", encoding="utf-8") as f:
-            f.write(f"[{datetime.now().strftime('%H:%M:%S')}] [{nivel}] {mensaje}\n")
+        self._lineas.append(f"[{datetime.now().strftime('%H:%M:%S')}] [{nivel}] {mensaje}\n")
+        if len(self._lineas) >= self.tamano_lote: self.volcar()
 
     def registrar_datos(self, datos):
-        try:
-            datos_filtrados = {k: v for k, v in datos.items() if k in self.fieldnames}
-            with open(self.archivo_csv, mode='a', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-                writer.writerow(datos_filtrados)
-        except:
-            pass
+        self._filas.append(datos)
+        if len(self._filas) >= self.tamano_lote: self.volcar()
+
+    def volcar(self):
+        """Escribe lo acumulado en los ficheros abiertos."""
+        if not self._lineas and not self._filas: return
+        lineas, filas = self._lineas, self._filas
+        self._lineas, self._filas = [], []
+        if self.escritor:
+            self.escritor.enviar(self._escribir, lineas, filas, rutas=(self.archivo_txt, self.archivo_csv))
+        else:
+            self._escribir(lineas, filas)
+
+    def _escribir(self, lineas, filas):
+        if lineas: self._f_txt.write("".join(lineas))
+        if filas: self._writer.writerows(filas)
 
     def cerrar_con_resumen(self, reservados, asistentes):
-        with open(self.archivo_txt, "a", encoding="utf-8") as f:
-            f.write(f"\n--- RESUMEN ---\nReservas: {reservados} | Asistentes: {asistentes}\n")
+        self._lineas.append(f"\n--- RESUMEN ---\nReservas: {reservados} | Asistentes: {asistentes}\n")
+
+    def cerrar(self):
+        if self.cerrado: return
+        self.cerrado = True
+        self.volcar()
+        if self.escritor:
+            self.escritor.enviar(self._cerrar_ficheros)
+        else:
+            self._cerrar_ficheros()
+
+    def _cerrar_ficheros(self):
+        self._f_txt.close()
+        self._f_csv.close()
+
+
+# --- EVENTOS DE LA SIMULACIÓN (traza por consola o en registros) ---
+# Niveles de detalle (config.json: simulacion.verbosidad)
+SILENCIO, SESIONES, EVENTOS = 0, 1, 2
+NIVELES = {"silencio": SILENCIO, "sesiones": SESIONES, "eventos": EVENTOS}
+
+
+class SumideroNulo:
+    """Descarta todos los eventos."""
+    nivel = SILENCIO
+
+    def emitir(self, nivel, tiempo, tipo, plantilla, args): pass
+
+    def cerrar_semana(self, carpeta, escritor=None): pass
+
+
+class SumideroConsola:
+    """Imprime los eventos hasta 'nivel' con el formato de siempre."""
+
+    def __init__(self, nivel=EVENTOS):
+        self.nivel = nivel
+
+    def emitir(self, nivel, tiempo, tipo, plantilla, args):
+        print(plantilla.format(*args))
+
+    def cerrar_semana(self, carpeta, escritor=None): pass
+
+
+class SumideroRegistros:
+    """
+    Guarda los eventos hasta 'nivel' como tuplas (tiempo, nivel, tipo, plantilla, args) sin formatear;
+    al cerrar cada semana se escriben en 'eventos.jsonl' de su carpeta (el texto se compone ahí).
+    """
+
+    def __init__(self, nivel=EVENTOS):
+        self.nivel = nivel
+        self.registros = []
+
+    def emitir(self, nivel, tiempo, tipo, plantilla, args):
+        self.registros.append((tiempo, nivel, tipo, plantilla, args))
+
+    def a_dicts(self):
+        return [{"tiempo": round(t, 2), "nivel": n, "tipo": tipo, "mensaje": p.format(*a).strip()}
+                for t, n, tipo, p, a in self.registros]
+
+    def cerrar_semana(self, carpeta, escritor=None):
+        if not self.registros: return
+        texto = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.a_dicts())
+        self.registros = []
+        _guardar_texto(f"{carpeta}/eventos.jsonl", texto, escritor)
+
+
+def crear_sumidero(verbosidad="sesiones", salida="consola"):
+    """Sumidero de eventos según config.json ('verbosidad': silencio/sesiones/eventos; 'salida': consola/registros)."""
+    nivel = NIVELES[verbosidad]
+    if nivel == SILENCIO: return SumideroNulo()
+    return SumideroRegistros(nivel) if salida == "registros" else SumideroConsola(nivel)
 
 
 class AdministradorDeLogs:
-    def __init__(self, carpeta_semana):
+    """
+    Punto único de salida de la simulación: logs detallados de cada sesión y eventos para el
+    sumidero. Quien emite comprueba 'nivel' antes de preparar el texto, así que un nivel
+    desactivado no formatea nada.
+    """
+
+    def __init__(self, carpeta_semana, detallado=False, escritor=None, sumidero=None):
         self.logger_actual = None
         self.carpeta_semana = carpeta_semana
         self.contador_asistentes = 0
+        # Con 'logs_detallados' (config.json) cada sesión escribe su .txt y su .csv
+        self.detallado = detallado
+        self.escritor = escritor
+        self.sumidero = sumidero or SumideroNulo()
+        self.nivel = self.sumidero.nivel
 
     def cambiar_sesion(self, nombre_dia, numero_sesion):
-        # MODO LIMPIO (Si quieres logs detallados descomenta la linea de abajo)
-        # self.logger_actual = Logs(f"{self.carpeta_semana}/{nombre_dia}/Sesion_{numero_sesion}")
-        self.logger_actual = None
+        self.cerrar()
+        if self.detallado:
+            self.logger_actual = Logs(f"{self.carpeta_semana}/{nombre_dia}/Sesion_{numero_sesion}",
+                                      escritor=self.escritor)
         self.contador_asistentes = 0
 
+    @property
+    def registrando(self):
+        """Hay un log de sesión abierto (si no, no hace falta preparar lo que se le pasaría)."""
+        return self.logger_actual is not None
+
+    def evento(self, nivel, tiempo, tipo, plantilla, *args):
+        """Evento para el sumidero; 'plantilla'.format(*args) sólo se compone si alguien lo consume."""
+        if nivel <= self.nivel: self.sumidero.emitir(nivel, tiempo, tipo, plantilla, args)
+
     def registrar_entrada_usuario(self):
         self.contador_asistentes += 1
 
@@ -63,89 +176,99 @@ class AdministradorDeLogs:
     def registrar_datos(self, datos):
         if self.logger_actual: self.logger_actual.registrar_datos(datos)
 
+    def cerrar(self):
+        """Vuelca y cierra el log de la sesión en curso."""
+        if self.logger_actual:
+            self.logger_actual.cerrar()
+            self.logger_actual = None
+
+    def cerrar_semana(self):
+        """Cierra el log en curso y deja al sumidero volcar los eventos de la semana."""
+        self.cerrar()
+        self.sumidero.cerrar_semana(self.carpeta_semana, self.escritor)
+
+
+def _guardar_texto(ruta, texto, escritor=None):
+    if escritor:
+        escritor.escribir(ruta, texto)
+    else:
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(texto)
+
 
 # --- LÓGICA DE REPORTES ---
 class GeneradorReportes:
     @staticmethod
-    def generar_conclusiones_semanales(lista_visitas, ids_no_shows, carpeta_destino, mes, semana_relativa,
-                                       semana_absoluta, socios_db, config, nuevas_altas):
+    def generar_conclusiones_semanales(visitas, ids_no_shows, carpeta_destino, mes, semana_relativa,
+                                       semana_absoluta, socios_db, config, nuevas_altas, escritor=None):
+        """'visitas' es la LlegadasSemana de la semana ya simulada."""
         ruta_json = f"{carpeta_destino}/Reporte_INTEGRAL_{mes}_S{semana_relativa}.json"
         ruta_txt = f"{carpeta_destino}/Resumen_Ejecutivo_{mes}_S{semana_relativa}.txt"
 
-        ultima_satisfaccion_map = {u.id: u.satisfaccion for u in lista_visitas}
-
-        bajas = 0
-        lista_bajas = []
-        castigados_nuevos = 0
-        perdonados = 0
+        ultima_satisfaccion_map = visitas.satisfaccion
+        n_visitas = len(visitas)
 
         idx_mes_actual = config.INDICE_MESES.get(mes, 0)
-        SAT_CONFIG = config.datos["satisfaccion"]
-        prob_perdon = config.datos["simulacion"].get("probabilidad_reconsiderar_baja", 0.0)
-
-        conteo_no_shows = Counter(ids_no_shows)
-
-        for socio in socios_db:
-            sid = socio["id"]
-
-            # 1. ACTUALIZAR SATISFACCIÓN
-            if sid in ultima_satisfaccion_map:
-                socio["satisfaccion_acumulada"] = ultima_satisfaccion_map[sid]
-                socio["faltas_consecutivas"] = 0
-
-            # 2. GESTIONAR FALTAS
-            faltas_esta_semana = conteo_no_shows.get(sid, 0)
-            if faltas_esta_semana > 0:
-                socio["faltas_consecutivas"] += faltas_esta_semana
-
-            # 3. APLICAR CASTIGO
-            if socio["faltas_consecutivas"] >= 3 and socio.get("castigado_hasta_semana_absoluta", 0) <= semana_absoluta:
-                socio["faltas_consecutivas"] = 0
-                socio["castigado_hasta_semana_absoluta"] = semana_absoluta + 2
-                castigados_nuevos += 1
-
-            # 4. GESTIÓN DE BAJAS Y SEGUNDA OPORTUNIDAD
-            if socio.get("activo", True):
-                mes_alta = socio.get("mes_alta", "Carga_Inicial")
-                idx_alta = config.INDICE_MESES.get(mes_alta, -1)
-                antiguedad = idx_mes_actual - idx_alta
-
-                if antiguedad <= 1:
-                    umbral = SAT_CONFIG["umbral_baja_novato"]
-                elif antiguedad <= 4:
-                    umbral = SAT_CONFIG["umbral_baja_medio"]
-                else:
-                    umbral = SAT_CONFIG["umbral_baja_veterano"]
-
-                if socio["satisfaccion_acumulada"] < umbral:
-                    # --- AQUÍ ESTÁ EL CAMBIO: Segunda Oportunidad ---
-                    if random.random() < prob_perdon:
-                        # SE SALVA
-                        perdonados += 1
-                        socio[
-                            "satisfaccion_acumulada"] = 55  # Le subimos un poco el ánimo para que no caiga la semana que viene
-                        print(
-                            f"      😅 {socio['nombre']} pensó en irse (Sat {socio['satisfaccion_acumulada']}), pero le dará otra oportunidad.")
-                    else:
-                        # SE VA DEFINITIVAMENTE
-                        socio["activo"] = False
-                        socio["fecha_baja"] = f"{mes} - S{semana_relativa}"
-                        bajas += 1
-                        lista_bajas.append({"id": sid, "motivo": f"Sat < {umbral}"})
-                        print(
-                            f"      ❌ BAJA: {socio['nombre']} (Sat: {socio['satisfaccion_acumulada']}) - Antigüedad: {antiguedad} m")
-
-        with open(config.datos["rutas"]["archivo_clientes"], "w", encoding="utf-8") as f:
-            json.dump(socios_db, f, indent=4, ensure_ascii=False)
+        params = config.parametros
+        prob_perdon = params.prob_reconsiderar_baja
+        rng = config.aleatorio.flujo("reportes")  # Para la probabilidad de segunda oportunidad
+
+        # Las mismas reglas que socio a socio, pero sobre las columnas de la TablaSocios
+        satisfaccion, faltas, castigo, activo = (socios_db.satisfaccion, socios_db.faltas, socios_db.castigo,
+                                                 socios_db.activo)
+
+        # 1. ACTUALIZAR SATISFACCIÓN (y las faltas se reinician al venir)
+        if ultima_satisfaccion_map:
+            filas, validos = socios_db.filas_de(list(ultima_satisfaccion_map.keys()))
+            satisfaccion[filas] = np.fromiter(ultima_satisfaccion_map.values(), dtype=np.float64,
+                                              count=len(ultima_satisfaccion_map))[validos]
+            faltas[filas] = 0
+
+        # 2. GESTIONAR FALTAS
+        if ids_no_shows:
+            filas, _ = socios_db.filas_de(ids_no_shows)
+            np.add.at(faltas, filas, 1)
+
+        # 3. APLICAR CASTIGO
+        castigar = (faltas >= 3) & (castigo <= semana_absoluta)
+        faltas[castigar] = 0
+        castigo[castigar] = semana_absoluta + 2
+        castigados_nuevos = int(castigar.sum())
+
+        # 4. GESTIÓN DE BAJAS Y SEGUNDA OPORTUNIDAD
+        umbrales = params.umbrales_baja
+        novato, medio = params.tramos_antiguedad
+        idx_alta = socios_db.mapa_categorias("mes_alta", lambda m: config.INDICE_MESES.get(m, -1))
+        antiguedad = idx_mes_actual - idx_alta[socios_db.columna("mes_alta")]
+        tramo = np.where(antiguedad <= novato, 0, np.where(antiguedad <= medio, 1, 2))
+        en_riesgo = np.flatnonzero(activo & (satisfaccion < np.asarray(umbrales, dtype=np.float64)[tramo]))
+
+        # Una tirada por socio en riesgo, en el orden de la base (como el bucle de antes)
+        tiradas = np.array([rng.random() for _ in range(len(en_riesgo))])
+        perdonados_idx = en_riesgo[tiradas < prob_perdon]
+        bajas_idx = en_riesgo[tiradas >= prob_perdon]
+
+        # SE SALVAN: les subimos un poco el ánimo para que no caigan la semana que viene
+        satisfaccion[perdonados_idx] = 55
+        # SE VAN DEFINITIVAMENTE
+        activo[bajas_idx] = False
+        socios_db.asignar("fecha_baja", bajas_idx, f"{mes} - S{semana_relativa}")
+
+        perdonados = len(perdonados_idx)
+        bajas = len(bajas_idx)
+        lista_bajas = [{"id": sid, "motivo": f"Sat < {umbrales[t]}"}
+                       for sid, t in zip(socios_db.id[bajas_idx].tolist(), tramo[bajas_idx].tolist())]
+        if perdonados: print(f"      😅 {perdonados} socios pensaron en irse, pero se dan otra oportunidad.")
+        if bajas: print(f"      ❌ BAJAS: {bajas} socios se van.")
 
         promedio = sum(ultima_satisfaccion_map.values()) / len(
             ultima_satisfaccion_map) if ultima_satisfaccion_map else 0
-        socios_activos = len([s for s in socios_db if s.get("activo", True)])
+        socios_activos = int(socios_db.activo.sum())
 
         informe = {
             "periodo": f"{mes} - S{semana_relativa}",
             "kpis": {
-                "visitas": len(lista_visitas),
+                "visitas": n_visitas,
                 "sat_media": round(promedio, 2),
                 "bajas": bajas,
                 "perdonados_segunda_oportunidad": perdonados,
@@ -155,15 +278,12 @@ class GeneradorReportes:
             },
             "bajas_detalle": lista_bajas
         }
-        with open(ruta_json, "w", encoding="utf-8") as f:
-            json.dump(informe, f, indent=4)
+        _guardar_texto(ruta_json, json.dumps(informe, indent=4), escritor)
+        _guardar_texto(ruta_txt, f"=== {mes.upper()} S{semana_relativa} ===\n"
+                                 f"Visitas: {n_visitas}\nSat Media: {promedio:.2f}\n"
+                                 f"Bajas: {bajas}\nSalvados in extremis: {perdonados}\n", escritor)
 
-        with open(ruta_txt, "w", encoding="utf-8") as f:
-            f.write(f"=== {mes.upper()} S{semana_relativa} ===\n")
-            f.write(f"Visitas: {len(lista_visitas)}\nSat Media: {promedio:.2f}\n")
-            f.write(f"Bajas: {bajas}\nSalvados in extremis: {perdonados}\n")
-
-        return {"mes": mes, "visitas": len(lista_visitas), "bajas": bajas, "altas": nuevas_altas,
+        return {"mes": mes, "visitas": n_visitas, "bajas": bajas, "altas": nuevas_altas,
                 "satisfaccion": promedio, "socios_activos": socios_activos}
 
     @staticmethod
@@ -177,7 +297,7 @@ class GeneradorReportes:
         for h in historico:
             mes = h["mes"]
             if mes not in desglose: desglose[mes] = {"visitas": 0, "bajas": 0, "altas": 0, "suma_sat": 0, "count": 0,
-                                                     "socios": 0}
+                                                     "socios": 0, "ocupacion_maxima": 0}
             d = desglose[mes]
             d["visitas"] += h["visitas"];
             d["bajas"] += h["bajas"];
@@ -185,6 +305,7 @@ class GeneradorReportes:
             d["suma_sat"] += h["satisfaccion"];
             d["count"] += 1;
             d["socios"] = h["socios_activos"]
+            d["ocupacion_maxima"] = max(d["ocupacion_maxima"], h.get("ocupacion_maxima", 0))
 
         final = []
         print(
@@ -193,10 +314,10 @@ class GeneradorReportes:
             avg = d["suma_sat"] / d["count"] if d["count"] else 0
             final.append(
                 {"mes": m, "visitas": d["visitas"], "altas": d["altas"], "bajas": d["bajas"], "sat": round(avg, 2),
-                 "socios": d["socios"]})
+                 "socios": d["socios"], "ocupacion_maxima": d["ocupacion_maxima"]})
             print(f"{m:<10} | {d['visitas']:<7} | {d['altas']:<5} | {d['bajas']:<5} | {avg:.2f} | {d['socios']}")
 
+        informe = {"global": {"visitas": total_visitas, "bajas": total_bajas, "altas": total_altas}, "mensual": final}
         with open(ruta_anual, "w", encoding="utf-8") as f:
-            json.dump(
-                {"global": {"visitas": total_visitas, "bajas": total_bajas, "altas": total_altas}, "mensual": final}, f,
-                indent=4)
\ No newline at end of file
+            json.dump(informe, f, indent=4)
+        return informe
\ No newline at end of file
@@ -1,6 +1,9 @@
 import simpy
+import copy
 import random
 from Problema import Problema
+from Loggers import EVENTOS
+from NucleoEventos import Entorno, Recurso
 
 
 class MachineBrokenError(Exception):
@@ -8,6 +11,33 @@ class MachineBrokenError(Exception):
     pass
 
 
+class ColaMaquina(list):
+    """Cola de peticiones de SimPy que avisa cada vez que cambia su longitud."""
+    aviso = None
+
+    def append(self, peticion):
+        super().append(peticion)
+        if self.aviso: self.aviso()
+
+    def pop(self, idx=-1):
+        peticion = super().pop(idx)
+        if self.aviso: self.aviso()
+        return peticion
+
+    def remove(self, peticion):
+        super().remove(peticion)
+        if self.aviso: self.aviso()
+
+
+class RecursoMaquina(simpy.Resource):
+    PutQueue = ColaMaquina
+
+
+class RecursoMaquinaNucleo(Recurso):
+    """RecursoMaquina para el motor propio (NucleoEventos)."""
+    PutQueue = ColaMaquina
+
+
 class Maquina:
     def __init__(self, nombre, id, tipo_maquina, tipo_cola, disponibilidad, durabilidad=None, **kwargs):
         self.nombre = nombre
@@ -17,6 +47,7 @@ class Maquina:
         # durabilidad argument ignored/removed
 
         self.env = None
+        self.rng = random
         self.resource = None
         self.cola = []
         
@@ -24,30 +55,61 @@ class Maquina:
         # para poder interrumpirlos si la máquina se rompe.
         self.usuarios_esperando = []
 
+        # Índice por tipo del gimnasio (Gimnasio.IndiceMaquinas) al que avisar de cambios
+        self.indice = None
+        self.posicion_indice = None
+        # AdministradorDeLogs de la semana para averías y reparaciones (opcional)
+        self.eventos = None
+
         # Configuración de averías
         self.puede_romperse = True
         n = self.nombre.lower()
         if "banco" in n or "mancuerna" in n or "barra" in n or "jaula" in n:
              self.puede_romperse = False
 
-    def iniciar_simulacion(self, env):
+    def clonar(self):
+        """Copia ligera para una nueva semana (sin entorno ni colas)."""
+        nueva = copy.copy(self)
+        nueva.env = None
+        nueva.resource = None
+        nueva.cola = []
+        nueva.usuarios_esperando = []
+        nueva.indice = None
+        nueva.posicion_indice = None
+        nueva.eventos = None
+        return nueva
+
+    def iniciar_simulacion(self, env, rng=None):
         """Activa la máquina en el entorno de SimPy."""
         self.env = env
+        self.rng = rng or random
         # Capacity=2: Permite compartir
-        self.resource = simpy.Resource(env, capacity=2)
+        clase = RecursoMaquinaNucleo if isinstance(env, Entorno) else RecursoMaquina
+        self.resource = clase(env, capacity=2)
         self.cola = self.resource.queue
+        self.cola.aviso = self._avisar_indice
 
         # Si empieza rota (disponibilidad=False), lanzamos reparación
         if not self.disponibilidad:
             self.env.process(self.reparar_inmediatamente())
 
+    def _avisar_indice(self):
+        """La longitud de la cola o la disponibilidad han cambiado."""
+        if self.indice is not None:
+            self.indice.actualizar(self.posicion_indice)
+
+    def _evento(self, tipo, plantilla, *args):
+        if self.eventos is not None and self.eventos.nivel >= EVENTOS:
+            self.eventos.evento(EVENTOS, self.env.now, tipo, plantilla, self.env.now, self.nombre, *args)
+
     def romper(self):
         """Rompe la máquina, expulsa a la cola y lanza proceso de reparación."""
         if not self.disponibilidad:
             return # Ya está rota
 
         self.disponibilidad = False
-        print(f"[{self.env.now:6.2f}] 💥 CRASH: {self.nombre} se ha roto durante el uso!")
+        self._avisar_indice()
+        self._evento("AVERIA", "[{:6.2f}] 💥 CRASH: {} se ha roto durante el uso!")
 
         # 1. Expulsar a todos los usuarios de la cola de espera
         # Hacemos copia de la lista porque al interrumpirlos se eliminarán ellos mismos de la lista
@@ -75,7 +137,7 @@ class Maquina:
         # Creamos una avería
         averia = Problema(
             tipo="AveriaMecanica",
-            gravedad=random.randint(1, 3),
+            gravedad=self.rng.randint(1, 3),
             descripcion=f"Fallo mecánico en {self.nombre}"
         )
         
@@ -88,9 +150,9 @@ class Maquina:
             requests_mecanico.append(req)
         
         # Esperamos a obtener todos los slots (esperamos a que salgan los usuarios actuales)
-        yield simpy.AllOf(self.env, requests_mecanico)
+        yield self.env.all_of(requests_mecanico)
 
-        print(f"[{self.env.now:6.2f}] 🔧 MANTENIMIENTO: Reparando {self.nombre} ({averia.tiempo_solucion}m)...")
+        self._evento("REPARACION", "[{:6.2f}] 🔧 MANTENIMIENTO: Reparando {} ({}m)...", averia.tiempo_solucion)
         yield self.env.timeout(averia.tiempo_solucion)
 
         # Liberamos
@@ -98,7 +160,8 @@ class Maquina:
             self.resource.release(req)
 
         self.disponibilidad = True
-        print(f"[{self.env.now:6.2f}] ✅ FIX: {self.nombre} vuelve a estar operativa.")
+        self._avisar_indice()
+        self._evento("REPARADA", "[{:6.2f}] ✅ FIX: {} vuelve a estar operativa.")
 
     def reparar_inmediatamente(self):
         # Helper para cuando empieza rota
@@ -111,7 +174,7 @@ class Maquina:
 
         # Chequeo de rotura al usar (1% de probabilidad)
         # Solo si puede romperse
-        if self.puede_romperse and random.random() < 0.01:
+        if self.puede_romperse and self.rng.random() < 0.01:
             self.romper()
             raise MachineBrokenError(f"{self.nombre} se rompió mientras {usuario.nombre} la usaba.")
 
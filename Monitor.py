@@ -1,4 +1,6 @@
+import copy
 import random  # 1. Importamos la librería necesaria
+from Loggers import EVENTOS
 
 class Monitor:
     def __init__(self, nombre, id, especialidad):
@@ -10,6 +12,17 @@ class Monitor:
 
         # Inicializamos la cola vacía internamente (no viene del JSON)
         self.cola = []
+        self.rng = random
+
+    def clonar(self):
+        nuevo = copy.copy(self)
+        nuevo.cola = []
+        return nuevo
+
+    def iniciar_simulacion(self, rng=None):
+        """Asigna el generador del que salen los tiempos de atención."""
+        self.rng = rng or random
+        self.cola = []
 
     def preguntar(self, usuario):
         """
@@ -17,20 +30,25 @@ class Monitor:
         """
         # Añadir a la cola
         self.cola.append(usuario)
+        logs = usuario.logger_sesion
         try:
-            print(f"[{usuario.env.now:.2f}] 🗣️ {usuario.nombre} espera al monitor {self.nombre}...")
+            if logs is not None:
+                logs.evento(EVENTOS, usuario.env.now, "ESPERA_MONITOR", "[{:.2f}] 🗣️ {} espera al monitor {}...",
+                            usuario.env.now, usuario.nombre, self.nombre)
 
             # 2. MODIFICACIÓN: Cálculo del tiempo con distribución triangular
             # random.triangular(minimo, maximo, moda)
             # - low (2): Nadie tarda menos de 2 minutos.
             # - high (10): Nadie tarda más de 10 minutos.
             # - mode (5): Lo más habitual es tardar 5 minutos.
-            tiempo_atencion = random.triangular(2, 10, 5)
+            tiempo_atencion = self.rng.triangular(2, 10, 5)
 
             # Simulamos el tiempo que tarda en atender usando el valor calculado
             yield usuario.env.timeout(tiempo_atencion)
 
-            print(f"[{usuario.env.now:.2f}] ✅ {self.nombre} aconsejó a {usuario.nombre} (duración: {tiempo_atencion:.2f}m).")
+            if logs is not None:
+                logs.evento(EVENTOS, usuario.env.now, "FIN_MONITOR", "[{:.2f}] ✅ {} aconsejó a {} (duración: {:.2f}m).",
+                            usuario.env.now, self.nombre, usuario.nombre, tiempo_atencion)
         finally:
             # Aseguramos que se quite de la cola pase lo que pase
             self.cola.remove(usuario)
@@ -1,11 +1,66 @@
 import simpy
-import random
+import numpy as np
 from datetime import timedelta
 from usuario import Usuario
 from GestorSocios import PerfilGenerado
+from Loggers import SESIONES
+
+
+class MuestreadorDiario:
+    """
+    Reparte el pool de socios permitidos entre las sesiones de un día sin repetir a nadie.
+    Baraja los índices una vez al día y cada sesión se lleva el siguiente tramo: es el mismo
+    muestreo sin reemplazo que hacer random.sample sobre los que aún no han reservado, pero
+    sin reconstruir la lista de candidatos en cada sesión.
+    """
+
+    def __init__(self, n, rng_np):
+        self.orden = rng_np.permutation(n)
+        self.posicion = 0
+
+    @property
+    def restantes(self):
+        return len(self.orden) - self.posicion
+
+    def extraer(self, k):
+        k = max(0, min(k, self.restantes))
+        tramo = self.orden[self.posicion:self.posicion + k]
+        self.posicion += k
+        return tramo
+
+
+class LlegadasSemana:
+    """
+    Visitas planificadas de una semana como registros compactos, ordenados por hora de llegada.
+    'socio' es la fila en 'socios' (TablaSocios; -1 para pases diarios) y 'semilla' la del flujo aleatorio
+    con el que se crea el Usuario al llegar. Durante la semana también recoge la satisfacción
+    final de cada visitante (id -> satisfacción), que es lo que necesitan los reportes.
+    """
+
+    DTYPE = np.dtype([("llegada", "f8"), ("hora_fin", "f8"), ("socio", "i8"), ("id", "i8"),
+                      ("visitante", "i4"), ("semilla", "u8")])
+
+    def __init__(self, registros, socios):
+        tabla = np.array(registros, dtype=self.DTYPE)
+        # Orden estable: a igual hora, el orden de planificación
+        self.registros = tabla[np.argsort(tabla["llegada"], kind="stable")]
+        self.socios = socios
+        self.satisfaccion = {}
+
+    def __len__(self):
+        return len(self.registros)
+
+    @property
+    def pases_diarios(self):
+        return int(np.count_nonzero(self.registros["socio"] < 0))
 
 
 class MotorSimulacion:
+    # Plantillas compartidas por todos los pases diarios
+    PERFIL_PASE = {"tipo": "Mix", "energia": 200, "prob_descanso": 0.3}
+    RUTINA_PASE = [{"tipo_maquina_deseada": "Cardio", "tiempo_uso": 20},
+                   {"tipo_maquina_deseada": "Musculacion_Torso", "tiempo_uso": 30}]
+
     def __init__(self, config, gestor_socios=None):
         self.config = config
         self.gestor_socios = gestor_socios
@@ -22,98 +77,122 @@ class MotorSimulacion:
                 else:
                     m.tipo_maquina = "Musculacion_Torso"
 
-    def generar_flota_semanal(self, env, gimnasio, base_datos, semana_abs, factor):
-        programados = []
+    def generar_flota_semanal(self, base_datos, semana_abs, factor):
+        """
+        Planifica las visitas de la semana como registros ligeros (LlegadasSemana).
+        Los Usuario completos se crean al llegar, en controlador_llegadas.
+        """
+        registros = []
         lista_no_shows = []
+        aleatorio = self.config.aleatorio
+        params = self.config.parametros
 
-        socios_permitidos = []
-        for s in base_datos:
-            if not s.get("activo", True): continue
-            if s.get("castigado_hasta_semana_absoluta", 0) > semana_abs: continue
-            socios_permitidos.append(s)
+        # Activos y sin castigo vigente: una máscara sobre las columnas de la tabla
+        filas_permitidas = base_datos.indices_permitidos(semana_abs)
+        ids_permitidos = base_datos.id[filas_permitidas].tolist()
+        filas_permitidas = filas_permitidas.tolist()
 
-        cupo = int(self.config.CLIENTES_BASE * factor)
-        print(f"   ℹ️ Acceso: {len(socios_permitidos)} permitidos | Cupo: ~{cupo} pax/sesión")
+        cupo = int(params.clientes_base * factor)
+        print(f"   ℹ️ Acceso: {len(filas_permitidas)} permitidos | Cupo: ~{cupo} pax/sesión")
 
-        if not socios_permitidos: return [], []
+        if not filas_permitidas: return LlegadasSemana([], base_datos), []
 
-        for dia_idx, nombre_dia in enumerate(self.config.DIAS_SEMANA):
-            sesiones = self.config.obtener_sesiones_por_dia(nombre_dia)
-            reservados_hoy = set()
+        var = params.variacion_afluencia
+        prob_pase = params.prob_pase_diario
+        for dia_idx, inicios in enumerate(params.inicio_sesiones):
+            # Nadie reserva dos veces el mismo día
+            muestreador = MuestreadorDiario(len(filas_permitidas), aleatorio.flujo_np("reservas", dia_idx))
 
-            for sesion in range(sesiones):
-                var = self.config.datos["simulacion"]["variacion_afluencia"]
-                reservas_totales = int(random.uniform(1.0 - var, 1.0 + var) * cupo)
-                candidatos = [s for s in socios_permitidos if s['id'] not in reservados_hoy]
-                if not candidatos: continue
+            for sesion, inicio in enumerate(inicios):
+                # Flujos sincronizados por sesión y por visita (números aleatorios comunes entre escenarios)
+                rng = aleatorio.flujo("llegadas", dia_idx, sesion)
+                reservas_totales = int(rng.uniform(1.0 - var, 1.0 + var) * cupo)
+                if muestreador.restantes == 0: continue
 
-                seleccionados = random.sample(candidatos, min(reservas_totales, len(candidatos)))
-                inicio = (dia_idx * self.config.MINUTOS_MAXIMOS_POR_DIA) + (sesion * self.config.DURACION_SESION)
+                seleccionados = muestreador.extraer(reservas_totales)
 
-                for dato in seleccionados:
-                    reservados_hoy.add(dato['id'])
-                    es_no_show = random.random() < 0.05
+                for idx in seleccionados.tolist():
+                    id_socio = ids_permitidos[idx]
+                    # No-show, llegada y hora de salida salen del hash de la visita; el resto de
+                    # decisiones del usuario, del flujo que se crea con 'semilla' al llegar
+                    (u_falta, u_llegada, u_salida), semilla = aleatorio.sembrar("visita", id_socio, dia_idx)
 
-                    if es_no_show:
-                        lista_no_shows.append(dato['id'])
+                    if u_falta < 0.05:
+                        lista_no_shows.append(id_socio)
                     else:
-                        u = Usuario(
-                            id_usuario=dato["id"], nombre=dato["nombre"], tipo_usuario="Socio",
-                            subtipo=dato.get("subtipo", "Estudiante"), plan_pago=dato.get("plan_pago", "Mensual"),
-                            tiempo_llegada=inicio + random.uniform(0, 10), hora_fin=inicio + random.randint(60, 90),
-                            rutina=dato["rutina"], perfil=PerfilGenerado(dato["perfil"]), problema=None,
-                            config=self.config.datos, env=env, gimnasio=gimnasio,
-                            faltas_consecutivas=dato["faltas_consecutivas"]
-                        )
-                        u.satisfaccion = dato.get("satisfaccion_acumulada", 100)
-                        programados.append(u)
+                        registros.append((inicio + u_llegada * 10, inicio + 60 + int(u_salida * 31),
+                                          filas_permitidas[idx], id_socio, 0, semilla))
 
                 # --- GENERACIÓN DE PASES DIARIOS ---
-                prob_pase = self.config.datos.get("probabilidades", {}).get("pase_diario", 0.05)
+                rng = aleatorio.flujo("pases", dia_idx, sesion)
                 # Intentamos generar algunos pases diarios extra (independientes del cupo de socios)
-                n_pases = int(random.uniform(0, 2)) if random.random() < prob_pase else 0
-                
+                n_pases = int(rng.uniform(0, 2)) if rng.random() < prob_pase else 0
+
                 for _ in range(n_pases):
-                    # Crear usuario ficticio de pase diario
-                    inicio_pase = (dia_idx * self.config.MINUTOS_MAXIMOS_POR_DIA) + (sesion * self.config.DURACION_SESION)
-                    
-                    # Generar perfil aleatorio
-                    perfil_dummy = {"tipo": "Mix", "energia": 200, "prob_descanso": 0.3}
-                    rutina_dummy = [{"tipo_maquina_deseada": "Cardio", "tiempo_uso": 20}, {"tipo_maquina_deseada": "Musculacion_Torso", "tiempo_uso": 30}]
-                    
-                    u_pase = Usuario(
-                        id_usuario=999999 + random.randint(1, 9999), nombre=f"Visitante-{random.randint(100,999)}", 
-                        tipo_usuario="Pase_Diario", subtipo="Visitante", plan_pago="Diario",
-                        tiempo_llegada=inicio_pase + random.uniform(5, 15), hora_fin=inicio_pase + 90,
-                        rutina=rutina_dummy, perfil=PerfilGenerado(perfil_dummy), problema=None,
-                        config=self.config.datos, env=env, gimnasio=gimnasio
-                    )
-                    programados.append(u_pase)
-
-        return programados, lista_no_shows
-
-    def controlador_llegadas(self, env, usuarios, admin_logs):
-        usuarios.sort(key=lambda u: u.tiempo_llegada)
-        for u in usuarios:
-            yield env.timeout(u.tiempo_llegada - env.now)
-            dia_idx = int(env.now // self.config.MINUTOS_MAXIMOS_POR_DIA)
-            if dia_idx >= len(self.config.DIAS_SEMANA): break
+                    # Usuario ficticio de pase diario (socio = -1)
+                    id_pase = 999999 + rng.randint(1, 9999)
+                    visitante = rng.randint(100, 999)
+                    registros.append((inicio + rng.uniform(5, 15), inicio + 90, -1, id_pase, visitante,
+                                      rng.getrandbits(64)))
+
+        return LlegadasSemana(registros, base_datos), lista_no_shows
 
+    def _materializar(self, env, gimnasio, llegadas, registro):
+        """Crea el Usuario de un registro de llegada (sólo cuando entra al gimnasio)."""
+        rng = self.config.aleatorio.crear_flujo(int(registro["semilla"]))
+        if registro["socio"] >= 0:
+            dato = llegadas.socios[int(registro["socio"])]
+            u = Usuario(
+                id_usuario=dato["id"], nombre=dato["nombre"], tipo_usuario="Socio",
+                subtipo=dato.get("subtipo", "Estudiante"), plan_pago=dato.get("plan_pago", "Mensual"),
+                tiempo_llegada=float(registro["llegada"]), hora_fin=float(registro["hora_fin"]),
+                rutina=dato["rutina"], perfil=PerfilGenerado(dato["perfil"], rng), problema=None,
+                config=self.config.parametros, env=env, gimnasio=gimnasio,
+                faltas_consecutivas=dato["faltas_consecutivas"]
+            )
+            u.satisfaccion = dato.get("satisfaccion_acumulada", 100)
+        else:
+            u = Usuario(
+                id_usuario=int(registro["id"]), nombre=f"Visitante-{registro['visitante']}",
+                tipo_usuario="Pase_Diario", subtipo="Visitante", plan_pago="Diario",
+                tiempo_llegada=float(registro["llegada"]), hora_fin=float(registro["hora_fin"]),
+                rutina=self.RUTINA_PASE, perfil=PerfilGenerado(self.PERFIL_PASE, rng), problema=None,
+                config=self.config.parametros, env=env, gimnasio=gimnasio
+            )
+        return u
+
+    def controlador_llegadas(self, env, gimnasio, llegadas, admin_logs):
+        """Suelta las llegadas en orden; cada usuario queda en gimnasio.ocupantes hasta que sale."""
+        params = self.config.parametros
+        # Las llegadas de una traza (Traza.LlegadasTraza) traen ya sus usuarios con las decisiones grabadas
+        materializar = getattr(llegadas, "materializar", None)
+        for i, registro in enumerate(llegadas.registros):
+            yield env.timeout(float(registro["llegada"]) - env.now)
+            dia_idx = int(env.now // params.minutos_por_dia)
+            if dia_idx >= len(params.dias_semana): break
+
+            if materializar is None:
+                u = self._materializar(env, gimnasio, llegadas, registro)
+            else:
+                u = materializar(env, gimnasio, params, i)
             u.logger_sesion = admin_logs
-            u.dia_sesion = self.config.DIAS_SEMANA[dia_idx]
-            u.numero_sesion = int((env.now % self.config.MINUTOS_MAXIMOS_POR_DIA) // self.config.DURACION_SESION) + 1
-
-            admin_logs.log(f"➕ {u.nombre} entra", "LLEGADA")
-            admin_logs.registrar_datos(
-                {"tiempo_simulacion": f"{env.now:.2f}", "tipo_evento": "LLEGADA", "id_usuario": u.id,
-                 "nombre": u.nombre, "dia": u.dia_sesion, "sesion": u.numero_sesion,
-                 "satisfaccion_actual": u.satisfaccion})
+            u.dia_sesion = params.dias_semana[dia_idx]
+            u.numero_sesion = int((env.now % params.minutos_por_dia) // params.duracion_sesion) + 1
+
+            if admin_logs.registrando:
+                admin_logs.log(f"➕ {u.nombre} entra", "LLEGADA")
+                admin_logs.registrar_datos(
+                    {"tiempo_simulacion": f"{env.now:.2f}", "tipo_evento": "LLEGADA", "id_usuario": u.id,
+                     "nombre": u.nombre, "dia": u.dia_sesion, "sesion": u.numero_sesion,
+                     "satisfaccion_actual": u.satisfaccion})
             admin_logs.registrar_entrada_usuario()
+            llegadas.satisfaccion[u.id] = u.satisfaccion
 
             # Wrapper para controlar el fin de sesión y conversiones
-            u.process = env.process(self._wrapper_entrenamiento(env, u, admin_logs))
+            u.process = env.process(self._wrapper_entrenamiento(env, u, admin_logs, llegadas))
+            gimnasio.entrar(u, u.process)
 
-    def _wrapper_entrenamiento(self, env, usuario, admin_logs):
+    def _wrapper_entrenamiento(self, env, usuario, admin_logs, llegadas):
         """Envuelve el proceso de entrenamiento para ejecutar lógica post-sesión."""
         try:
             yield from usuario.entrenar(90)
@@ -121,63 +200,69 @@ class MotorSimulacion:
             # Si fue interrumpido (ej. fin de sesión), propagamos o manejamos
             # Pero usuario.entrenar ya maneja interrupciones internas.
             pass
-        
+
+        # Ya no está dentro: deja de contar para la ocupación y para la expulsión
+        usuario.gimnasio.salir(usuario)
+
+        # Lo único que sobrevive a la visita es la satisfacción final (el Usuario se libera)
+        llegadas.satisfaccion[usuario.id] = usuario.satisfaccion
+
         # --- Lógica de Conversión ---
         if usuario.tipo_usuario == "Pase_Diario" and self.gestor_socios:
             sat = usuario.satisfaccion
-            umbrales = self.config.datos["probabilidades"]["conversion"]
+            params = self.config.parametros
             nuevo_plan = None
             
-            if sat >= umbrales["umbral_anual"]:
+            if sat >= params.umbral_conversion_anual:
                 nuevo_plan = "Anual"
-            elif sat >= umbrales["umbral_mensual"]:
+            elif sat >= params.umbral_conversion_mensual:
                 nuevo_plan = "Mensual"
             
             if nuevo_plan:
                 # CONVERTIR
-                print(f"      ✨ ¡NUEVA CONVERSIÓN! {usuario.nombre} (Sat: {sat}) -> Plan {nuevo_plan}")
-                admin_logs.log(f"Convierte a {nuevo_plan}", "CONVERSION")
+                admin_logs.evento(SESIONES, env.now, "CONVERSION", "      ✨ ¡NUEVA CONVERSIÓN! {} (Sat: {}) -> Plan {}",
+                                  usuario.nombre, sat, nuevo_plan)
+                if admin_logs.registrando: admin_logs.log(f"Convierte a {nuevo_plan}", "CONVERSION")
                 self.gestor_socios.convertir_pase_diario(usuario, nuevo_plan, usuario.dia_sesion) # Pasamos día como fecha aprox
             else:
-                print(f"      👋 {usuario.nombre} no se inscribe (Sat: {sat})")
+                admin_logs.evento(SESIONES, env.now, "SIN_CONVERSION", "      👋 {} no se inscribe (Sat: {})",
+                                  usuario.nombre, sat)
 
-    # --- MODIFICADO: AHORA RECIBE 'usuarios_programados' PARA EXPULSARLOS ---
-    def gestor_semanal(self, env, admin_logs, fecha_lunes, usuarios_programados):
-        for i, dia in enumerate(self.config.DIAS_SEMANA):
+    # --- EXPULSA AL CERRAR CADA SESIÓN A QUIEN SIGA DENTRO DEL GIMNASIO ---
+    def gestor_semanal(self, env, gimnasio, admin_logs, fecha_lunes):
+        params = self.config.parametros
+        for i, dia in enumerate(params.dias_semana):
             fecha_dia = fecha_lunes + timedelta(days=i)
-            fecha_str = fecha_dia.strftime("%d/%m/%Y")
-
-            print(f"\n      🌞 {dia.upper()} [{fecha_str}]")
-            print(f"      {'-' * 30}")
+            admin_logs.evento(SESIONES, env.now, "DIA", "\n      🌞 {} [{:%d/%m/%Y}]\n      {}",
+                              dia.upper(), fecha_dia, "-" * 30)
 
-            sesiones = self.config.obtener_sesiones_por_dia(dia)
+            sesiones = params.sesiones_por_dia[i]
             for s in range(1, sesiones + 1):
                 admin_logs.cambiar_sesion(dia, s)
 
-                hora_inicio = env.now
-                print(f"         🔔 [T={hora_inicio:.0f}] Inicio Sesión {s}")
+                admin_logs.evento(SESIONES, env.now, "INICIO_SESION", "         🔔 [T={:.0f}] Inicio Sesión {}",
+                                  env.now, s)
 
-                yield env.timeout(self.config.DURACION_SESION)
+                yield env.timeout(params.duracion_sesion)
 
-                hora_fin = env.now
-                print(f"         🔕 [T={hora_fin:.0f}] Fin Sesión {s}")
+                admin_logs.evento(SESIONES, env.now, "FIN_SESION", "         🔕 [T={:.0f}] Fin Sesión {} (dentro: {})",
+                                  env.now, s, gimnasio.ocupacion)
 
                 # --- LÓGICA DE EXPULSIÓN ---
-                # Buscamos a cualquiera cuyo proceso siga vivo
+                # Sólo se recorre a quien está dentro; cada uno sale del índice al terminar su proceso
                 expulsados = 0
-                for u in usuarios_programados:
-                    if u.process and u.process.is_alive:
-                        # Comprobamos que sea del día actual (para no interrumpir a gente de mañana)
-                        # Aunque 'process.is_alive' solo será true si ya ha llegado
+                for proceso in list(gimnasio.ocupantes.values()):
+                    if proceso.is_alive:
                         try:
-                            u.process.interrupt(cause="FIN_SESION")
+                            proceso.interrupt(cause="FIN_SESION")
                             expulsados += 1
                         except RuntimeError:
                             # Puede pasar si el proceso muere justo en este milisegundo
                             pass
 
                 if expulsados > 0:
-                    print(f"         🚨 Se expulsó a {expulsados} usuarios al cerrar la sesión.")
+                    admin_logs.evento(SESIONES, env.now, "EXPULSION",
+                                      "         🚨 Se expulsó a {} usuarios al cerrar la sesión.", expulsados)
 
-            restante = (self.config.MINUTOS_MAXIMOS_POR_DIA - sesiones * self.config.DURACION_SESION)
+            restante = (params.minutos_por_dia - sesiones * params.duracion_sesion)
             if restante > 0: yield env.timeout(restante)
\ No newline at end of file
@@ -0,0 +1,386 @@
+import heapq
+import simpy
+from simpy import Interrupt  # La misma excepción que captura el modelo con cualquiera de los dos motores
+
+URGENTE, NORMAL = 0, 1
+PENDIENTE = object()
+
+
+class Evento:
+    """
+    Evento del calendario. Mismo contrato que simpy.Event (callbacks, succeed, fail, value...),
+    con __slots__ y sin propiedades en el camino caliente.
+    """
+    __slots__ = ("env", "callbacks", "_value", "_ok", "_defused")
+
+    def __init__(self, env):
+        self.env = env
+        self.callbacks = []
+        self._value = PENDIENTE
+        self._ok = True
+        self._defused = False
+
+    @property
+    def triggered(self): return self._value is not PENDIENTE
+
+    @property
+    def processed(self): return self.callbacks is None
+
+    @property
+    def ok(self): return self._ok
+
+    @property
+    def value(self):
+        if self._value is PENDIENTE: raise AttributeError(f"Valor de {self} aún no disponible")
+        return self._value
+
+    def succeed(self, value=None):
+        if self._value is not PENDIENTE: raise RuntimeError(f"{self} ya se había disparado")
+        self._ok = True
+        self._value = value
+        self.env.schedule(self)
+        return self
+
+    def fail(self, exception):
+        if self._value is not PENDIENTE: raise RuntimeError(f"{self} ya se había disparado")
+        self._ok = False
+        self._value = exception
+        self.env.schedule(self)
+        return self
+
+
+class Espera(Evento):
+    """Timeout: se crea ya disparada y se programa con su retraso."""
+    __slots__ = ()
+
+    def __init__(self, env, valor):
+        self.env = env
+        self.callbacks = []
+        self._value = valor
+        self._ok = True
+        self._defused = False
+
+
+class Interrupcion(Evento):
+    """Lleva la Interrupt al proceso con prioridad urgente (como simpy.Interruption)."""
+    __slots__ = ("proceso",)
+
+    def __init__(self, proceso, causa):
+        env = proceso.env
+        self.env = env
+        self.callbacks = [self._interrumpir]
+        self._value = Interrupt(causa)
+        self._ok = False
+        self._defused = True
+        if proceso._value is not PENDIENTE:
+            raise RuntimeError(f"{proceso} ha terminado y no se puede interrumpir.")
+        if proceso is env._proceso_activo:
+            raise RuntimeError("Un proceso no puede interrumpirse a sí mismo.")
+        self.proceso = proceso
+        env.schedule(self, URGENTE)
+
+    def _interrumpir(self, evento):
+        proceso = self.proceso
+        if proceso._value is not PENDIENTE: return
+        # Cancelación: el proceso deja de esperar a su objetivo (si era una Espera, sigue en el
+        # calendario pero ya sin nadie a quien despertar)
+        proceso._target.callbacks.remove(proceso._reanudar)
+        proceso._resume(self)
+
+
+class Proceso(Evento):
+    """Proceso sobre un generador; se dispara (con el valor de retorno) al terminar."""
+    __slots__ = ("_generador", "_target", "_reanudar")
+
+    def __init__(self, env, generador):
+        if not hasattr(generador, "throw"): raise ValueError(f"{generador} no es un generador.")
+        self.env = env
+        self.callbacks = []
+        self._value = PENDIENTE
+        self._ok = True
+        self._defused = False
+        self._generador = generador
+        self._reanudar = self._resume  # Un único método ligado: se añade y se quita de los callbacks
+
+        inicio = Evento(env)
+        inicio.callbacks.append(self._reanudar)
+        inicio._value = None
+        env.schedule(inicio, URGENTE)
+        self._target = inicio
+
+    @property
+    def is_alive(self): return self._value is PENDIENTE
+
+    @property
+    def target(self): return self._target
+
+    def interrupt(self, cause=None):
+        Interrupcion(self, cause)
+
+    def _resume(self, evento):
+        env = self.env
+        env._proceso_activo = self
+        generador = self._generador
+        while True:
+            try:
+                if evento._ok:
+                    evento = generador.send(evento._value)
+                else:
+                    evento._defused = True
+                    error = evento._value
+                    exc = type(error)(*error.args)
+                    exc.__cause__ = error
+                    evento = generador.throw(exc)
+            except StopIteration as e:
+                evento = None
+                self._ok = True
+                self._value = e.args[0] if e.args else None
+                env.schedule(self)
+                break
+            except BaseException as e:
+                evento = None
+                self._ok = False
+                e.__traceback__ = e.__traceback__.tb_next
+                self._value = e
+                env.schedule(self)
+                break
+
+            try:
+                callbacks = evento.callbacks
+            except AttributeError:
+                raise RuntimeError(f'Valor cedido no válido "{evento}"') from None
+            if callbacks is not None:
+                callbacks.append(self._reanudar)
+                break
+            # Evento ya procesado: se continúa en el acto con su valor
+
+        self._target = evento
+        env._proceso_activo = None
+
+
+class TodosDe(Evento):
+    """Se dispara cuando se han disparado todos los eventos (simpy.AllOf)."""
+    __slots__ = ("_eventos", "_cuenta", "_comprobar")
+
+    def __init__(self, env, eventos):
+        Evento.__init__(self, env)
+        self._eventos = tuple(eventos)
+        self._cuenta = 0
+        if not self._eventos:
+            self.succeed([])
+            return
+        self._comprobar = self._check
+        for evento in self._eventos:
+            if evento.callbacks is None:
+                self._check(evento)
+            else:
+                evento.callbacks.append(self._comprobar)
+        self.callbacks.append(self._construir_valor)
+
+    def _check(self, evento):
+        if self._value is not PENDIENTE: return
+        self._cuenta += 1
+        if not evento._ok:
+            evento._defused = True
+            self.fail(evento._value)
+        elif self._cuenta == len(self._eventos):
+            self.succeed()
+
+    def _construir_valor(self, evento):
+        for e in self._eventos:
+            if e.callbacks and self._comprobar in e.callbacks: e.callbacks.remove(self._comprobar)
+        if evento._ok:
+            self._value = [e for e in self._eventos if e.callbacks is None]
+
+
+class Peticion(Evento):
+    """simpy.Request: se concede al entrar en 'users'; al salir del with se cancela y se libera."""
+    __slots__ = ("resource", "proc", "usage_since")
+
+    def __init__(self, recurso):
+        env = recurso._env
+        self.env = env
+        self.callbacks = [recurso._disparar_get]
+        self._value = PENDIENTE
+        self._ok = True
+        self._defused = False
+        self.resource = recurso
+        self.proc = env._proceso_activo
+        self.usage_since = None
+        recurso.put_queue.append(self)
+        recurso._trigger_put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_exc, exc, traza):
+        self.cancel()
+        if tipo_exc is not GeneratorExit: self.resource.release(self)
+        return None
+
+    def cancel(self):
+        if self._value is PENDIENTE: self.resource.put_queue.remove(self)
+
+
+class Liberacion(Evento):
+    """simpy.Release: saca la petición de 'users'; al procesarse, concede la siguiente de la cola."""
+    __slots__ = ("resource", "request", "proc")
+
+    def __init__(self, recurso, peticion):
+        env = recurso._env
+        self.request = peticion
+        self.env = env
+        self.callbacks = [recurso._disparar_put]
+        self._value = PENDIENTE
+        self._ok = True
+        self._defused = False
+        self.resource = recurso
+        self.proc = env._proceso_activo
+        recurso.get_queue.append(self)
+        recurso._trigger_get(None)
+
+
+class Recurso:
+    """
+    simpy.Resource con las mismas reglas de concesión: cada disparo sólo mira la primera petición
+    de la cola (o la primera liberación), y la siguiente petición se concede al procesarse la
+    liberación, no al pedirla. 'PutQueue' permite una cola propia (ColaMaquina).
+    """
+    PutQueue = list
+    GetQueue = list
+
+    def __init__(self, env, capacity=1):
+        if capacity <= 0: raise ValueError('"capacity" debe ser > 0.')
+        self._env = env
+        self.capacity = capacity
+        self.put_queue = self.PutQueue()
+        self.get_queue = self.GetQueue()
+        self.queue = self.put_queue
+        self.users = []
+        self._disparar_put = self._trigger_put
+        self._disparar_get = self._trigger_get
+
+    @property
+    def count(self): return len(self.users)
+
+    def request(self):
+        return Peticion(self)
+
+    def release(self, peticion):
+        return Liberacion(self, peticion)
+
+    def _trigger_put(self, _evento):
+        cola = self.put_queue
+        if cola and len(self.users) < self.capacity:
+            peticion = cola[0]
+            self.users.append(peticion)
+            peticion.usage_since = self._env.now
+            peticion.succeed()
+            cola.pop(0)
+
+    def _trigger_get(self, _evento):
+        cola = self.get_queue
+        if cola:
+            liberacion = cola[0]
+            try:
+                self.users.remove(liberacion.request)
+            except ValueError:
+                pass
+            liberacion.succeed()
+            cola.pop(0)
+
+
+class _Parada(Exception):
+    pass
+
+
+def _parar(evento):
+    raise _Parada()
+
+
+class Entorno:
+    """
+    Motor de eventos discretos propio, alternativo a simpy.Environment para este modelo.
+
+    Calendario en un montón binario de (tiempo, prioridad, id, evento), el mismo orden que SimPy:
+    con la misma semilla los eventos se procesan en el mismo orden y los KPIs son idénticos.
+    Lo que ahorra: __slots__, 'now' como atributo, sin clases ligadas ni propiedades en el camino
+    caliente, y las Espera (timeouts) entran al calendario sin pasar por schedule().
+    Las interrupciones siguen siendo simpy.Interrupt, así que el modelo no cambia.
+    """
+    def __init__(self, initial_time=0):
+        self.now = initial_time
+        self._cola = []
+        self._eid = 0
+        self._proceso_activo = None
+
+    @property
+    def active_process(self): return self._proceso_activo
+
+    def schedule(self, evento, priority=NORMAL, delay=0):
+        heapq.heappush(self._cola, (self.now + delay, priority, self._eid, evento))
+        self._eid += 1
+
+    def timeout(self, delay=0, value=None):
+        if delay < 0: raise ValueError(f"Retraso negativo {delay}")
+        espera = Espera(self, value)
+        heapq.heappush(self._cola, (self.now + delay, NORMAL, self._eid, espera))
+        self._eid += 1
+        return espera
+
+    def event(self):
+        return Evento(self)
+
+    def process(self, generator):
+        return Proceso(self, generator)
+
+    def all_of(self, events):
+        return TodosDe(self, events)
+
+    def peek(self):
+        return self._cola[0][0] if self._cola else float("inf")
+
+    def step(self):
+        if not self._cola: raise simpy.core.EmptySchedule()
+        self.now, _, _, evento = heapq.heappop(self._cola)
+        callbacks, evento.callbacks = evento.callbacks, None
+        for callback in callbacks: callback(evento)
+        if not evento._ok and not evento._defused: self._relanzar(evento)
+
+    @staticmethod
+    def _relanzar(evento):
+        exc = type(evento._value)(*evento._value.args)
+        exc.__cause__ = evento._value
+        raise exc
+
+    def run(self, until=None):
+        if until is not None:
+            if not isinstance(until, Evento):
+                en = until if isinstance(until, int) else float(until)
+                if en <= self.now: raise ValueError(f"until ({en}) debe ser posterior al tiempo actual")
+                until = Evento(self)
+                until._value = None
+                self.schedule(until, URGENTE, en - self.now)
+            elif until.callbacks is None:
+                return until._value
+            until.callbacks.append(_parar)
+
+        cola, heappop = self._cola, heapq.heappop
+        try:
+            while cola:
+                self.now, _, _, evento = heappop(cola)
+                callbacks, evento.callbacks = evento.callbacks, None
+                for callback in callbacks: callback(evento)
+                if not evento._ok and not evento._defused: self._relanzar(evento)
+        except _Parada:
+            return until._value
+        if until is not None:
+            raise RuntimeError(f'No quedan eventos pero "until" no se ha disparado: {until}')
+        return None
+
+
+def crear_entorno(motor="simpy"):
+    """Entorno de la semana: "simpy" (simpy.Environment) o "nucleo" (Entorno)."""
+    if motor == "nucleo": return Entorno()
+    if motor == "simpy": return simpy.Environment()
+    raise ValueError(f"Motor de eventos desconocido: {motor!r} (simpy o nucleo)")
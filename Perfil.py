@@ -2,8 +2,9 @@ import random
 
 
 class Perfil:
-    def __init__(self, tipo, energia=100, prob_descanso=0.1, **kwargs):
+    def __init__(self, tipo, energia=100, prob_descanso=0.1, rng=None, **kwargs):
         # Recibe datos del JSON: {"tipo": "...", "energia": 100, "prob_descanso": 0.2}
+        self.rng = rng or random  # Generador propio (ver GestorAleatorio); por defecto el global
         self.tipo = tipo
         self.energia = energia
         self.prob_descanso = prob_descanso
@@ -14,22 +15,22 @@ class Perfil:
     def decidir_descanso(self):
         """Devuelve Tru
         e si el usuario decide descansar en este turno."""
-        return random.random() < self.prob_descanso
+        return self.rng.random() < self.prob_descanso
 
     def decidir_preguntar_monitor(self):
         """Devuelve True si el usuario quiere buscar un monitor (ej: 5% de prob)."""
-        return random.random() < 0.05
+        return self.rng.random() < 0.05
 
 
 
 
     def tiempo_preparacion(self):
         """Tiempo en el vestuario al llegar."""
-        return random.randint(5, 10)
+        return self.rng.randint(5, 10)
 
     def tiempo_descanso(self):
         """Cuánto dura el descanso si decide tomarlo."""
-        return random.randint(2, 5)
+        return self.rng.randint(2, 5)
 
     def tiempo_busqueda_maquina(self):
         """Cuánto tiempo pierde buscando una máquina libre si todas están llenas."""
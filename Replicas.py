@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import random
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Config import Config
+from Estadistica import intervalo_confianza
+from SimulacionAnual import simular_anio
+from Loggers import SumideroNulo
+
+
+KPIS_MENSUALES = ["visitas", "altas", "bajas", "sat", "socios", "ingresos"]
+KPIS_ANUALES = ["visitas", "altas", "bajas", "sat_media", "ingresos"]
+
+
+def ejecutar_replica(ruta_config, indice, semilla_raiz, carpeta_replica, ruta_gym=None, antitetico=False):
+    """
+    Punto de entrada de cada proceso del pool: simula un año completo aislado.
+    Cada réplica deriva sus propios flujos aleatorios de (semilla raíz, índice), y tiene su
+    carpeta de logs y su propia base de socios, así que ninguna pisa los ficheros de otra.
+    'ruta_gym' permite sustituir el layout del gimnasio sin tocar el config.
+    """
+    cfg = Config(ruta_config, semilla=semilla_raiz, replica=indice, antitetico=antitetico)
+    if ruta_gym: cfg.datos["rutas"]["archivo_gym"] = ruta_gym
+    os.makedirs(carpeta_replica, exist_ok=True)
+    cfg.datos["rutas"]["carpeta_logs"] = carpeta_replica
+    cfg.datos["rutas"]["archivo_clientes"] = os.path.join(carpeta_replica, "datos_clientes.json")
+    # Réplicas, comparaciones y barridos no usan la caché de semanas: cada réplica es un año
+    # distinto (apenas habría aciertos) y los barridos ya guardan sus resultados por escenario
+    cfg.datos["cache_semanas"] = {"activa": False}
+
+    # La traza por consola de N réplicas en paralelo es ilegible: sin eventos (ni siquiera se
+    # formatean) y el resto de la salida, descartada. Tampoco hay checkpoints: una réplica no se reanuda
+    with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo):
+        informe = simular_anio(cfg, carpeta_replica, guardar_checkpoints=False, sumidero=SumideroNulo())
+
+    informe["antitetico"] = antitetico
+    return informe
+
+
+class EjecutorReplicas:
+    def __init__(self, ruta_config="config.json", n_replicas=10, semilla_raiz=None, procesos=None,
+                 carpeta_salida="replicas", nivel_confianza=0.95):
+        self.ruta_config = ruta_config
+        self.n_replicas = n_replicas
+        self.semilla_raiz = semilla_raiz if semilla_raiz is not None else random.SystemRandom().randrange(2 ** 63)
+        self.procesos = procesos or os.cpu_count() or 1
+        self.carpeta_salida = carpeta_salida
+        self.nivel_confianza = nivel_confianza
+
+    def _lanzar(self, pool, indices):
+        """Ejecuta un grupo de réplicas en el pool y devuelve sus informes."""
+        futuros = [
+            pool.submit(ejecutar_replica, self.ruta_config, i, self.semilla_raiz,
+                        os.path.join(self.carpeta_salida, f"replica_{i:03d}"))
+            for i in indices
+        ]
+        resultados = []
+        for futuro in as_completed(futuros):
+            informe = futuro.result()
+            resultados.append(informe)
+            g = informe["global"]
+            print(f"   ✅ Réplica {informe['replica']:03d}: Bajas {g['bajas']} | Sat {g['sat_media']} | "
+                  f"Ingresos {g['ingresos']} €")
+        return resultados
+
+    def ejecutar(self):
+        os.makedirs(self.carpeta_salida, exist_ok=True)
+        print(f"🎲 Lanzando {self.n_replicas} réplicas en {self.procesos} procesos (semilla raíz {self.semilla_raiz})")
+
+        with ProcessPoolExecutor(max_workers=self.procesos) as pool:
+            resultados = self._lanzar(pool, range(self.n_replicas))
+
+        resultados.sort(key=lambda r: r["replica"])
+        return self.combinar(resultados)
+
+    def ejecutar_hasta_precision(self, objetivos, max_replicas=200, max_segundos=None, min_replicas=3,
+                                 tamano_lote=None):
+        """
+        Regla de parada secuencial: lanza lotes de réplicas en paralelo hasta que el semiancho del
+        IC de cada KPI anual de 'objetivos' ({"bajas": 10, "sat_media": 0.5, "ingresos": 500})
+        sea menor o igual que su objetivo, o hasta agotar el presupuesto de réplicas o de tiempo.
+        """
+        desconocidos = set(objetivos) - set(KPIS_ANUALES)
+        if desconocidos:
+            raise ValueError(f"KPIs sin objetivo posible: {sorted(desconocidos)}. Usa: {KPIS_ANUALES}")
+
+        os.makedirs(self.carpeta_salida, exist_ok=True)
+        tamano_lote = tamano_lote or self.procesos
+        texto_objetivos = ", ".join(f"{k} ±{v}" for k, v in objetivos.items())
+        print(f"🎯 Réplicas hasta precisión [{texto_objetivos}] en lotes de {tamano_lote} "
+              f"(máx {max_replicas} réplicas" + (f", {max_segundos}s" if max_segundos else "") + ")")
+
+        inicio = time.monotonic()
+        resultados = []
+        motivo = None
+        with ProcessPoolExecutor(max_workers=self.procesos) as pool:
+            while motivo is None:
+                n = len(resultados)
+                lote = range(n, min(n + tamano_lote, max_replicas))
+                resultados.extend(self._lanzar(pool, lote))
+
+                semianchos = {kpi: intervalo_confianza([r["global"][kpi] for r in resultados],
+                                                       self.nivel_confianza)["semiancho"]
+                              for kpi in objetivos}
+                estado = " | ".join(f"{k} ±{v:.2f}/{objetivos[k]}" for k, v in semianchos.items())
+                print(f"   📏 {len(resultados)} réplicas: {estado}")
+
+                if len(resultados) >= min_replicas and all(semianchos[k] <= objetivos[k] for k in objetivos):
+                    motivo = "precision_alcanzada"
+                elif len(resultados) >= max_replicas:
+                    motivo = "presupuesto_replicas"
+                elif max_segundos is not None and time.monotonic() - inicio >= max_segundos:
+                    motivo = "presupuesto_tiempo"
+
+        print(f"🛑 Parada: {motivo} tras {len(resultados)} réplicas ({time.monotonic() - inicio:.0f}s)")
+        resultados.sort(key=lambda r: r["replica"])
+        return self.combinar(resultados, extra={"parada": {"motivo": motivo, "objetivos": objetivos,
+                                                           "semianchos": semianchos}})
+
+    def combinar(self, resultados, extra=None):
+        """Fusiona las réplicas en un único informe de medias e intervalos de confianza por mes."""
+        meses = []
+        for r in resultados:
+            for m in r["mensual"]:
+                if m["mes"] not in meses: meses.append(m["mes"])
+
+        mensual = []
+        for mes in meses:
+            filas = [m for r in resultados for m in r["mensual"] if m["mes"] == mes]
+            entrada = {"mes": mes}
+            for kpi in KPIS_MENSUALES:
+                entrada[kpi] = intervalo_confianza([f.get(kpi, 0) for f in filas], self.nivel_confianza)
+            mensual.append(entrada)
+
+        anual = {kpi: intervalo_confianza([r["global"].get(kpi, 0) for r in resultados], self.nivel_confianza)
+                 for kpi in KPIS_ANUALES}
+
+        informe = {
+            "replicas": len(resultados),
+            "semilla_raiz": self.semilla_raiz,
+            "nivel_confianza": self.nivel_confianza,
+            "global": anual,
+            "mensual": mensual
+        }
+        if extra: informe.update(extra)
+
+        ruta = os.path.join(self.carpeta_salida, "Reporte_REPLICAS.json")
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=4, ensure_ascii=False)
+
+        self.mostrar_resumen(informe)
+        print(f"📁 Informe combinado en: {ruta}")
+        return informe
+
+    @staticmethod
+    def mostrar_resumen(informe):
+        print("\n" + "=" * 70 + f"\n📊 RESUMEN DE {informe['replicas']} RÉPLICAS "
+              f"(IC {informe['nivel_confianza'] * 100:.0f}%)\n" + "=" * 70)
+        print("MES        | VISITAS        | BAJAS        | SAT          | SOCIOS")
+        print("-" * 70)
+        for m in informe["mensual"]:
+            print(f"{m['mes']:<10} | {m['visitas']['media']:7.1f} ±{m['visitas']['semiancho']:5.1f} | "
+                  f"{m['bajas']['media']:5.1f} ±{m['bajas']['semiancho']:4.1f} | "
+                  f"{m['sat']['media']:5.1f} ±{m['sat']['semiancho']:4.1f} | "
+                  f"{m['socios']['media']:6.1f} ±{m['socios']['semiancho']:4.1f}")
+        g = informe["global"]
+        print("-" * 70)
+        print(f"Bajas anuales: {g['bajas']['media']:.1f} ±{g['bajas']['semiancho']:.1f} | "
+              f"Sat media: {g['sat_media']['media']:.2f} ±{g['sat_media']['semiancho']:.2f} | "
+              f"Ingresos: {g['ingresos']['media']:.0f} ±{g['ingresos']['semiancho']:.0f} €")
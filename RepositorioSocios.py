@@ -0,0 +1,118 @@
+import os
+import json
+import sqlite3
+import numpy as np
+
+
+class RepositorioSocios:
+    """
+    Base de socios en un fichero SQLite local.
+
+    Cada guardado compara las columnas de la TablaSocios que cambian durante el año con lo último
+    que se escribió: inserta los socios nuevos y actualiza sólo los modificados, en una transacción.
+    'exportar_json' genera el datos_clientes.json de siempre a partir de la base.
+    """
+
+    COLUMNAS = ["id", "nombre", "genero", "tipo_usuario", "subtipo", "plan_pago", "mes_alta", "fecha_alta",
+                "rutina", "perfil", "satisfaccion_acumulada", "activo", "faltas_consecutivas",
+                "castigado_hasta_semana_absoluta", "fecha_baja"]
+    COLUMNAS_JSON = ("rutina", "perfil")
+    FIJAS = 10  # Las columnas a partir de aquí son las que cambian durante el año
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.conexion = None
+        # Lo último escrito de la TablaSocios: nº de filas y copia de las columnas que cambian
+        self.n_escritas = 0
+        self.variables = None
+
+    def _conectar(self):
+        if self.conexion is None:
+            carpeta = os.path.dirname(self.ruta)
+            if carpeta: os.makedirs(carpeta, exist_ok=True)
+            # Los guardados pueden llegar desde el hilo de EscritorAsincrono (siempre de uno en uno)
+            self.conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+            self.conexion.execute("PRAGMA journal_mode=WAL")
+            self.conexion.execute("PRAGMA synchronous=NORMAL")
+            self.conexion.execute("""
+                CREATE TABLE IF NOT EXISTS socios (
+                    id INTEGER PRIMARY KEY,
+                    nombre TEXT, genero TEXT, tipo_usuario TEXT, subtipo TEXT, plan_pago TEXT,
+                    mes_alta TEXT, fecha_alta TEXT, rutina TEXT, perfil TEXT,
+                    satisfaccion_acumulada INTEGER, activo INTEGER, faltas_consecutivas INTEGER,
+                    castigado_hasta_semana_absoluta INTEGER, fecha_baja TEXT
+                )""")
+            self.conexion.execute("CREATE INDEX IF NOT EXISTS idx_socios_activo ON socios(activo)")
+            self.conexion.execute("CREATE INDEX IF NOT EXISTS idx_socios_castigado "
+                                  "ON socios(castigado_hasta_semana_absoluta)")
+            self.conexion.commit()
+        return self.conexion
+
+    def reiniciar(self):
+        """Borra la base (nuevo año desde cero)."""
+        self.cerrar()
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(self.ruta + sufijo): os.remove(self.ruta + sufijo)
+        self.n_escritas = 0
+        self.variables = None
+
+    def cambios(self, tabla):
+        """
+        Socios (de una TablaSocios) nuevos o modificados desde el último guardado, ya convertidos
+        a filas: (nuevas, modificadas). Quedan marcados como escritos.
+        """
+        variables = [tabla.columna(c).copy() for c in self.COLUMNAS[self.FIJAS:]]
+        n_previas = self.n_escritas
+        modificadas = np.zeros(n_previas, dtype=bool)
+        if self.variables is not None:
+            for antes, ahora in zip(self.variables, variables):
+                modificadas |= antes != ahora[:n_previas]
+        self.variables = variables
+        self.n_escritas = len(tabla)
+
+        nuevas = [self._valores(tabla[i], self.COLUMNAS) for i in range(n_previas, len(tabla))]
+        # Las modificadas sólo actualizan lo que cambia (+ id para el WHERE)
+        filas_modificadas = [self._valores(tabla[i], self.COLUMNAS[self.FIJAS:] + ["id"])
+                             for i in np.flatnonzero(modificadas).tolist()]
+        return nuevas, filas_modificadas
+
+    def _valores(self, socio, columnas):
+        return tuple(json.dumps(socio[c], ensure_ascii=False) if c in self.COLUMNAS_JSON else
+                     int(socio[c]) if c == "activo" else socio[c] for c in columnas)
+
+    def escribir(self, cambios):
+        """Aplica el resultado de 'cambios' en una sola transacción."""
+        nuevas, modificadas = cambios
+        if not nuevas and not modificadas: return
+        marcas = ", ".join("?" * len(self.COLUMNAS))
+        actualizar = ", ".join(f"{c}=excluded.{c}" for c in self.COLUMNAS[1:])
+        conexion = self._conectar()
+        with conexion:
+            conexion.executemany(f"INSERT INTO socios ({', '.join(self.COLUMNAS)}) VALUES ({marcas}) "
+                                 f"ON CONFLICT(id) DO UPDATE SET {actualizar}", nuevas)
+            conexion.executemany(f"UPDATE socios SET {', '.join(f'{c}=?' for c in self.COLUMNAS[self.FIJAS:])} "
+                                 f"WHERE id=?", modificadas)
+
+    def guardar(self, socios):
+        self.escribir(self.cambios(socios))
+
+    def cargar(self):
+        cursor = self._conectar().execute(f"SELECT {', '.join(self.COLUMNAS)} FROM socios ORDER BY id")
+        socios = []
+        for fila in cursor:
+            socio = dict(zip(self.COLUMNAS, fila))
+            for c in self.COLUMNAS_JSON:
+                socio[c] = json.loads(socio[c]) if socio[c] is not None else None
+            socio["activo"] = bool(socio["activo"])
+            socios.append(socio)
+        return socios
+
+    def exportar_json(self, ruta_json):
+        """Vuelca la base al formato de datos_clientes.json."""
+        with open(ruta_json, "w", encoding="utf-8") as f:
+            json.dump(self.cargar(), f, indent=4, ensure_ascii=False)
+
+    def cerrar(self):
+        if self.conexion is not None:
+            self.conexion.close()
+            self.conexion = None
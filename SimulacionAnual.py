@@ -0,0 +1,292 @@
+import os
+from datetime import datetime, timedelta
+from Checkpoint import guardar_checkpoint
+from Facturacion import MotorFacturacion, sumar_desgloses
+from EscritorAsincrono import EscritorAsincrono
+from Loggers import AdministradorDeLogs, GeneradorReportes, crear_sumidero
+from GestorSocios import GestorSocios
+from MotorSimulacion import MotorSimulacion
+from Gimnasio import Gimnasio
+from NucleoEventos import crear_entorno
+from Traza import GrabadorTraza
+from CacheSemanas import CacheSemanas, LlegadasCacheadas, huella_config, huella_fichero, huella_fuentes
+
+
+def simular_anio(cfg, raiz_logs, checkpoint=None, guardar_checkpoints=True, sumidero=None, grabar_traza=None):
+    """
+    Ejecuta un año académico completo y devuelve sus KPIs.
+    Los ficheros de la ejecución se escriben bajo 'raiz_logs'.
+
+    Al final de cada semana se guarda un checkpoint en 'raiz_logs/checkpoints'. Pasando uno
+    ('checkpoint', ver Checkpoint.cargar_checkpoint) la simulación continúa justo después de esa
+    semana, con el estado aleatorio restaurado; si 'cfg' es distinto del original se obtiene
+    una rama del año a partir de ese punto.
+
+    Logs, reportes semanales, volcados de socios y checkpoints se escriben desde un hilo de E/S
+    (EscritorAsincrono), con una barrera de fsync a fin de cada mes y al terminar.
+
+    Los eventos de la simulación van a 'sumidero' (por defecto, el de 'verbosidad' y
+    'salida_eventos' del config; ver Loggers.crear_sumidero).
+
+    Con "cache_semanas" activa en el config (por defecto no; main.py --cache), las semanas ya
+    simuladas con las mismas entradas se leen de la caché (ver CacheSemanas) y sólo se recalculan
+    reportes, bajas y facturación.
+
+    Con 'grabar_traza' (ruta .npz) se graba además la demanda del año para reproducirla contra
+    otros layouts (ver Traza.reproducir_traza).
+    """
+    escritor = EscritorAsincrono()
+    if sumidero is None:
+        sumidero = crear_sumidero(cfg.parametros.verbosidad, cfg.parametros.salida_eventos)
+    gestor_socios = GestorSocios(cfg, escritor)
+    motor = MotorSimulacion(cfg, gestor_socios)
+    grabador = GrabadorTraza(grabar_traza, cfg) if grabar_traza else None
+
+    # Caché de semanas: no cuando la semana tiene que dejar su traza (logs detallados, eventos, grabación)
+    ajustes_cache = cfg.datos.get("cache_semanas", {})
+    cache = None
+    if (ajustes_cache.get("activa", False) and not grabador and not cfg.parametros.logs_detallados
+            and cfg.parametros.salida_eventos != "registros"):
+        cache = CacheSemanas(ajustes_cache.get("carpeta", "cache_semanas"), ajustes_cache.get("max_mb", 500))
+        huella_cfg = huella_config(cfg.datos)
+        huella_gym = huella_fichero(cfg.datos["rutas"]["archivo_gym"])
+
+    if checkpoint is None:
+        print(f"🎲 Semilla raíz: {cfg.aleatorio.semilla_raiz} (réplica {cfg.aleatorio.replica})")
+        socios_db = gestor_socios.inicializar_db()
+        fecha_actual = datetime(2023, 9, 4)
+        semana_absoluta = 0
+        total_bajas = 0
+        historico_global = []
+        # Balance Económico
+        total_acumulado = 0
+        ingresos_por_mes = {}
+        segmentos_por_mes = {}
+        idx_mes_reanudar, semana_reanudar = -1, 0
+    else:
+        cfg.aleatorio.restaurar(checkpoint["aleatorio"])
+        print(f"⏩ Reanudando tras la semana {checkpoint['semana_absoluta']} "
+              f"({checkpoint['mes']} S{checkpoint['semana_mes']}) | Semilla raíz: {cfg.aleatorio.semilla_raiz}")
+        socios_db = gestor_socios.restaurar_db(checkpoint["socios_db"])
+        fecha_actual = checkpoint["fecha_actual"]
+        semana_absoluta = checkpoint["semana_absoluta"]
+        total_bajas = checkpoint["total_bajas"]
+        historico_global = checkpoint["historico_global"]
+        total_acumulado = checkpoint["total_acumulado"]
+        ingresos_por_mes = checkpoint["ingresos_por_mes"]
+        segmentos_por_mes = checkpoint["segmentos_por_mes"]
+        idx_mes_reanudar, semana_reanudar = checkpoint["idx_mes"], checkpoint["semana_mes"]
+
+    # Tarifas ya compiladas en cfg.parametros
+    facturacion = MotorFacturacion(cfg.parametros)
+
+    # El gimnasio se carga y clasifica una sola vez; cada semana recibe un clon limpio
+    plantilla_gym = Gimnasio()
+    plantilla_gym.cargar_datos_json(cfg.datos["rutas"]["archivo_gym"])
+    motor.clasificar_maquinas(plantilla_gym)
+    conservar_averias = cfg.parametros.conservar_averias
+    disponibilidad_maquinas = checkpoint.get("disponibilidad_maquinas") if checkpoint else None
+
+    def guardar_semana(idx_mes, mes, semana_mes):
+        """Checkpoint al cerrar una semana: todo lo necesario para seguir desde aquí."""
+        # Los flujos de la semana no sobreviven a ella: el estado aleatorio queda en unos bytes
+        cfg.aleatorio.cerrar_semana()
+        if not guardar_checkpoints: return
+        guardar_checkpoint(os.path.join(raiz_logs, "checkpoints"), {
+            "idx_mes": idx_mes, "mes": mes, "semana_mes": semana_mes,
+            "semana_absoluta": semana_absoluta, "fecha_actual": fecha_actual,
+            "socios_db": socios_db, "historico_global": historico_global, "total_bajas": total_bajas,
+            "total_acumulado": total_acumulado, "ingresos_por_mes": ingresos_por_mes,
+            "segmentos_por_mes": segmentos_por_mes, "desglose_suscripciones": desglose_suscripciones,
+            "ingresos_suscripciones": ingresos_suscripciones, "ingresos_pases": ingresos_pases,
+            "altas_reales_este_mes": altas_reales_este_mes,
+            "disponibilidad_maquinas": disponibilidad_maquinas,
+            "aleatorio": cfg.aleatorio.estado()
+        }, escritor)
+
+    for idx_mes, mes_config in enumerate(cfg.CALENDARIO_ACADEMICO):
+        if idx_mes < idx_mes_reanudar: continue
+
+        mes = mes_config["mes"]
+        semanas = mes_config["semanas"]
+        peso = mes_config["peso_afluencia"]
+        abierto = mes_config["abierto"]
+        altas_objetivo = mes_config.get("nuevas_altas_aprox", 0)
+
+        if not abierto: continue
+
+        print(f"\n{'▀' * 60}")
+        print(f"📅  {mes.upper()}")
+        print(f"{'▄' * 60}")
+
+        carpeta_mes = f"{raiz_logs}/{mes}"
+        if not os.path.exists(carpeta_mes): os.makedirs(carpeta_mes)
+
+        primera_semana = 1
+        if idx_mes == idx_mes_reanudar:
+            # Mes a medias: los cobros y altas ya se hicieron antes del checkpoint
+            ingresos_suscripciones = checkpoint["ingresos_suscripciones"]
+            ingresos_pases = checkpoint["ingresos_pases"]
+            altas_reales_este_mes = checkpoint["altas_reales_este_mes"]
+            desglose_suscripciones = checkpoint["desglose_suscripciones"]
+            primera_semana = semana_reanudar + 1
+        else:
+            ingresos_pases = 0
+            ingresos_suscripciones, altas_reales_este_mes, socios_db, desglose_suscripciones = _cobros_y_altas(
+                facturacion, gestor_socios, socios_db, mes, altas_objetivo)
+
+        for s in range(primera_semana, semanas + 1):
+            semana_absoluta += 1
+            cfg.aleatorio.iniciar_semana(semana_absoluta)
+
+            fecha_fin_semana = fecha_actual + timedelta(days=6)
+            str_rango = f"Del {fecha_actual.strftime('%d/%m')} al {fecha_fin_semana.strftime('%d/%m')}"
+
+            es_vacaciones = False
+            motivo = ""
+
+            if mes == "Enero" and s == 1:
+                es_vacaciones = True; motivo = "REYES / AÑO NUEVO"
+            elif mes == "Abril" and s == 1:
+                es_vacaciones = True; motivo = "SEMANA SANTA"
+            elif mes == "Junio" and s == semanas:
+                es_vacaciones = True; motivo = "INICIO VERANO"
+            elif mes == "Diciembre" and s == semanas:
+                es_vacaciones = True; motivo = "NAVIDAD"
+
+            if es_vacaciones:
+                print(f"\n   🏖️  SEMANA {s} ({str_rango}): ⛔ CERRADO POR {motivo} ⛔")
+                fecha_actual += timedelta(weeks=1)
+                guardar_semana(idx_mes, mes, s)
+                continue
+
+            print(f"\n   ▶️  SEMANA {s} ({str_rango})")
+
+            carpeta_sem = f"{carpeta_mes}/Semana_{s}"
+            if not os.path.exists(carpeta_sem): os.makedirs(carpeta_sem)
+
+            # Misma config, gimnasio, socios, semana y código que una semana ya simulada: se reutiliza
+            clave, en_cache = None, None
+            if cache:
+                clave = cache.clave(huella_cfg, huella_gym, huella_fuentes(), socios_db.huella(),
+                                    cfg.aleatorio.estado(), fecha_actual, peso,
+                                    disponibilidad_maquinas if conservar_averias else None)
+                en_cache = cache.leer(clave)
+
+            try:
+                if en_cache:
+                    print("      ♻️  Semana en caché: no se vuelve a simular.")
+                    visitas, no_shows = en_cache["visitas"], en_cache["no_shows"]
+                    ocupacion_maxima = en_cache["ocupacion_maxima"]
+                    disponibilidad_maquinas = en_cache["disponibilidad_maquinas"]
+                    gestor_socios.conversiones_pendientes = en_cache["conversiones"]
+                    ingresos_pases += facturacion.cobrar_pases(visitas.pases_diarios)
+                else:
+                    env = crear_entorno(cfg.parametros.motor_eventos)
+                    admin_logs = AdministradorDeLogs(carpeta_sem, cfg.parametros.logs_detallados,
+                                                     escritor, sumidero)
+                    gym = plantilla_gym.nueva_semana(env, cfg.aleatorio,
+                                                     disponibilidad_maquinas if conservar_averias else None,
+                                                     admin_logs)
+                    gym.abrir_gimnasio()
+
+                    visitas, no_shows = motor.generar_flota_semanal(socios_db, semana_absoluta, peso)
+                    if grabador: grabador.grabar_semana(semana_absoluta, mes, s, fecha_actual, visitas, no_shows)
+
+                    # --- INGRESOS POR PASES DIARIOS ---
+                    pases_diarios = visitas.pases_diarios
+                    ingresos_pases += facturacion.cobrar_pases(pases_diarios)
+
+                    if not visitas and not no_shows:
+                        print("      ⚠️ Sin actividad registrada.")
+                    else:
+                        # Los Usuario se crean al llegar; el gestor expulsa a quien siga dentro
+                        env.process(motor.controlador_llegadas(env, gym, visitas, admin_logs))
+                        env.process(motor.gestor_semanal(env, gym, admin_logs, fecha_actual))
+                        env.run(until=cfg.parametros.tiempo_semanal)
+                    admin_logs.cerrar_semana()
+
+                    gym.cerrar_gimnasio()
+                    ocupacion_maxima = gym.ocupacion_maxima
+                    disponibilidad_maquinas = [m.disponibilidad for m in gym.maquinas]
+                    if cache:
+                        visitas = LlegadasCacheadas(visitas)
+                        cache.guardar(clave, {"visitas": visitas, "no_shows": no_shows,
+                                              "conversiones": gestor_socios.conversiones_pendientes,
+                                              "ocupacion_maxima": ocupacion_maxima,
+                                              "disponibilidad_maquinas": disponibilidad_maquinas})
+
+                gestor_socios.aplicar_conversiones(socios_db)
+
+                altas_para_reporte = altas_reales_este_mes if s == 1 else 0
+                resumen = GeneradorReportes.generar_conclusiones_semanales(
+                    visitas, no_shows, carpeta_sem, mes, s, semana_absoluta, socios_db, cfg, altas_para_reporte,
+                    escritor
+                )
+                resumen["ocupacion_maxima"] = ocupacion_maxima
+                gestor_socios.guardar_db(socios_db)
+                historico_global.append(resumen)
+                total_bajas += resumen["bajas"]
+
+            except Exception as e:
+                print(f"❌ Error crítico en semana {s}: {e}")
+                escritor.cerrar()
+                raise e
+
+            fecha_actual += timedelta(weeks=1)
+            guardar_semana(idx_mes, mes, s)
+
+        total_mes = ingresos_suscripciones + ingresos_pases
+        total_acumulado += total_mes
+        ingresos_por_mes[mes] = total_mes
+        segmentos_por_mes[mes] = dict(desglose_suscripciones)
+        if ingresos_pases: segmentos_por_mes[mes]["Pase_Diario"] = ingresos_pases
+        print(f"   💵 BALANCE {mes.upper()}: {total_mes} € (Acum: {total_acumulado} €)")
+        escritor.barrera(fsync=True)
+
+    gestor_socios.exportar_json()
+    escritor.cerrar()
+    if grabador: grabador.guardar()
+    if cache: print(f"♻️  Caché de semanas: {cache.aciertos} reutilizadas, {cache.fallos} simuladas")
+    informe = GeneradorReportes.generar_informe_anual(historico_global, raiz_logs)
+    print(f"\n🎓 AÑO ACADÉMICO FINALIZADO.")
+    print(f"   Bajas Totales: {total_bajas}")
+    print(f"   GANANCIAS TOTALES: {total_acumulado} €")
+    print(f"📁 Resultados completos en: {raiz_logs}")
+
+    # KPIs anuales para quien orqueste varias ejecuciones (réplicas, barridos...)
+    sat_media = sum(h["satisfaccion"] for h in historico_global) / len(historico_global) if historico_global else 0
+    for m in informe["mensual"]:
+        m["ingresos"] = ingresos_por_mes.get(m["mes"], 0)
+        m["ingresos_segmentos"] = segmentos_por_mes.get(m["mes"], {})
+    informe["global"]["sat_media"] = round(sat_media, 2)
+    informe["global"]["ingresos"] = total_acumulado
+    informe["semilla_raiz"] = cfg.aleatorio.semilla_raiz
+    informe["replica"] = cfg.aleatorio.replica
+    return informe
+
+
+def _cobros_y_altas(facturacion, gestor_socios, socios_db, mes, altas_objetivo):
+    """
+    Cobro de cuotas a principio de mes y alta (con su primera cuota) de los socios nuevos.
+    Devuelve también el desglose de ingresos por segmento ("Subtipo/Plan").
+    """
+    # --- CÁLCULO DE INGRESOS MENSUALES (SUSCRIPCIONES) ---
+    # 1. Cobrar a los socios existentes (Renovaciones anuales en Septiembre o Mensualidades)
+    print(f"   💰 Procesando cobros para {len(socios_db)} socios...")
+    ingresos_suscripciones, desglose = facturacion.cobrar_cuotas(socios_db, mes)
+
+    altas_reales_este_mes = 0
+    if altas_objetivo > 0:
+        len_antes = len(socios_db)
+        socios_db = gestor_socios.inyectar_nuevos(socios_db, altas_objetivo, mes)
+        altas_reales_este_mes = len(socios_db) - len_antes
+
+        # Cobrar primera cuota a los NUEVOS
+        ingresos_altas, desglose_altas = facturacion.cobrar_altas(socios_db, len_antes)
+        ingresos_suscripciones += ingresos_altas
+        desglose = sumar_desgloses(desglose, desglose_altas)
+
+    print(f"      + Ingresos Suscripciones: {ingresos_suscripciones} €")
+
+    return ingresos_suscripciones, altas_reales_este_mes, socios_db, desglose
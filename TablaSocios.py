@@ -0,0 +1,309 @@
+import json
+import hashlib
+import numpy as np
+from collections.abc import MutableMapping
+
+
+CAMPOS = ["id", "nombre", "genero", "tipo_usuario", "subtipo", "plan_pago", "mes_alta", "fecha_alta",
+          "rutina", "perfil", "satisfaccion_acumulada", "activo", "faltas_consecutivas",
+          "castigado_hasta_semana_absoluta", "fecha_baja"]
+
+
+class Categorias:
+    """Valores repetidos (subtipos, planes, meses, perfiles, pasos de rutina...) guardados una vez y referidos por código."""
+
+    def __init__(self):
+        self.valores = []
+        self.codigos = {}
+
+    @staticmethod
+    def _clave(valor):
+        if isinstance(valor, (dict, list)): return json.dumps(valor, sort_keys=True, ensure_ascii=False)
+        return valor
+
+    def codigo(self, valor):
+        clave = self._clave(valor)
+        c = self.codigos.get(clave)
+        if c is None:
+            c = self.codigos[clave] = len(self.valores)
+            self.valores.append(valor)
+        return c
+
+    def buscar(self, valor):
+        """Código de 'valor', o -1 si no aparece en la tabla."""
+        return self.codigos.get(self._clave(valor), -1)
+
+
+class FilaSocio(MutableMapping):
+    """
+    Vista tipo dict de un socio de la tabla: socio["satisfaccion_acumulada"], socio.get("activo", True),
+    socio["faltas_consecutivas"] += 1... leen y escriben directamente en las columnas.
+    La rutina y el perfil que devuelve son plantillas compartidas: no se deben modificar.
+    """
+    __slots__ = ("tabla", "i")
+
+    def __init__(self, tabla, i):
+        self.tabla = tabla
+        self.i = i
+
+    def __getitem__(self, campo):
+        return self.tabla.leer(self.i, campo)
+
+    def __setitem__(self, campo, valor):
+        self.tabla.escribir(self.i, campo, valor)
+
+    def __delitem__(self, campo):
+        raise TypeError("Los socios de la tabla no pueden perder campos")
+
+    def __iter__(self):
+        return iter(CAMPOS)
+
+    def __len__(self):
+        return len(CAMPOS)
+
+    def __repr__(self):
+        return f"<FilaSocio {dict(self)}>"
+
+
+class TablaSocios:
+    """
+    Base de socios en columnas: arrays de NumPy para lo que se consulta cada semana (id, activo,
+    satisfacción, faltas, castigo y los códigos de subtipo, plan, mes de alta...) y catálogos de
+    valores compartidos para lo repetido; cada rutina es un tramo de códigos de paso.
+    Los nombres generados ("Nombre Apellido-id") se guardan como dos códigos y se componen al
+    leerlos; sólo los nombres sueltos (conversiones) se guardan tal cual.
+
+    Se comporta como la lista de dicts de antes (len, iteración, tabla[i], tabla[-1]["id"],
+    extend con dicts), y además expone las columnas para operar con máscaras.
+    """
+
+    NUMERICAS = {"id": np.int64, "satisfaccion_acumulada": np.float64, "activo": np.bool_,
+                 "faltas_consecutivas": np.int64, "castigado_hasta_semana_absoluta": np.int64}
+    CATEGORICAS = ["genero", "tipo_usuario", "subtipo", "plan_pago", "mes_alta", "fecha_alta", "perfil",
+                   "fecha_baja"]
+
+    def __init__(self, capacidad=1024):
+        self.n = 0
+        self.capacidad = capacidad
+        self._num = {c: np.zeros(capacidad, dtype=t) for c, t in self.NUMERICAS.items()}
+        self._cod = {c: np.zeros(capacidad, dtype=np.int32) for c in self.CATEGORICAS}
+        self.categorias = {c: Categorias() for c in self.CATEGORICAS}
+        # Nombre = f"{nombre_pila} {apellido}-{id}" salvo los de 'nombres_sueltos' (fila -> nombre)
+        self.partes_nombre = Categorias()
+        self._nombre_pila = np.zeros(capacidad, dtype=np.int16)
+        self._apellido = np.zeros(capacidad, dtype=np.int16)
+        self.nombres_sueltos = {}
+        # Rutinas: tramo [inicio, inicio + largo) de 'pasos_rutina' (códigos de self.pasos)
+        self.pasos = Categorias()
+        self._inicio_rutina = np.zeros(capacidad, dtype=np.int64)
+        self._largo_rutina = np.zeros(capacidad, dtype=np.int16)
+        self._pasos_rutina = np.zeros(capacidad * 6, dtype=np.int16)
+        self._n_pasos = 0
+
+    @classmethod
+    def desde_dicts(cls, socios):
+        tabla = cls(capacidad=max(1024, len(socios)))
+        tabla.extend(socios)
+        return tabla
+
+    # --- Columnas (vistas sobre los socios existentes) ---
+    def columna(self, campo):
+        if campo in self._num: return self._num[campo][:self.n]
+        return self._cod[campo][:self.n]
+
+    @property
+    def id(self): return self._num["id"][:self.n]
+
+    @property
+    def activo(self): return self._num["activo"][:self.n]
+
+    @property
+    def satisfaccion(self): return self._num["satisfaccion_acumulada"][:self.n]
+
+    @property
+    def faltas(self): return self._num["faltas_consecutivas"][:self.n]
+
+    @property
+    def castigo(self): return self._num["castigado_hasta_semana_absoluta"][:self.n]
+
+    def indices_permitidos(self, semana_absoluta):
+        """Socios activos y sin castigo vigente esa semana (en el orden de la tabla)."""
+        return np.flatnonzero(self.activo & (self.castigo <= semana_absoluta))
+
+    def filas_de(self, ids):
+        """Filas de los socios con esos ids; los ids que no son de socios (p. ej. pases) se descartan."""
+        ids = np.asarray(ids, dtype=np.int64)
+        # Los ids se asignan crecientes, así que la columna está ordenada
+        filas = np.searchsorted(self.id, ids)
+        validos = filas < self.n
+        validos[validos] = self.id[filas[validos]] == ids[validos]
+        return filas[validos], validos
+
+    def asignar(self, campo, filas, valor):
+        """Pone el mismo valor a varias filas (columna numérica o categórica)."""
+        if campo in self._num:
+            self._num[campo][filas] = valor
+        else:
+            self._cod[campo][filas] = self.categorias[campo].codigo(valor)
+
+    def mapa_categorias(self, campo, funcion, dtype=np.int64):
+        """Array con funcion(valor) para cada código de la columna categórica 'campo'."""
+        return np.array([funcion(v) for v in self.categorias[campo].valores], dtype=dtype)
+
+    # --- Altas ---
+    def _reservar(self, extra, extra_pasos):
+        if self.n + extra > self.capacidad:
+            nueva = max(self.capacidad * 2, self.n + extra)
+            for columnas in (self._num, self._cod):
+                for c, arr in columnas.items():
+                    columnas[c] = np.resize(arr, nueva)
+            for attr in ("_inicio_rutina", "_largo_rutina", "_nombre_pila", "_apellido"):
+                setattr(self, attr, np.resize(getattr(self, attr), nueva))
+            self.capacidad = nueva
+        if self._n_pasos + extra_pasos > len(self._pasos_rutina):
+            self._pasos_rutina = np.resize(self._pasos_rutina, max(len(self._pasos_rutina) * 2,
+                                                                   self._n_pasos + extra_pasos))
+
+    def append(self, socio):
+        self.extend([socio])
+
+    def extend(self, socios):
+        if isinstance(socios, TablaSocios):
+            self._extend_tabla(socios)
+            return
+        socios = list(socios)
+        self._reservar(len(socios), sum(len(s["rutina"]) for s in socios))
+        for s in socios:
+            i = self.n
+            self.n += 1
+            for c in self.NUMERICAS:
+                self._num[c][i] = s.get(c, 0) if c != "activo" else s.get("activo", True)
+            for c in self.CATEGORICAS:
+                self._cod[c][i] = self.categorias[c].codigo(s.get(c))
+            self.nombres_sueltos[i] = s["nombre"]
+            self._guardar_rutina(i, s["rutina"])
+
+    def anadir_lote(self, numericas, categoricas, nombres, rutinas):
+        """
+        Alta en bloque de socios ya generados como arrays.
+        - numericas: {campo: array}
+        - categoricas: {campo: (códigos, valores)}, códigos que indexan la lista 'valores'
+        - nombres: (códigos de nombre de pila, códigos de apellido, valores)
+        - rutinas: (largo de cada rutina, códigos de todos los pasos seguidos, valores de los pasos)
+        """
+        largos, codigos_pasos, valores_pasos = rutinas
+        n_lote = len(largos)
+        self._reservar(n_lote, len(codigos_pasos))
+        i0, i1 = self.n, self.n + n_lote
+
+        for c in self.NUMERICAS:
+            self._num[c][i0:i1] = numericas[c]
+        for c in self.CATEGORICAS:
+            codigos, valores = categoricas[c]
+            self._cod[c][i0:i1] = self._traducir(self.categorias[c], valores)[codigos]
+
+        pila, apellido, valores = nombres
+        traduccion = self._traducir(self.partes_nombre, valores)
+        self._nombre_pila[i0:i1] = traduccion[pila]
+        self._apellido[i0:i1] = traduccion[apellido]
+
+        self._largo_rutina[i0:i1] = largos
+        self._inicio_rutina[i0:i1] = self._n_pasos + np.cumsum(largos) - largos
+        self._pasos_rutina[self._n_pasos:self._n_pasos + len(codigos_pasos)] = \
+            self._traducir(self.pasos, valores_pasos)[codigos_pasos]
+        self._n_pasos += len(codigos_pasos)
+        self.n = i1
+
+    @staticmethod
+    def _traducir(categorias, valores):
+        """Códigos de esta tabla para una lista de valores (para reindexar códigos de otro catálogo)."""
+        return np.array([categorias.codigo(v) for v in valores], dtype=np.int64).reshape(len(valores))
+
+    def _extend_tabla(self, otra):
+        n0 = self.n
+        largos = otra._largo_rutina[:otra.n]
+        # Pasos de cada rutina de 'otra', en orden (sus tramos pueden no estar seguidos)
+        desplazamiento = np.repeat(otra._inicio_rutina[:otra.n] - (np.cumsum(largos) - largos), largos)
+        pasos = otra._pasos_rutina[np.arange(int(largos.sum())) + desplazamiento]
+        self.anadir_lote(
+            {c: otra.columna(c) for c in self.NUMERICAS},
+            {c: (otra.columna(c), otra.categorias[c].valores) for c in self.CATEGORICAS},
+            (otra._nombre_pila[:otra.n], otra._apellido[:otra.n], otra.partes_nombre.valores),
+            (largos, pasos, otra.pasos.valores))
+        for i, nombre in otra.nombres_sueltos.items():
+            self.nombres_sueltos[n0 + i] = nombre
+
+    def _guardar_rutina(self, i, rutina):
+        codigos = [self.pasos.codigo(paso) for paso in rutina]
+        self._inicio_rutina[i] = self._n_pasos
+        self._largo_rutina[i] = len(codigos)
+        self._pasos_rutina[self._n_pasos:self._n_pasos + len(codigos)] = codigos
+        self._n_pasos += len(codigos)
+
+    # --- Acceso por fila ---
+    def rutina(self, i):
+        inicio = self._inicio_rutina[i]
+        return [self.pasos.valores[c] for c in self._pasos_rutina[inicio:inicio + self._largo_rutina[i]].tolist()]
+
+    def nombre(self, i):
+        suelto = self.nombres_sueltos.get(i)
+        if suelto is not None: return suelto
+        partes = self.partes_nombre.valores
+        return f"{partes[self._nombre_pila[i]]} {partes[self._apellido[i]]}-{self._num['id'][i]}"
+
+    def leer(self, i, campo):
+        if campo in self._num:
+            valor = self._num[campo][i].item()
+            if campo == "satisfaccion_acumulada" and valor.is_integer(): return int(valor)
+            return valor
+        if campo in self._cod:
+            return self.categorias[campo].valores[self._cod[campo][i]]
+        if campo == "nombre": return self.nombre(i)
+        if campo == "rutina": return self.rutina(i)
+        raise KeyError(campo)
+
+    def escribir(self, i, campo, valor):
+        if campo in self._num:
+            self._num[campo][i] = valor
+        elif campo in self._cod:
+            self._cod[campo][i] = self.categorias[campo].codigo(valor)
+        elif campo == "nombre":
+            self.nombres_sueltos[i] = valor
+        elif campo == "rutina":
+            # Una rutina nueva va al final (la vieja queda sin referencia)
+            self._reservar(0, len(valor))
+            self._guardar_rutina(i, valor)
+        else:
+            raise KeyError(campo)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [FilaSocio(self, j) for j in range(*i.indices(self.n))]
+        if i < 0: i += self.n
+        if not 0 <= i < self.n: raise IndexError(i)
+        return FilaSocio(self, i)
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield FilaSocio(self, i)
+
+    def a_dicts(self):
+        return [dict(fila) for fila in self]
+
+    def huella(self):
+        """Hash del contenido (columnas, catálogos, nombres y rutinas): mismo contenido, misma huella."""
+        h = hashlib.sha256(str(self.n).encode("utf-8"))
+        for columnas in (self._num, self._cod):
+            for c, arr in columnas.items():
+                h.update(c.encode("utf-8"))
+                h.update(arr[:self.n].tobytes())
+        for arr in (self._nombre_pila, self._apellido, self._inicio_rutina, self._largo_rutina):
+            h.update(arr[:self.n].tobytes())
+        h.update(self._pasos_rutina[:self._n_pasos].tobytes())
+        catalogos = [self.categorias[c].valores for c in self.CATEGORICAS]
+        catalogos += [self.partes_nombre.valores, self.pasos.valores, sorted(self.nombres_sueltos.items())]
+        h.update(json.dumps(catalogos, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return h.hexdigest()
@@ -0,0 +1,242 @@
+import os
+import json
+import numpy as np
+from datetime import datetime
+from Config import Config
+from Gimnasio import Gimnasio
+from GestorSocios import PerfilGenerado
+from Loggers import AdministradorDeLogs, SumideroNulo
+from MotorSimulacion import MotorSimulacion
+from NucleoEventos import crear_entorno
+from TablaSocios import Categorias
+from usuario import Usuario
+
+VERSION_TRAZA = 1
+
+
+class PerfilTraza:
+    """
+    Perfil que repite las decisiones grabadas de una visita: paciencia, preparación y, por cada paso
+    de la rutina, descanso (minutos, 0 = no descansa) y consulta al monitor. Se consumen en el mismo
+    orden en que Usuario.entrenar pide las de PerfilGenerado.
+    """
+
+    def __init__(self, paciencia, preparacion, descansos, monitores):
+        self.paciencia_maxima = paciencia
+        self.energia = None
+        self.prob_descanso = None
+        self._preparacion = preparacion
+        self._descansos = descansos
+        self._monitores = monitores
+        self._paso_descanso = 0
+        self._paso_monitor = 0
+        self._minutos_descanso = 0
+
+    def tiempo_preparacion(self): return self._preparacion
+
+    def decidir_descanso(self):
+        self._minutos_descanso = self._descansos[self._paso_descanso]
+        self._paso_descanso += 1
+        return self._minutos_descanso > 0
+
+    def tiempo_descanso(self): return self._minutos_descanso
+
+    def decidir_preguntar_monitor(self):
+        decision = self._monitores[self._paso_monitor]
+        self._paso_monitor += 1
+        return decision
+
+
+class GrabadorTraza:
+    """
+    Graba la demanda de un año (lo que no depende del layout del gimnasio) en un .npz comprimido:
+    semanas, visitas (llegada, salida, quién, satisfacción al llegar), rutinas, las decisiones de
+    descanso/monitor de cada paso ya tiradas con el flujo de la visita, y los no-shows.
+    """
+    DTYPE_SEMANA = np.dtype([("semana_absoluta", "i2"), ("mes", "i1"), ("semana_mes", "i1"), ("lunes", "i4")])
+    DTYPE_VISITA = np.dtype([("semana", "i2"), ("llegada", "f8"), ("hora_fin", "f8"), ("id", "i8"),
+                             ("pase", "?"), ("nombre", "i4"), ("subtipo", "i1"), ("plan", "i1"),
+                             ("satisfaccion", "f8"), ("faltas", "i2"), ("paciencia", "i1"),
+                             ("preparacion", "i1"), ("primer_paso", "i8"), ("n_pasos", "i1")])
+    DTYPE_PASO = np.dtype([("tipo", "i1"), ("tiempo", "i2"), ("descanso", "i1"), ("monitor", "?")])
+    DTYPE_NO_SHOW = np.dtype([("semana", "i2"), ("id", "i8")])
+
+    def __init__(self, ruta, cfg):
+        self.ruta = ruta
+        self.cfg = cfg
+        self.catalogos = {c: Categorias() for c in ("nombre", "subtipo", "plan", "tipo", "mes")}
+        self.semanas, self.visitas, self.pasos, self.no_shows = [], [], [], []
+
+    def grabar_semana(self, semana_absoluta, mes, semana_mes, fecha_lunes, llegadas, no_shows):
+        """Llamar justo después de generar_flota_semanal (antes de simular la semana)."""
+        k = len(self.semanas)
+        self.semanas.append((semana_absoluta, self.catalogos["mes"].codigo(mes), semana_mes,
+                             fecha_lunes.toordinal()))
+        self.no_shows.extend((k, i) for i in no_shows)
+
+        cat = self.catalogos
+        for registro in llegadas.registros:
+            rng = self.cfg.aleatorio.crear_flujo(int(registro["semilla"]))
+            if registro["socio"] >= 0:
+                dato = llegadas.socios[int(registro["socio"])]
+                nombre, subtipo, plan = dato["nombre"], dato.get("subtipo", "Estudiante"), dato.get("plan_pago", "Mensual")
+                rutina, perfil = dato["rutina"], PerfilGenerado(dato["perfil"], rng)
+                satisfaccion, faltas = dato.get("satisfaccion_acumulada", 100), dato["faltas_consecutivas"]
+            else:
+                nombre, subtipo, plan = f"Visitante-{registro['visitante']}", "Visitante", "Diario"
+                rutina, perfil = MotorSimulacion.RUTINA_PASE, PerfilGenerado(MotorSimulacion.PERFIL_PASE, rng)
+                satisfaccion, faltas = 100, 0
+
+            # Las mismas tiradas, en el mismo orden, que hará el Usuario en la simulación
+            preparacion = perfil.tiempo_preparacion()
+            primer_paso = len(self.pasos)
+            for paso in rutina:
+                descanso = perfil.tiempo_descanso() if perfil.decidir_descanso() else 0
+                self.pasos.append((cat["tipo"].codigo(paso["tipo_maquina_deseada"]), paso["tiempo_uso"],
+                                   descanso, perfil.decidir_preguntar_monitor()))
+            self.visitas.append((k, registro["llegada"], registro["hora_fin"], registro["id"], registro["socio"] < 0,
+                                 cat["nombre"].codigo(nombre), cat["subtipo"].codigo(subtipo), cat["plan"].codigo(plan),
+                                 satisfaccion, faltas, perfil.paciencia_maxima, preparacion, primer_paso, len(rutina)))
+
+    def guardar(self):
+        carpeta = os.path.dirname(self.ruta)
+        if carpeta: os.makedirs(carpeta, exist_ok=True)
+        aleatorio = self.cfg.aleatorio
+        meta = {"version": VERSION_TRAZA, "semilla_raiz": aleatorio.semilla_raiz, "replica": aleatorio.replica,
+                "antitetico": aleatorio.antitetico}
+        np.savez_compressed(
+            self.ruta, meta=np.array(json.dumps(meta)),
+            semanas=np.array(self.semanas, dtype=self.DTYPE_SEMANA),
+            visitas=np.array(self.visitas, dtype=self.DTYPE_VISITA),
+            pasos=np.array(self.pasos, dtype=self.DTYPE_PASO),
+            no_shows=np.array(self.no_shows, dtype=self.DTYPE_NO_SHOW),
+            **{f"catalogo_{c}": np.array(cat.valores, dtype=str) for c, cat in self.catalogos.items()})
+        print(f"🎞️  Traza de demanda: {len(self.visitas)} visitas en {len(self.semanas)} semanas -> {self.ruta}")
+
+
+class LlegadasTraza:
+    """Visitas de una semana de la traza, con lo que el motor usa de LlegadasSemana."""
+
+    def __init__(self, traza, desde, hasta):
+        self.traza = traza
+        self.desde = desde
+        self.registros = traza.visitas[desde:hasta]
+        self.satisfaccion = {}
+
+    def __len__(self):
+        return len(self.registros)
+
+    @property
+    def pases_diarios(self):
+        return int(np.count_nonzero(self.registros["pase"]))
+
+    def materializar(self, env, gimnasio, parametros, i):
+        """Usuario de la visita i con sus decisiones grabadas."""
+        t = self.traza
+        v = self.registros[i]
+        a = int(v["primer_paso"])
+        pasos = t.pasos[a:a + int(v["n_pasos"])]
+        u = Usuario(
+            id_usuario=int(v["id"]), nombre=t.nombres[v["nombre"]],
+            tipo_usuario="Pase_Diario" if v["pase"] else "Socio",
+            subtipo=t.subtipos[v["subtipo"]], plan_pago=t.planes[v["plan"]],
+            tiempo_llegada=float(v["llegada"]), hora_fin=float(v["hora_fin"]),
+            rutina=[t.paso(tipo, tiempo) for tipo, tiempo in zip(pasos["tipo"].tolist(), pasos["tiempo"].tolist())],
+            perfil=PerfilTraza(int(v["paciencia"]), int(v["preparacion"]), pasos["descanso"].tolist(),
+                               pasos["monitor"].tolist()),
+            problema=None, config=parametros, env=env, gimnasio=gimnasio, faltas_consecutivas=int(v["faltas"]))
+        u.satisfaccion = v["satisfaccion"].item()
+        if u.satisfaccion.is_integer(): u.satisfaccion = int(u.satisfaccion)
+        return u
+
+
+class TrazaDemanda:
+    """Traza grabada por GrabadorTraza."""
+
+    def __init__(self, ruta):
+        with np.load(ruta) as datos:
+            self.meta = json.loads(str(datos["meta"]))
+            if self.meta.get("version") != VERSION_TRAZA:
+                raise ValueError(f"Traza {ruta} con versión {self.meta.get('version')} no soportada "
+                                 f"(se esperaba {VERSION_TRAZA}).")
+            self.semanas = datos["semanas"]
+            self.visitas = datos["visitas"]
+            self.pasos = datos["pasos"]
+            self.no_shows = datos["no_shows"]
+            self.nombres, self.subtipos, self.planes, self.tipos, self.meses = (
+                datos[f"catalogo_{c}"].tolist() for c in ("nombre", "subtipo", "plan", "tipo", "mes"))
+        self.inicio_semanas = np.searchsorted(self.visitas["semana"], np.arange(len(self.semanas) + 1))
+        self._pasos = {}
+
+    def paso(self, tipo, tiempo):
+        """Plantilla compartida de un paso de rutina."""
+        clave = (tipo, tiempo)
+        paso = self._pasos.get(clave)
+        if paso is None:
+            paso = self._pasos[clave] = {"tipo_maquina_deseada": self.tipos[tipo], "tiempo_uso": tiempo}
+        return paso
+
+    def llegadas(self, k):
+        return LlegadasTraza(self, int(self.inicio_semanas[k]), int(self.inicio_semanas[k + 1]))
+
+    def n_no_shows(self, k):
+        return int(np.count_nonzero(self.no_shows["semana"] == k))
+
+
+def reproducir_traza(ruta_traza, ruta_gym=None, ruta_config="config.json", carpeta=None):
+    """
+    Simula la demanda grabada contra un layout: sin generar socios, llegadas ni decisiones, y con
+    los mismos flujos de máquinas y monitores (misma semilla raíz y semanas), así que dos layouts
+    reproducidos con la misma traza quedan exactamente emparejados.
+    La demanda es la grabada: no hay bajas, altas ni conversiones que dependan del nuevo layout.
+    Devuelve {"global": {...}, "semanal": [...]}.
+    """
+    traza = TrazaDemanda(ruta_traza)
+    cfg = Config(ruta_config, semilla=traza.meta["semilla_raiz"], replica=traza.meta["replica"],
+                 antitetico=traza.meta["antitetico"])
+    params = cfg.parametros
+    ruta_gym = ruta_gym or cfg.datos["rutas"]["archivo_gym"]
+    motor = MotorSimulacion(cfg)  # Sin gestor de socios: sin conversiones
+
+    plantilla_gym = Gimnasio()
+    plantilla_gym.cargar_datos_json(ruta_gym)
+    motor.clasificar_maquinas(plantilla_gym)
+    sumidero = SumideroNulo()
+    disponibilidad = None
+
+    print(f"🎞️  Reproduciendo {len(traza.visitas)} visitas de {ruta_traza} contra '{ruta_gym}'")
+    semanal = []
+    for k, semana in enumerate(traza.semanas):
+        cfg.aleatorio.iniciar_semana(int(semana["semana_absoluta"]))
+        env = crear_entorno(params.motor_eventos)
+        admin_logs = AdministradorDeLogs(carpeta or "", False, None, sumidero)
+        gym = plantilla_gym.nueva_semana(env, cfg.aleatorio, disponibilidad if params.conservar_averias else None,
+                                         admin_logs)
+        llegadas = traza.llegadas(k)
+        if len(llegadas) or traza.n_no_shows(k):
+            env.process(motor.controlador_llegadas(env, gym, llegadas, admin_logs))
+            env.process(motor.gestor_semanal(env, gym, admin_logs, datetime.fromordinal(int(semana["lunes"]))))
+            env.run(until=params.tiempo_semanal)
+        admin_logs.cerrar_semana()
+        disponibilidad = [m.disponibilidad for m in gym.maquinas]
+        cfg.aleatorio.cerrar_semana()
+
+        valores = llegadas.satisfaccion.values()
+        semanal.append({"mes": traza.meses[semana["mes"]], "semana": int(semana["semana_mes"]),
+                        "visitas": len(llegadas),
+                        "sat_media": round(sum(valores) / len(valores), 2) if valores else 0,
+                        "ocupacion_maxima": gym.ocupacion_maxima})
+
+    con_visitas = [s for s in semanal if s["visitas"]]
+    informe = {"traza": ruta_traza, "gimnasio": ruta_gym, "global": {
+        "visitas": sum(s["visitas"] for s in semanal),
+        "sat_media": round(sum(s["sat_media"] for s in con_visitas) / len(con_visitas), 2) if con_visitas else 0,
+        "ocupacion_maxima": max((s["ocupacion_maxima"] for s in semanal), default=0)}, "semanal": semanal}
+    g = informe["global"]
+    print(f"   ✅ Visitas {g['visitas']} | Sat media {g['sat_media']} | Ocupación máx. {g['ocupacion_maxima']}")
+
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+        with open(os.path.join(carpeta, "Reporte_REPRODUCCION.json"), "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=4, ensure_ascii=False)
+    return informe
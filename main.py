@@ -1,12 +1,12 @@
-import simpy
 import os
-import shutil
-from datetime import datetime, timedelta
+import argparse
 from Config import Config
-from Loggers import AdministradorDeLogs, GeneradorReportes
-from GestorSocios import GestorSocios
-from MotorSimulacion import MotorSimulacion
-from Gimnasio import Gimnasio
+from Checkpoint import cargar_checkpoint
+from SimulacionAnual import simular_anio
+from Replicas import EjecutorReplicas
+from Comparacion import ComparadorEscenarios
+from Traza import reproducir_traza
+from Barrido import DefinicionBarrido, EjecutorBarrido
 
 
 def obtener_nombre_carpeta_unica(base_nombre):
@@ -18,179 +18,120 @@ def obtener_nombre_carpeta_unica(base_nombre):
         contador += 1
 
 
-def main():
+def main(ruta_config="config.json", semilla=None, replica=0, reanudar=None, grabar_traza=None, cache=False):
     print("\n🚀 INICIANDO SIMULACIÓN ANUAL (MODULARIZADO)")
     print("=" * 60)
 
-    cfg = Config()
+    cfg = Config(ruta_config, semilla, replica)
 
     raiz_logs = obtener_nombre_carpeta_unica(cfg.datos["rutas"]["carpeta_logs"])
     os.makedirs(raiz_logs)
     print(f"📂 Los resultados se guardarán en: '{raiz_logs}'\n")
     cfg.datos["rutas"]["carpeta_logs"] = raiz_logs
-
-    gestor_socios = GestorSocios(cfg)
-    motor = MotorSimulacion(cfg, gestor_socios)
-    socios_db = gestor_socios.inicializar_db()
-
-    fecha_actual = datetime(2023, 9, 4)
-
-    semana_absoluta = 0
-    total_bajas = 0
-    historico_global = []
-    
-    # Balance Económico
-    total_acumulado = 0
-    
-    # Precios (cache)
-    PRECIOS = cfg.datos["precios"]
-
-    for mes_config in cfg.CALENDARIO_ACADEMICO:
-        mes = mes_config["mes"]
-        semanas = mes_config["semanas"]
-        peso = mes_config["peso_afluencia"]
-        abierto = mes_config["abierto"]
-        altas_objetivo = mes_config.get("nuevas_altas_aprox", 0)
-
-        if not abierto: continue
-
-        print(f"\n{'▀' * 60}")
-        print(f"📅  {mes.upper()}")
-        print(f"{'▄' * 60}")
-
-        carpeta_mes = f"{raiz_logs}/{mes}"
-        if not os.path.exists(carpeta_mes): os.makedirs(carpeta_mes)
-        
-        # --- CÁLCULO DE INGRESOS MENSUALES (SUSCRIPCIONES) ---
-        ingresos_mes = 0, 0  # (Mensual, Pase Diario/Extra) -> Tuple doesn't support assignment. Let's use vars.
-        ingresos_suscripciones = 0
-        ingresos_pases = 0
-        
-        # 1. Cobrar a los socios existentes (Renovaciones anuales en Septiembre o Mensualidades)
-        print(f"   💰 Procesando cobros para {len(socios_db)} socios...")
-        for s in socios_db:
-            if not s.get("activo", True): continue
-            
-            tipo = s.get("subtipo", "Estudiante")
-            plan = s.get("plan_pago", "Mensual")
-            
-            # Obtener precio base
-            coste = 0
-            tarifas = PRECIOS.get(tipo, PRECIOS["Estudiante"])
-            
-            if plan == "Anual":
-                # Si es Septiembre, cobranza anual general de renovacion
-                # (Asumimos que todos renuevan en Septiembre para simplificar, o cuando entran)
-                if mes == "Septiembre" and s["mes_alta"] != "Septiembre": # Si ya estaba de antes
-                     coste = tarifas.get("Anual", 0) or tarifas.get("Mensual", 0) * 12 # Fallback
-                elif s["mes_alta"] == mes: # Es nuevo de este mes (se cobrará más abajo o aquí si ya estaba en lista?
-                     # Nota: si inyectamos despues, estos no estan aqui aun.
-                     pass 
-            else: # Mensual
-                coste = tarifas.get("Mensual", 16)
-            
-            ingresos_suscripciones += coste
-
-        altas_reales_este_mes = 0
-        if altas_objetivo > 0:
-            len_antes = len(socios_db)
-            socios_db = gestor_socios.inyectar_nuevos(socios_db, altas_objetivo, mes)
-            len_despues = len(socios_db)
-            altas_reales_este_mes = len_despues - len_antes
-            
-            # Cobrar primera cuota a los NUEVOS
-            nuevos = socios_db[len_antes:]
-            for s in nuevos:
-                tipo = s.get("subtipo", "Estudiante")
-                plan = s.get("plan_pago", "Mensual")
-                tarifas = PRECIOS.get(tipo, PRECIOS["Estudiante"])
-                
-                if plan == "Anual":
-                    coste = tarifas.get("Anual", 0)
-                else:
-                    coste = tarifas.get("Mensual", 16)
-                
-                ingresos_suscripciones += coste
-                
-        print(f"      + Ingresos Suscripciones: {ingresos_suscripciones} €")
-
-        for s in range(1, semanas + 1):
-            semana_absoluta += 1
-
-            fecha_fin_semana = fecha_actual + timedelta(days=6)
-            str_rango = f"Del {fecha_actual.strftime('%d/%m')} al {fecha_fin_semana.strftime('%d/%m')}"
-
-            es_vacaciones = False
-            motivo = ""
-
-            if mes == "Enero" and s == 1:
-                es_vacaciones = True; motivo = "REYES / AÑO NUEVO"
-            elif mes == "Abril" and s == 1:
-                es_vacaciones = True; motivo = "SEMANA SANTA"
-            elif mes == "Junio" and s == semanas:
-                es_vacaciones = True; motivo = "INICIO VERANO"
-            elif mes == "Diciembre" and s == semanas:
-                es_vacaciones = True; motivo = "NAVIDAD"
-
-            if es_vacaciones:
-                print(f"\n   🏖️  SEMANA {s} ({str_rango}): ⛔ CERRADO POR {motivo} ⛔")
-                fecha_actual += timedelta(weeks=1)
-                continue
-
-            print(f"\n   ▶️  SEMANA {s} ({str_rango})")
-
-            carpeta_sem = f"{carpeta_mes}/Semana_{s}"
-            if not os.path.exists(carpeta_sem): os.makedirs(carpeta_sem)
-
-            env = simpy.Environment()
-            admin_logs = AdministradorDeLogs(carpeta_sem)
-
-            try:
-                gym = Gimnasio()
-                gym.cargar_datos_json(cfg.datos["rutas"]["archivo_gym"])
-                motor.clasificar_maquinas(gym)
-                for m in gym.maquinas: m.iniciar_simulacion(env)
-                gym.abrir_gimnasio()
-
-                visitas, no_shows = motor.generar_flota_semanal(env, gym, socios_db, semana_absoluta, peso)
-                
-                # --- INGRESOS POR PASES DIARIOS ---
-                pases_diarios = sum(1 for u in visitas if u.tipo_usuario == "Pase_Diario")
-                ingresos_pases += pases_diarios * PRECIOS["Pase_Diario"]
-
-                if not visitas and not no_shows:
-                    print("      ⚠️ Sin actividad registrada.")
-                else:
-                    env.process(motor.controlador_llegadas(env, visitas, admin_logs))
-                    # --- CAMBIO AQUÍ: Pasamos 'visitas' al gestor ---
-                    env.process(motor.gestor_semanal(env, admin_logs, fecha_actual, visitas))
-                    env.run(until=cfg.TIEMPO_SEMANAL_SIMULACION)
-
-                gym.cerrar_gimnasio()
-
-                altas_para_reporte = altas_reales_este_mes if s == 1 else 0
-                resumen = GeneradorReportes.generar_conclusiones_semanales(
-                    visitas, no_shows, carpeta_sem, mes, s, semana_absoluta, socios_db, cfg, altas_para_reporte
-                )
-                historico_global.append(resumen)
-                total_bajas += resumen["bajas"]
-
-            except Exception as e:
-                print(f"❌ Error crítico en semana {s}: {e}")
-                raise e
-
-            fecha_actual += timedelta(weeks=1)
-
-        total_mes = ingresos_suscripciones + ingresos_pases
-        total_acumulado += total_mes
-        print(f"   💵 BALANCE {mes.upper()}: {total_mes} € (Acum: {total_acumulado} €)")
-
-    GeneradorReportes.generar_informe_anual(historico_global, raiz_logs)
-    print(f"\n🎓 AÑO ACADÉMICO FINALIZADO.")
-    print(f"   Bajas Totales: {total_bajas}")
-    print(f"   GANANCIAS TOTALES: {total_acumulado} €")
-    print(f"📁 Resultados completos en: {raiz_logs}")
+    if cache: cfg.datos.setdefault("cache_semanas", {})["activa"] = True
+
+    # Reanudar (o ramificar con otro config) desde el checkpoint de una semana
+    checkpoint = cargar_checkpoint(reanudar) if reanudar else None
+    return simular_anio(cfg, raiz_logs, checkpoint, grabar_traza=grabar_traza)
+
+
+def main_replicas(n_replicas, semilla=None, procesos=None, ruta_config="config.json", objetivos=None,
+                  max_segundos=None):
+    """
+    Modo Monte Carlo: N años independientes repartidos entre todos los núcleos.
+    Con 'objetivos' N pasa a ser el máximo y se para en cuanto los IC son lo bastante estrechos.
+    """
+    carpeta = obtener_nombre_carpeta_unica("replicas")
+    ejecutor = EjecutorReplicas(ruta_config, n_replicas, semilla, procesos, carpeta)
+    if objetivos:
+        return ejecutor.ejecutar_hasta_precision(objetivos, max_replicas=n_replicas, max_segundos=max_segundos)
+    return ejecutor.ejecutar()
+
+
+def leer_objetivos(textos):
+    """['bajas=10', 'sat_media=0.5'] -> {'bajas': 10.0, 'sat_media': 0.5}"""
+    objetivos = {}
+    for texto in textos or []:
+        kpi, _, valor = texto.partition("=")
+        objetivos[kpi] = float(valor)
+    return objetivos
+
+
+def main_comparar(config_a, config_b, gym_a=None, gym_b=None, n_replicas=10, semilla=None, procesos=None,
+                  antiteticas=False):
+    """Compara dos escenarios con números aleatorios comunes (y opcionalmente antitéticas)."""
+    escenario_a = {"nombre": gym_a or config_a, "config": config_a, "gimnasio": gym_a}
+    escenario_b = {"nombre": gym_b or config_b, "config": config_b, "gimnasio": gym_b}
+    carpeta = obtener_nombre_carpeta_unica("comparacion")
+    comparador = ComparadorEscenarios(escenario_a, escenario_b, n_replicas, semilla, procesos, antiteticas, carpeta)
+    return comparador.ejecutar()
+
+
+def main_reproducir(ruta_traza, ruta_config="config.json", gym_a=None, gym_b=None):
+    """
+    Reproduce una traza de demanda contra uno o dos layouts. Con dos, ambos reciben exactamente
+    las mismas visitas y decisiones, y la diferencia B - A de cada semana es emparejada.
+    """
+    carpeta = obtener_nombre_carpeta_unica("reproduccion")
+    a = reproducir_traza(ruta_traza, gym_a, ruta_config, os.path.join(carpeta, "A"))
+    if gym_b is None: return a
+    b = reproducir_traza(ruta_traza, gym_b, ruta_config, os.path.join(carpeta, "B"))
+
+    print(f"\n⚖️  DIFERENCIA B - A ({b['gimnasio']} - {a['gimnasio']})")
+    for kpi in ("sat_media", "ocupacion_maxima"):
+        difs = [sb[kpi] - sa[kpi] for sa, sb in zip(a["semanal"], b["semanal"]) if sa["visitas"]]
+        mejores = sum(d > 0 for d in difs)
+        media = sum(difs) / len(difs) if difs else 0
+        print(f"   {kpi:<17} media {media:+.2f} | B mayor en {mejores}/{len(difs)} semanas")
+    return a, b
+
+
+def main_barrido(ruta_barrido, procesos=None, semilla=None, n_replicas=0):
+    """Barrido de parámetros (rejilla o hipercubo latino) con caché de resultados por escenario."""
+    definicion = DefinicionBarrido(ruta_barrido)
+    if semilla is not None: definicion.semilla = semilla
+    if n_replicas > 0: definicion.replicas = n_replicas
+    return EjecutorBarrido(definicion, procesos).ejecutar()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Simulación anual del gimnasio")
+    parser.add_argument("--config", default="config.json", help="Fichero de configuración")
+    parser.add_argument("--reanudar", metavar="CHECKPOINT", default=None,
+                        help="Continúa desde un checkpoint semanal (con --config distinto, crea una rama)")
+    parser.add_argument("--replicas", type=int, default=0, help="Nº de años independientes a simular en paralelo")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla raíz (reproduce la ejecución exacta)")
+    parser.add_argument("--replica", type=int, default=0, help="Réplica a reproducir con esa semilla raíz")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--comparar", metavar="CONFIG_B", default=None,
+                        help="Compara --config (A) contra este config (B) con números aleatorios comunes")
+    parser.add_argument("--gimnasio", default=None, help="Layout del gimnasio del escenario A")
+    parser.add_argument("--gimnasio-b", default=None, help="Layout del gimnasio del escenario B")
+    parser.add_argument("--antiteticas", action="store_true", help="Añade la réplica antitética de cada réplica")
+    parser.add_argument("--precision", nargs="+", metavar="KPI=SEMIANCHO", default=None,
+                        help="Réplicas hasta que el IC de cada KPI anual sea así de estrecho (ej: bajas=10 ingresos=500)")
+    parser.add_argument("--max-segundos", type=float, default=None, help="Presupuesto de tiempo con --precision")
+    parser.add_argument("--grabar-traza", metavar="RUTA", default=None,
+                        help="Graba la demanda del año (.npz) para reproducirla contra otros layouts")
+    parser.add_argument("--reproducir", metavar="TRAZA", default=None,
+                        help="Reproduce una traza contra --gimnasio (y --gimnasio-b, emparejado) sin generar demanda")
+    parser.add_argument("--barrido", metavar="DEFINICION", default=None,
+                        help="Barrido de parámetros descrito en un JSON (ver Barrido.py); sólo simula los puntos nuevos")
+    parser.add_argument("--cache", action="store_true",
+                        help="Lee de la caché las semanas ya simuladas con las mismas entradas (ver CacheSemanas.py)")
+    args = parser.parse_args()
+
+    if args.barrido:
+        main_barrido(args.barrido, args.procesos, args.semilla, args.replicas)
+    elif args.reproducir:
+        main_reproducir(args.reproducir, args.config, args.gimnasio, args.gimnasio_b)
+    elif args.comparar:
+        main_comparar(args.config, args.comparar, args.gimnasio, args.gimnasio_b, args.replicas or 10,
+                      args.semilla, args.procesos, args.antiteticas)
+    elif args.precision:
+        main_replicas(args.replicas or 200, args.semilla, args.procesos, args.config, leer_objetivos(args.precision),
+                      args.max_segundos)
+    elif args.replicas > 0:
+        main_replicas(args.replicas, args.semilla, args.procesos, args.config)
+    else:
+        main(args.config, args.semilla, args.replica, args.reanudar, args.grabar_traza, args.cache)
@@ -2,6 +2,8 @@ import simpy
 import random
 from Perfil import Perfil
 from Problema import Problema
+from Gimnasio import IndiceMaquinas
+from Loggers import SESIONES, EVENTOS
 import json
 
 try:
@@ -15,7 +17,7 @@ class Usuario:
     def __init__(self, env: simpy.Environment, gimnasio,
                  id_usuario: int, nombre: str, tipo_usuario: str, tiempo_llegada: float,
                  rutina: list, perfil: Perfil, problema: Problema,
-                 config: dict,
+                 config: "Parametros",
                  subtipo: str = "Estudiante", plan_pago: str = "Mensual",  # Nuevos campos
                  ocupado: bool = False, hora_fin: float = 0, faltas_consecutivas: int = 0):
 
@@ -41,12 +43,22 @@ class Usuario:
         self.numero_sesion = None
         self.process = None
 
-    def _notificar(self, mensaje, emoji, tipo_evento, datos_extra=None):
-        tiempo_sim = f"[{self.env.now:6.2f}]"
-        print(f"{tiempo_sim} {emoji} {self.nombre} {mensaje}")
-        self._log_evento(f"{emoji} {mensaje}", tipo_evento, datos_extra)
-
-    def _log_evento(self, mensaje, tipo_evento, datos_extra=None):
+    def _notificar(self, plantilla, emoji, tipo_evento, *args, datos_extra=None):
+        """Evento del usuario (sumidero + log de sesión); plantilla.format(*args) sólo si alguien lo usa."""
+        logs = self.logger_sesion
+        if logs is None: return
+        if logs.nivel >= EVENTOS:
+            logs.evento(EVENTOS, self.env.now, tipo_evento, "[{:6.2f}] {} {} " + plantilla,
+                        self.env.now, emoji, self.nombre, *args)
+        if logs.registrando:
+            self._registrar(f"{emoji} {plantilla.format(*args)}", tipo_evento, datos_extra)
+
+    def _log_evento(self, plantilla, tipo_evento, *args, datos_extra=None):
+        """Sólo para el log de sesión."""
+        if self.logger_sesion is not None and self.logger_sesion.registrando:
+            self._registrar(plantilla.format(*args), tipo_evento, datos_extra)
+
+    def _registrar(self, mensaje, tipo_evento, datos_extra):
         if self.logger_sesion:
             if datos_extra is None: datos_extra = {}
             self.logger_sesion.log(f"[{self.nombre}] {mensaje}", tipo_evento)
@@ -70,14 +82,14 @@ class Usuario:
             self.satisfaccion = 100
 
     def entrenar(self, tiempo_total: float):
-        PARAMS = self.config["satisfaccion"]
-        pen_salida = PARAMS.get("penalizacion_salida_forzada", 2)
-        pen_rota = PARAMS.get("penalizacion_maquina_rota", 5)
+        params = self.config
+        pen_salida = params.penalizacion_salida_forzada
+        pen_rota = params.penalizacion_maquina_rota
 
         # --- BLOQUE TRY PARA CAPTURAR LA EXPULSIÓN DE SESIÓN ---
         try:
-            self._notificar(f"entra al gimnasio (Meta: {tiempo_total}m)", "🚪", "INICIO",
-                            {"duracion": tiempo_total, "satisfaccion_inicio": self.satisfaccion})
+            self._notificar("entra al gimnasio (Meta: {}m)", "🚪", "INICIO", tiempo_total,
+                            datos_extra={"duracion": tiempo_total, "satisfaccion_inicio": self.satisfaccion})
 
             yield from self._preparacion()
 
@@ -100,11 +112,11 @@ class Usuario:
                 # Gestión de Cola
                 cola_actual = len(maquina.cola)
                 if cola_actual > 0:
-                    self._notificar(f"hace cola en {maquina.nombre} ({cola_actual} pax)", "🧘", "ESPERA_COLA",
-                                    {"maquina": maquina.nombre, "cola_tamano": cola_actual})
+                    self._notificar("hace cola en {} ({} pax)", "🧘", "ESPERA_COLA", maquina.nombre, cola_actual,
+                                    datos_extra={"maquina": maquina.nombre, "cola_tamano": cola_actual})
                 else:
-                    self._notificar(f"va directo a {maquina.nombre}", "🏃", "ESPERA_COLA",
-                                    {"maquina": maquina.nombre, "cola_tamano": 0})
+                    self._notificar("va directo a {}", "🏃", "ESPERA_COLA", maquina.nombre,
+                                    datos_extra={"maquina": maquina.nombre, "cola_tamano": 0})
 
                 try:
                     with maquina.resource.request() as peticion:
@@ -114,28 +126,32 @@ class Usuario:
                         t_espera = self.env.now - t_inicio
 
                         # Lógica de paciencia
-                        limite = PARAMS.get("minutos_paciencia_cola", 2)
-                        tasa = PARAMS.get("penalizacion_espera_cola", 2.0)
+                        limite = params.minutos_paciencia_cola
+                        tasa = params.penalizacion_espera_cola
 
                         if t_espera > limite:
                             penalizacion = int((t_espera - limite) * tasa)
                             if penalizacion > 0:
                                 self._actualizar_satisfaccion(-penalizacion)
-                                print(f"      😡 {self.nombre} odia esperar: {t_espera:.1f}m (Sat -{penalizacion})")
+                                if self.logger_sesion is not None:
+                                    self.logger_sesion.evento(EVENTOS, self.env.now, "PENALIZACION_COLA",
+                                                              "      😡 {} odia esperar: {:.1f}m (Sat -{})",
+                                                              self.nombre, t_espera, penalizacion)
 
                         # Chequeo post-cola
                         if (self.hora_fin > 0) and (self.env.now + duracion_ejercicio > self.hora_fin):
                             self._actualizar_satisfaccion(-pen_salida)
-                            self._notificar(f"deja {maquina.nombre} sin usar (no time)", "🏃💨", "ABANDONO_MAQUINA")
+                            self._notificar("deja {} sin usar (no time)", "🏃💨", "ABANDONO_MAQUINA", maquina.nombre)
                             break
 
-                        self._notificar(f"empieza en {maquina.nombre} ({duracion_ejercicio}m)", "💪", "USO_MAQUINA",
-                                        {"maquina": maquina.nombre, "duracion": duracion_ejercicio})
+                        self._notificar("empieza en {} ({}m)", "💪", "USO_MAQUINA", maquina.nombre, duracion_ejercicio,
+                                        datos_extra={"maquina": maquina.nombre, "duracion": duracion_ejercicio})
 
                         try:
                             # Aquí se bloquea haciendo ejercicio (o es interrumpido)
                             yield from maquina.hacer(self, duracion_ejercicio)
-                            self._log_evento(f"Libera {maquina.nombre}", "FIN_MAQUINA", {"maquina": maquina.nombre})
+                            self._log_evento("Libera {}", "FIN_MAQUINA", maquina.nombre,
+                                             datos_extra={"maquina": maquina.nombre})
 
                         except Exception as e:
                             # Si es interrupción de SimPy, la relanzamos para que la capture el bloque externo
@@ -143,7 +159,7 @@ class Usuario:
 
                             # Si es rotura de máquina
                             self._actualizar_satisfaccion(-pen_rota)
-                            self._notificar(f"¡{maquina.nombre} SE ROMPIÓ!", "💥", "MAQUINA_ROTA")
+                            self._notificar("¡{} SE ROMPIÓ!", "💥", "MAQUINA_ROTA", maquina.nombre)
                             continue
 
                 except simpy.Interrupt as i:
@@ -158,31 +174,35 @@ class Usuario:
                 self._actualizar_satisfaccion(-5)  # Pequeña molestia por echarle
                 self._notificar("¡FIN DE SESIÓN! Es expulsado del gimnasio.", "🚨", "SALIDA_CIERRE")
             else:
-                print(f"Interrupción desconocida para {self.nombre}: {i.cause}")
+                if self.logger_sesion is not None:
+                    self.logger_sesion.evento(SESIONES, self.env.now, "INTERRUPCION",
+                                              "Interrupción desconocida para {}: {}", self.nombre, i.cause)
 
     def _buscarMaquinaPorTipo(self, tipo_deseado: str):
-        PARAMS = self.config["satisfaccion"]
-        pen_sin_maq = PARAMS.get("penalizacion_sin_maquina", 1)
+        pen_sin_maq = self.config.penalizacion_sin_maquina
 
-        todas = [m for m in self.gimnasio.maquinas if m.tipo_maquina == tipo_deseado]
+        indice = self.gimnasio.indice_maquinas
+        if indice is None:
+            # Gimnasio sin índice (no creado con nueva_semana): lo montamos ahora
+            indice = self.gimnasio.indice_maquinas = IndiceMaquinas(self.gimnasio.maquinas)
 
-        if not todas:
+        if not indice.tiene_tipo(tipo_deseado):
             self._actualizar_satisfaccion(-pen_sin_maq)
-            self._log_evento(f"No hay máquinas tipo {tipo_deseado}", "ERROR_MAQUINA")
+            self._log_evento("No hay máquinas tipo {}", "ERROR_MAQUINA", tipo_deseado)
             return None
 
-        operativas = [m for m in todas if m.disponibilidad]
-        if not operativas:
+        mejor_maquina = indice.menos_cola(tipo_deseado)
+        if mejor_maquina is None:
             self._actualizar_satisfaccion(-pen_sin_maq)
-            self._notificar(f"ve todas las {tipo_deseado} rotas", "🔧", "MAQUINAS_ROTAS")
+            self._notificar("ve todas las {} rotas", "🔧", "MAQUINAS_ROTAS", tipo_deseado)
             return None
 
-        mejor_maquina = min(operativas, key=lambda m: len(m.cola))
         cola_mejor = len(mejor_maquina.cola)
 
         if cola_mejor > self.perfil.paciencia_maxima:
             self._actualizar_satisfaccion(-pen_sin_maq)
-            self._notificar(f"ve mucha cola ({cola_mejor}) en {mejor_maquina.nombre} y pasa.", "😤", "ABANDONO_POR_COLA")
+            self._notificar("ve mucha cola ({}) en {} y pasa.", "😤", "ABANDONO_POR_COLA",
+                            cola_mejor, mejor_maquina.nombre)
             return None
 
         return mejor_maquina
@@ -191,11 +211,11 @@ class Usuario:
         yield self.env.timeout(self.perfil.tiempo_preparacion())
 
     def _descanso(self):
-        self._notificar(f"descansa un poco...", "🥤", "DESCANSO")
+        self._notificar("descansa un poco...", "🥤", "DESCANSO")
         yield self.env.timeout(self.perfil.tiempo_descanso())
 
     def _preguntarAMonitor(self):
         if not self.gimnasio.monitores: return
         monitor = min(self.gimnasio.monitores, key=lambda m: len(m.cola))
-        self._notificar(f"pregunta a {monitor.nombre}...", "🗣️", "CONSULTA_MONITOR")
+        self._notificar("pregunta a {}...", "🗣️", "CONSULTA_MONITOR", monitor.nombre)
         yield from monitor.preguntar(self)
\ No newline at end of file